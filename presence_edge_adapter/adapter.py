@@ -0,0 +1,240 @@
+"""HTTP adapter for running the Lambda@Edge functions locally.
+
+Receives HTTP requests, wraps them in CloudFront origin-request events, runs
+the edge function and returns its response as HTTP. Requests are served
+concurrently, one thread each.
+
+The function runs either in `sam local start-lambda`, through one pooled
+Lambda client, or in this process (--in-process), which imports
+<package>.app.handler from <repo>/<package>/src and calls it directly.
+With --record FILE every event is also appended to FILE as a JSON line, to
+be replayed by replay.py.
+
+    python3 presence_edge_adapter/adapter.py --port 10043 --function EdgeHcFunction --lambda-endpoint http://localhost:10042
+    python3 presence_edge_adapter/adapter.py --port 10043 --in-process presence_edge_hc
+"""
+
+import argparse
+import base64
+import importlib
+import json
+import logging
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from urllib.parse import urlparse
+
+logger = logging.getLogger(__name__)
+
+REPO_DIR = Path(__file__).resolve().parent.parent
+
+# Concurrent Lambda invocations (and pooled connections to sam local)
+MAX_CONNECTIONS = 16
+
+
+def build_cf_event(method, path, headers, querystring="", body=None):
+    """Build a CloudFront origin-request event from HTTP request data."""
+    cf_headers = {}
+    for key, value in headers.items():
+        cf_headers[key.lower()] = [{"key": key, "value": value}]
+
+    request = {
+        "uri": path,
+        "method": method,
+        "headers": cf_headers,
+        "querystring": querystring,
+    }
+
+    if body is not None:
+        request["body"] = {
+            "inputTruncated": False,
+            "action": "read-only",
+            "encoding": "base64",
+            "data": base64.b64encode(body).decode("ascii"),
+        }
+
+    return {
+        "Records": [
+            {
+                "cf": {
+                    "config": {
+                        "distributionId": "LOCAL",
+                        "eventType": "origin-request",
+                    },
+                    "request": request,
+                }
+            }
+        ]
+    }
+
+
+class LambdaInvoker:
+    """Invoke a function in `sam local start-lambda` through one shared, pooled client."""
+
+    def __init__(self, endpoint, function_name, max_connections=MAX_CONNECTIONS):
+        import boto3
+        from botocore.config import Config
+
+        self.endpoint = endpoint
+        self.function_name = function_name
+        self.client = boto3.client(
+            "lambda",
+            endpoint_url=endpoint,
+            region_name="us-east-1",
+            aws_access_key_id="local",
+            aws_secret_access_key="local",
+            config=Config(max_pool_connections=max_connections, read_timeout=60, retries={"max_attempts": 0}),
+        )
+
+    def __call__(self, event):
+        resp = self.client.invoke(FunctionName=self.function_name, Payload=json.dumps(event))
+        return json.loads(resp["Payload"].read())
+
+    def __str__(self):
+        return f"Lambda {self.function_name} at {self.endpoint}"
+
+
+def load_handler(package):
+    """Import <package>.app.handler from <repo>/<package>/src."""
+    src = str(REPO_DIR / package / "src")
+    if src not in sys.path:
+        sys.path.insert(0, src)
+    return importlib.import_module(f"{package}.app").handler
+
+
+class InProcessInvoker:
+    """Call an edge package's handler in this process."""
+
+    def __init__(self, package):
+        self.package = package
+        self.handler = load_handler(package)
+
+    def __call__(self, event):
+        # Round trip through JSON like a Lambda payload, so both modes see the same values
+        return json.loads(json.dumps(self.handler(event, None)))
+
+    def __str__(self):
+        return f"{self.package}.app.handler in process"
+
+
+class EdgeAdapterHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    invoke = None  # set by make_server
+
+    def _send(self, status, headers=(), body=b""):
+        self.send_response(status)
+        for key, value in headers:
+            self.send_header(key, value)
+        # 1xx, 204 and 304 responses have no body and must not declare one
+        bodiless = status < 200 or status in (204, 304)
+        if not bodiless:
+            self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        if self.command != "HEAD" and not bodiless:
+            self.wfile.write(body)
+
+    def _handle(self):
+        parsed = urlparse(self.path)
+
+        body = None
+        content_length = int(self.headers.get("Content-Length", 0))
+        if content_length > 0:
+            body = self.rfile.read(content_length)
+
+        cf_event = build_cf_event(
+            method=self.command,
+            path=parsed.path,
+            headers=dict(self.headers),
+            querystring=parsed.query,
+            body=body,
+        )
+
+        try:
+            result = self.invoke(cf_event)
+        except Exception as e:
+            logger.error("Lambda invocation failed: %s", e)
+            self._send(502, [("Content-Type", "text/plain")], f"Lambda invocation error: {e}".encode())
+            return
+
+        if "status" in result:
+            # Lambda returned a response (intercepted)
+            headers = [
+                (entry["key"], entry["value"])
+                for key, vals in result.get("headers", {}).items()
+                if key != "content-length"
+                for entry in vals
+            ]
+            body = result.get("body", "")
+            self._send(int(result["status"]), headers, body.encode() if isinstance(body, str) else body)
+        elif "uri" in result:
+            # Lambda forwarded the request (passthrough)
+            self._send(204, [("X-Edge-Passthrough", "true"), ("X-Edge-URI", result["uri"])])
+        else:
+            logger.warning("Unexpected Lambda response: %s", result)
+            self._send(502, [("Content-Type", "text/plain")], b"Unexpected Lambda response")
+
+    def log_message(self, format, *args):
+        logger.info("%s %s", self.address_string(), format % args)
+
+    do_GET = _handle
+    do_POST = _handle
+    do_PUT = _handle
+    do_PATCH = _handle
+    do_DELETE = _handle
+    do_HEAD = _handle
+    do_OPTIONS = _handle
+
+
+class Recorder:
+    """Wrap an invoker, appending every event it receives to a JSON lines file."""
+
+    def __init__(self, invoke, path):
+        self.invoke = invoke
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, event):
+        line = json.dumps(event) + "\n"
+        with self._lock, open(self.path, "a") as f:
+            f.write(line)
+        return self.invoke(event)
+
+    def __str__(self):
+        return f"{self.invoke}, recording to {self.path}"
+
+
+def make_server(invoke, port, host="0.0.0.0"):
+    """Return a threaded HTTP server that runs every request through `invoke`."""
+    handler_class = type("BoundEdgeAdapterHandler", (EdgeAdapterHandler,), {"invoke": staticmethod(invoke)})
+    server = ThreadingHTTPServer((host, port), handler_class)
+    server.daemon_threads = True
+    return server
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serve a Lambda@Edge function over HTTP for local development.")
+    parser.add_argument("--port", type=int, required=True, help="port to listen on")
+    parser.add_argument("--function", help="function name in the SAM template")
+    parser.add_argument("--lambda-endpoint", help="sam local start-lambda endpoint, e.g. http://localhost:3343")
+    parser.add_argument("--in-process", metavar="PACKAGE", help="call PACKAGE.app.handler in this process instead")
+    parser.add_argument("--record", metavar="FILE", help="append every CloudFront event to FILE (JSON lines)")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(asctime)s %(message)s")
+
+    if args.in_process:
+        invoke = InProcessInvoker(args.in_process)
+    elif args.function and args.lambda_endpoint:
+        invoke = LambdaInvoker(args.lambda_endpoint, args.function)
+    else:
+        parser.error("either --in-process or both --function and --lambda-endpoint are required")
+    if args.record:
+        invoke = Recorder(invoke, args.record)
+
+    server = make_server(invoke, args.port)
+    logger.info("Edge adapter listening on port %d -> %s", args.port, invoke)
+    server.serve_forever()
+
+
+if __name__ == "__main__":
+    main()
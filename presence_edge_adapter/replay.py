@@ -0,0 +1,155 @@
+"""Replay CloudFront events against the Lambda@Edge handlers and report their cost.
+
+Each handler is called in process with its fixture events, round robin, and
+the harness reports per handler the p50/p99/max latency of a call, the
+memory it allocates (peak traced by tracemalloc, measured in a separate pass
+so tracing does not skew the timings) and the largest response it returned,
+to compare against the Lambda@Edge size limits.
+
+Events come from generated fixtures (built like the adapter builds them) or
+from a JSON lines file recorded with `adapter.py --record FILE`:
+
+    python3 presence_edge_adapter/replay.py --iterations 20000
+    python3 presence_edge_adapter/replay.py --events presence_edge_root=/tmp/root-events.jsonl --json results.json
+
+/edge/hc/ready is not generated: it calls the origin, so it would measure
+the network rather than the handler.
+"""
+
+import argparse
+import base64
+import contextlib
+import copy
+import io
+import json
+import statistics
+import time
+import tracemalloc
+
+from adapter import build_cf_event, load_handler
+
+PACKAGES = ("presence_edge_auth", "presence_edge_cors", "presence_edge_hc", "presence_edge_root")
+
+_HEADERS = {"Host": "presence.example.com", "User-Agent": "replay", "Accept": "*/*"}
+
+
+def _google_credential():
+    """Unsigned JWT shaped like a Google id_token (the handler only decodes the payload)."""
+    def segment(data):
+        return base64.urlsafe_b64encode(json.dumps(data).encode()).rstrip(b"=").decode()
+    claims = {"name": "Ann", "email": "ann@example.com", "picture": "https://example.com/ann.png"}
+    return f"{segment({'alg': 'RS256'})}.{segment(claims)}.signature"
+
+
+def _origin_response_event(path):
+    """Origin-response event, as the CORS function receives it."""
+    event = build_cf_event("GET", path, _HEADERS)
+    cf = event["Records"][0]["cf"]
+    cf["config"]["eventType"] = "origin-response"
+    cf["response"] = {
+        "status": "200",
+        "statusDescription": "OK",
+        "headers": {"content-type": [{"key": "Content-Type", "value": "text/html"}]},
+    }
+    return event
+
+
+def generated_events(package):
+    """Return representative events for a package's handler."""
+    if package == "presence_edge_auth":
+        body = json.dumps({"credential": _google_credential()}).encode()
+        return [
+            build_cf_event("POST", "/edge/auth/google/callback", {**_HEADERS, "Content-Type": "application/json"}, body=body),
+            build_cf_event("GET", "/edge/auth/status", _HEADERS),
+            build_cf_event("GET", "/app/place.html", _HEADERS, "place=brave-quiet-beach"),
+        ]
+    if package == "presence_edge_cors":
+        return [_origin_response_event("/app/place.html"), _origin_response_event("/fn/place/brave-quiet-beach/presence")]
+    if package == "presence_edge_hc":
+        return [build_cf_event("GET", "/edge/hc/live", _HEADERS), build_cf_event("GET", "/edge/hc/other", _HEADERS)]
+    if package == "presence_edge_root":
+        return [build_cf_event("GET", path, _HEADERS) for path in ("/", "/brave-quiet-beach", "/notaplaceid", "/a/b")]
+    raise ValueError(f"no generated events for {package}")
+
+
+def load_events(path):
+    """Load events recorded one JSON object per line."""
+    with open(path) as f:
+        return [json.loads(line) for line in f if line.strip()]
+
+
+def percentile(values, fraction):
+    """Nearest-rank percentile of a non-empty list."""
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(fraction * len(ordered)))]
+
+
+def _response_size(result):
+    return len(json.dumps(result).encode())
+
+
+def replay(handler, events, iterations, alloc_iterations=200):
+    """Call `handler` `iterations` times over `events` and return its stats."""
+    # Handlers may modify their event (the CORS one adds headers), so each call gets its own copy
+    calls = [copy.deepcopy(events[i % len(events)]) for i in range(iterations)]
+    timings = []
+    largest = 0
+    with contextlib.redirect_stdout(io.StringIO()):
+        for event in calls[:min(len(calls), 50)]:
+            handler(copy.deepcopy(event), None)  # warm up
+        for event in calls:
+            started = time.perf_counter_ns()
+            result = handler(event, None)
+            timings.append(time.perf_counter_ns() - started)
+        for event in events:
+            largest = max(largest, _response_size(handler(copy.deepcopy(event), None)))
+
+        peaks = []
+        tracemalloc.start()
+        try:
+            for i in range(min(alloc_iterations, iterations)):
+                event = copy.deepcopy(events[i % len(events)])
+                tracemalloc.reset_peak()
+                before = tracemalloc.get_traced_memory()[0]
+                result = handler(event, None)
+                peaks.append(tracemalloc.get_traced_memory()[1] - before)
+                del result
+        finally:
+            tracemalloc.stop()
+
+    return {
+        "calls": iterations,
+        "p50_us": percentile(timings, 0.50) / 1000,
+        "p99_us": percentile(timings, 0.99) / 1000,
+        "max_us": max(timings) / 1000,
+        "alloc_peak_bytes": int(statistics.mean(peaks)) if peaks else 0,
+        "max_response_bytes": largest,
+    }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--iterations", type=int, default=10000, help="calls per handler")
+    parser.add_argument("--packages", nargs="+", default=list(PACKAGES), choices=PACKAGES)
+    parser.add_argument("--events", action="append", default=[], metavar="PACKAGE=FILE",
+                        help="replay events recorded in FILE (JSON lines) instead of the generated ones")
+    parser.add_argument("--json", metavar="FILE", help="also write the results to FILE")
+    args = parser.parse_args(argv)
+
+    recorded = dict(spec.split("=", 1) for spec in args.events)
+    results = {}
+    print(f"{'handler':<22} {'events':>6} {'calls':>7} {'p50 µs':>9} {'p99 µs':>9} {'max µs':>9} {'alloc KiB':>10} {'resp B':>8}")
+    for package in args.packages:
+        events = load_events(recorded[package]) if package in recorded else generated_events(package)
+        stats = replay(load_handler(package), events, args.iterations)
+        results[package] = {"events": len(events), **stats}
+        print(f"{package:<22} {len(events):>6} {stats['calls']:>7} {stats['p50_us']:>9.1f} {stats['p99_us']:>9.1f} "
+              f"{stats['max_us']:>9.1f} {stats['alloc_peak_bytes'] / 1024:>10.1f} {stats['max_response_bytes']:>8}")
+
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(results, f, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,101 @@
+import http.client
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import pytest
+from adapter import InProcessInvoker, build_cf_event, make_server
+
+
+def _serve(invoke):
+    server = make_server(invoke, 0, host="127.0.0.1")
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def _get(server, path, method="GET", body=None):
+    conn = http.client.HTTPConnection("127.0.0.1", server.server_address[1], timeout=5)
+    conn.request(method, path, body=body)
+    resp = conn.getresponse()
+    return resp.status, dict(resp.getheaders()), resp.read()
+
+
+@pytest.fixture
+def servers():
+    started = []
+    yield lambda invoke: started.append(_serve(invoke)) or started[-1]
+    for server in started:
+        server.shutdown()
+        server.server_close()
+
+
+class TestBuildCfEvent:
+    def test_request_fields(self):
+        event = build_cf_event("POST", "/fn/x", {"Host": "example.com"}, "a=1", b"hi")
+        request = event["Records"][0]["cf"]["request"]
+
+        assert request["uri"] == "/fn/x"
+        assert request["querystring"] == "a=1"
+        assert request["headers"]["host"] == [{"key": "Host", "value": "example.com"}]
+        assert request["body"]["data"] == "aGk="
+
+
+class TestEdgeAdapter:
+    def test_intercepted_response(self, servers):
+        server = servers(lambda event: {
+            "status": "302",
+            "headers": {"location": [{"key": "Location", "value": "/fn/place/brave-quiet-beach"}]},
+        })
+
+        status, headers, body = _get(server, "/")
+
+        assert status == 302
+        assert headers["Location"] == "/fn/place/brave-quiet-beach"
+
+    def test_passthrough(self, servers):
+        server = servers(lambda event: event["Records"][0]["cf"]["request"])
+
+        status, headers, _ = _get(server, "/app/place.html?x=1")
+
+        assert status == 204
+        assert headers["X-Edge-URI"] == "/app/place.html"
+        assert "Content-Length" not in headers
+
+    def test_not_modified_has_no_content_length(self, servers):
+        server = servers(lambda event: {"status": "304", "headers": {"etag": [{"key": "ETag", "value": '"v1"'}]}})
+
+        status, headers, body = _get(server, "/")
+
+        assert status == 304
+        assert "Content-Length" not in headers
+        assert body == b""
+
+    def test_invoke_error_returns_502(self, servers):
+        def fail(event):
+            raise RuntimeError("container failed")
+
+        status, _, body = _get(servers(fail), "/")
+
+        assert status == 502
+        assert b"container failed" in body
+
+    def test_requests_are_served_concurrently(self, servers):
+        def slow(event):
+            time.sleep(0.3)
+            return {"status": "200", "body": "ok"}
+
+        server = servers(slow)
+        started = time.monotonic()
+        with ThreadPoolExecutor(max_workers=5) as pool:
+            statuses = list(pool.map(lambda _: _get(server, "/")[0], range(5)))
+
+        assert statuses == [200] * 5
+        assert time.monotonic() - started < 1.0
+
+    def test_in_process_edge_root(self, servers):
+        server = servers(InProcessInvoker("presence_edge_root"))
+
+        status, headers, _ = _get(server, "/brave-quiet-beach")
+
+        assert status == 302
+        assert headers["Location"] == "/fn/place/brave-quiet-beach"
@@ -0,0 +1,31 @@
+import pytest
+from adapter import Recorder, build_cf_event, load_handler
+from replay import PACKAGES, generated_events, load_events, percentile, replay
+
+
+class TestReplay:
+    @pytest.mark.parametrize("package", PACKAGES)
+    def test_generated_events_replay(self, package):
+        stats = replay(load_handler(package), generated_events(package), iterations=20, alloc_iterations=5)
+
+        assert stats["calls"] == 20
+        assert 0 < stats["p50_us"] <= stats["p99_us"] <= stats["max_us"]
+        assert stats["max_response_bytes"] > 0
+
+    def test_recorded_events_are_replayed(self, tmp_path):
+        path = tmp_path / "events.jsonl"
+        record = Recorder(lambda event: {"status": "200"}, path)
+        record(build_cf_event("GET", "/brave-quiet-beach", {"Host": "example.com"}))
+        record(build_cf_event("GET", "/", {"Host": "example.com"}))
+
+        events = load_events(path)
+
+        assert [e["Records"][0]["cf"]["request"]["uri"] for e in events] == ["/brave-quiet-beach", "/"]
+        stats = replay(load_handler("presence_edge_root"), events, iterations=10, alloc_iterations=2)
+        assert stats["calls"] == 10
+
+    def test_percentile(self):
+        values = list(range(1, 101))
+
+        assert percentile(values, 0.50) == 51
+        assert percentile(values, 0.99) == 100
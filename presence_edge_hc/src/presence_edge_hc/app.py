@@ -1,8 +1,16 @@
+import http.client
 import json
+import logging
 import os
 import ssl
-import urllib.request
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from concurrent.futures import TimeoutError as FuturesTimeoutError
 import boto3
+from botocore.config import Config
+
+logger = logging.getLogger(__name__)
 
 
 # ---------------------------------------------------------------------------
@@ -10,35 +18,121 @@ import boto3
 # ---------------------------------------------------------------------------
 
 _ssm_client = None
-_api_host_cache = {}
 _config_cache = None
 
 CONFIG_PATH = os.path.join(os.path.dirname(__file__), "config.json")
 
-
-def _load_config():
-    """Load tenant/env IDs from config.json baked in at build time."""
+# Origins are reached by names their certificates do not cover (API Gateway
+# hosts, the local proxy container), so certificates are not verified
+_ssl_context = ssl.create_default_context()
+_ssl_context.check_hostname = False
+_ssl_context.verify_mode = ssl.CERT_NONE
+
+# Idle keep-alive connections per target, reused across warm invocations
+_idle_connections = {}
+_connections_lock = threading.Lock()
+_probe_pool = ThreadPoolExecutor(max_workers=4)
+
+# SSM values are served from memory for SSM_TTL seconds, then refreshed in the
+# background while the stale value keeps being served. Each SSM call gives up
+# after SSM_TIMEOUT seconds.
+SSM_TTL = 300
+SSM_TIMEOUT = 1
+
+# Lambda@Edge viewer functions time out after 5s. The origin probe gets what
+# is left of the invocation (or of FUNCTION_TIMEOUT without a context) after
+# the SSM lookup, which may spend SSM_TIMEOUT connecting and SSM_TIMEOUT
+# reading, minus RESPONSE_MARGIN to build and return the response.
+FUNCTION_TIMEOUT = 5
+RESPONSE_MARGIN = 0.5
+ORIGIN_TIMEOUT = FUNCTION_TIMEOUT - 2 * SSM_TIMEOUT - RESPONSE_MARGIN
+
+
+def _read_config():
     global _config_cache
     if _config_cache is None:
         with open(CONFIG_PATH) as f:
             _config_cache = json.load(f)
-    return _config_cache["tenant_id"], _config_cache["env_id"]
+    return _config_cache
+
+
+def _load_config():
+    """Load tenant/env IDs from config.json baked in at build time."""
+    config = _read_config()
+    return config["tenant_id"], config["env_id"]
 
 
 def _get_ssm_client():
+    """SSM client; config.json (or SSM_ENDPOINT_URL) may point it at a local stand-in such as LocalStack."""
     global _ssm_client
     if _ssm_client is None:
-        _ssm_client = boto3.client("ssm", region_name="us-east-1")
+        endpoint_url = _read_config().get("ssm_endpoint_url") or os.getenv("SSM_ENDPOINT_URL") or None
+        _ssm_client = boto3.client(
+            "ssm",
+            region_name="us-east-1",
+            endpoint_url=endpoint_url,
+            config=Config(connect_timeout=SSM_TIMEOUT, read_timeout=SSM_TIMEOUT, retries={"max_attempts": 1}),
+        )
     return _ssm_client
 
 
+class ParameterCache:
+    """SSM parameter values with a TTL, refreshed in the background once stale.
+
+    Only a parameter's first lookup waits for SSM. Afterwards the cached value
+    is returned immediately; once it is `ttl` seconds old a single background
+    refresh replaces it, and a failed refresh is logged and retried on a later
+    lookup while the stale value keeps being served.
+    """
+
+    def __init__(self, fetch, ttl=SSM_TTL):
+        self.fetch = fetch
+        self.ttl = ttl
+        self._values = {}  # name -> (value, fetched_at)
+        self._refreshing = set()
+        self._lock = threading.Lock()
+
+    def get(self, name):
+        with self._lock:
+            cached = self._values.get(name)
+            if cached is not None:
+                value, fetched_at = cached
+                if time.monotonic() - fetched_at >= self.ttl and name not in self._refreshing:
+                    self._refreshing.add(name)
+                    threading.Thread(target=self._refresh, args=(name,), daemon=True).start()
+                return value
+        value = self.fetch(name)
+        with self._lock:
+            self._values[name] = (value, time.monotonic())
+        return value
+
+    def _refresh(self, name):
+        try:
+            value = self.fetch(name)
+        except Exception as e:
+            logger.warning(f"Refreshing SSM parameter {name} failed, serving the cached value: {e}")
+        else:
+            with self._lock:
+                self._values[name] = (value, time.monotonic())
+        finally:
+            with self._lock:
+                self._refreshing.discard(name)
+
+    def clear(self):
+        with self._lock:
+            self._values.clear()
+
+
+def _fetch_parameter(name):
+    return _get_ssm_client().get_parameter(Name=name)["Parameter"]["Value"]
+
+
+_parameters = ParameterCache(_fetch_parameter)
+
+
 def _get_api_host(tenant_id, env_id):
-    """Fetch the API Gateway host from SSM (cached across invocations)."""
-    key = f"/{tenant_id}/{env_id}/PresenceAPIHost"
-    if key not in _api_host_cache:
-        resp = _get_ssm_client().get_parameter(Name=key)
-        _api_host_cache[key] = resp["Parameter"]["Value"]
-    return _api_host_cache[key]
+    """Fetch the API Gateway host from SSM (cached across invocations, see ParameterCache)."""
+    return _parameters.get(f"/{tenant_id}/{env_id}/PresenceAPIHost")
 
 def _json_response(status_code, body):
     """Build a CloudFront-compatible JSON response."""
@@ -67,19 +161,21 @@ def _get_host(request):
 # Origin health fetch
 # ---------------------------------------------------------------------------
 
-def _fetch_origin_health(host):
+def _fetch_origin_health(host, deadline=None):
     """Fetch origin healthcheck at /fn/__hc from the API Gateway origin.
 
     Calls the API Gateway directly (via SSM-cached host) to avoid recursion
     through CloudFront, which blocks outbound calls to the same distribution.
     When running locally (host includes a port), falls back to the proxy container.
+    Targets are probed concurrently and the first healthy answer wins, waiting
+    at most ORIGIN_TIMEOUT seconds and never past `deadline` (time.monotonic()).
     """
     port = ""
     if ":" in host:
         _, port = host.rsplit(":", 1)
 
     if port:
-        # Local dev: try host first, then proxy container
+        # Local dev: probe the host and the proxy container
         targets = [host, f"proxy:{port}"]
     else:
         # Production: call API Gateway origin directly
@@ -87,31 +183,64 @@ def _fetch_origin_health(host):
             tenant_id, env_id = _load_config()
             api_host = _get_api_host(tenant_id, env_id)
             targets = [api_host]
-        except Exception:
+        except Exception as e:
+            logger.error(f"Could not resolve the API host from SSM, probing {host} instead: {e}")
             targets = [host]
 
-    ctx = ssl.create_default_context()
-    ctx.check_hostname = False
-    ctx.verify_mode = ssl.CERT_NONE
-
+    timeout = ORIGIN_TIMEOUT
+    if deadline is not None:
+        timeout = max(0.0, min(timeout, deadline - time.monotonic()))
+    futures = [_probe_pool.submit(_request_health, target) for target in targets]
     last_error = None
-    for target in targets:
-        try:
-            url = f"https://{target}/fn/__hc"
-            req = urllib.request.Request(url, method="GET")
-            req.add_header("Host", target)
-            with urllib.request.urlopen(req, timeout=5, context=ctx) as resp:
-                if resp.status != 200:
-                    last_error = Exception(f"origin returned {resp.status}")
-                    continue
-                body = resp.read().decode("utf-8")
-                return json.loads(body)
-        except Exception as e:
-            last_error = e
+    try:
+        for future in as_completed(futures, timeout=timeout):
+            try:
+                return future.result()
+            except Exception as e:
+                last_error = e
+    except FuturesTimeoutError:
+        last_error = last_error or Exception(f"origin did not answer within {timeout:.1f}s")
 
     return {"error": str(last_error)}
 
 
+def _checkout_connection(target):
+    """Return (connection, reused) for a target, reusing an idle one when available."""
+    with _connections_lock:
+        idle = _idle_connections.get(target)
+        if idle:
+            return idle.pop(), True
+    return http.client.HTTPSConnection(target, timeout=ORIGIN_TIMEOUT, context=_ssl_context), False
+
+
+def _checkin_connection(target, conn):
+    with _connections_lock:
+        _idle_connections.setdefault(target, []).append(conn)
+
+
+def _request_health(target):
+    """GET https://{target}/fn/__hc over a keep-alive connection and return the parsed body."""
+    while True:
+        conn, reused = _checkout_connection(target)
+        try:
+            conn.request("GET", "/fn/__hc", headers={"Host": target})
+            resp = conn.getresponse()
+            body = resp.read()
+        except (http.client.HTTPException, OSError) as e:
+            conn.close()
+            if reused and not isinstance(e, TimeoutError):
+                # The origin closed the idle connection; retry on a new one
+                continue
+            raise
+        if resp.will_close:
+            conn.close()
+        else:
+            _checkin_connection(target, conn)
+        if resp.status != 200:
+            raise Exception(f"origin returned {resp.status}")
+        return json.loads(body.decode("utf-8"))
+
+
 # ---------------------------------------------------------------------------
 # Route handlers
 # ---------------------------------------------------------------------------
@@ -121,10 +250,10 @@ def _handle_live():
     return _json_response(200, {"health_status": "LIVE"})
 
 
-def _handle_ready(request):
+def _handle_ready(request, deadline=None):
     """Readiness probe — checks edge *and* origin health."""
     host = _get_host(request)
-    fn_health = _fetch_origin_health(host) if host else {"error": "no host header"}
+    fn_health = _fetch_origin_health(host, deadline) if host else {"error": "no host header"}
 
     has_error = "error" in fn_health
     fn_status = fn_health.get("health_status", "ERROR")
@@ -144,7 +273,7 @@ def _handle_ready(request):
 # ---------------------------------------------------------------------------
 
 _ROUTES = {
-    "/edge/hc/live": lambda _req: _handle_live(),
+    "/edge/hc/live": lambda _req, _deadline: _handle_live(),
     "/edge/hc/ready": _handle_ready,
 }
 
@@ -155,6 +284,7 @@ def handler(event, context):
 
     route = _ROUTES.get(uri)
     if route:
-        return route(request)
+        remaining = context.get_remaining_time_in_millis() / 1000 if context is not None else FUNCTION_TIMEOUT
+        return route(request, time.monotonic() + remaining - RESPONSE_MARGIN)
 
     return _json_response(400, {"error": "not found"})
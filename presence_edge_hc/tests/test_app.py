@@ -1,5 +1,10 @@
 import json
+import threading
+import time
 from unittest.mock import patch
+
+import pytest
+from presence_edge_hc import app
 from presence_edge_hc.app import handler
 
 
@@ -95,3 +100,169 @@ class TestEdgeHcHandler:
         result = handler(event, None)
 
         assert result["status"] == "400"
+
+
+class FakeResponse:
+    def __init__(self, status, body):
+        self.status = status
+        self.will_close = False
+        self._body = body
+
+    def read(self):
+        return self._body
+
+
+class FakeConnection:
+    opened = []
+
+    def __init__(self, host, timeout=None, context=None):
+        self.host = host
+        self.requests = 0
+        self.closed = False
+        FakeConnection.opened.append(self)
+
+    def request(self, method, path, headers=None):
+        self.requests += 1
+
+    def getresponse(self):
+        return FakeResponse(200, b'{"health_status": "OK"}')
+
+    def close(self):
+        self.closed = True
+
+
+class StaleConnection(FakeConnection):
+    def getresponse(self):
+        raise ConnectionResetError("closed by peer")
+
+
+class TestOriginHealthFetch:
+    def setup_method(self):
+        app._idle_connections.clear()
+        FakeConnection.opened = []
+
+    def test_first_healthy_target_wins(self):
+        release = threading.Event()
+
+        def request_health(target):
+            if target == "localhost:3000":
+                release.wait(2)
+                raise ConnectionRefusedError("slow and down")
+            return {"health_status": "OK", "target": target}
+
+        with patch("presence_edge_hc.app._request_health", side_effect=request_health):
+            result = app._fetch_origin_health("localhost:3000")
+        release.set()
+
+        assert result == {"health_status": "OK", "target": "proxy:3000"}
+
+    def test_error_when_every_target_fails(self):
+        with patch("presence_edge_hc.app._request_health", side_effect=ConnectionRefusedError("refused")):
+            result = app._fetch_origin_health("localhost:3000")
+
+        assert result == {"error": "refused"}
+
+    def test_wait_ends_at_the_deadline(self):
+        release = threading.Event()
+
+        def request_health(target):
+            release.wait(2)
+            raise ConnectionRefusedError("too late")
+
+        started = time.monotonic()
+        with patch("presence_edge_hc.app._request_health", side_effect=request_health):
+            result = app._fetch_origin_health("localhost:3000", deadline=started + 0.1)
+        release.set()
+
+        assert time.monotonic() - started < 1
+        assert "did not answer" in result["error"]
+
+    def test_budget_fits_the_function_timeout(self):
+        assert 2 * app.SSM_TIMEOUT + app.ORIGIN_TIMEOUT + app.RESPONSE_MARGIN <= app.FUNCTION_TIMEOUT
+
+    def test_connection_is_kept_alive_across_probes(self):
+        with patch("presence_edge_hc.app.http.client.HTTPSConnection", FakeConnection):
+            assert app._request_health("api.example.com") == {"health_status": "OK"}
+            assert app._request_health("api.example.com") == {"health_status": "OK"}
+
+        assert len(FakeConnection.opened) == 1
+        assert FakeConnection.opened[0].requests == 2
+
+    def test_stale_connection_is_replaced(self):
+        stale = StaleConnection("api.example.com")
+        app._idle_connections["api.example.com"] = [stale]
+
+        with patch("presence_edge_hc.app.http.client.HTTPSConnection", FakeConnection):
+            assert app._request_health("api.example.com") == {"health_status": "OK"}
+
+        assert stale.closed
+        assert len(FakeConnection.opened) == 2
+
+
+class FakeSsmClient:
+    """Stands in for SSM: serves `values`, or raises while `error` is set."""
+
+    def __init__(self, values):
+        self.values = values
+        self.error = None
+        self.calls = 0
+
+    def get_parameter(self, Name):
+        self.calls += 1
+        if self.error:
+            raise self.error
+        return {"Parameter": {"Name": Name, "Value": self.values[Name]}}
+
+
+def _wait_for_refresh(cache):
+    for _ in range(200):
+        if not cache._refreshing:
+            return
+        time.sleep(0.01)
+
+
+class TestParameterCache:
+    NAME = "/presence-env/project/PresenceAPIHost"
+
+    def setup_method(self):
+        self.ssm = FakeSsmClient({self.NAME: "abc.execute-api.us-east-1.amazonaws.com"})
+        self.cache = app.ParameterCache(lambda name: self.ssm.get_parameter(Name=name)["Parameter"]["Value"], ttl=300)
+
+    def test_value_is_cached_within_ttl(self):
+        assert self.cache.get(self.NAME) == "abc.execute-api.us-east-1.amazonaws.com"
+        assert self.cache.get(self.NAME) == "abc.execute-api.us-east-1.amazonaws.com"
+        assert self.ssm.calls == 1
+
+    def test_stale_value_is_served_while_refreshing(self):
+        self.cache.get(self.NAME)
+        self.ssm.values[self.NAME] = "new.execute-api.us-east-1.amazonaws.com"
+        with patch("presence_edge_hc.app.time.monotonic", return_value=time.monotonic() + 301):
+            assert self.cache.get(self.NAME) == "abc.execute-api.us-east-1.amazonaws.com"
+        _wait_for_refresh(self.cache)
+
+        assert self.cache.get(self.NAME) == "new.execute-api.us-east-1.amazonaws.com"
+        assert self.ssm.calls == 2
+
+    def test_failed_refresh_keeps_stale_value(self, caplog):
+        self.cache.get(self.NAME)
+        self.ssm.error = Exception("throttled")
+        with patch("presence_edge_hc.app.time.monotonic", return_value=time.monotonic() + 301):
+            assert self.cache.get(self.NAME) == "abc.execute-api.us-east-1.amazonaws.com"
+            _wait_for_refresh(self.cache)
+            assert self.cache.get(self.NAME) == "abc.execute-api.us-east-1.amazonaws.com"
+
+        assert "throttled" in caplog.text
+
+    def test_first_lookup_failure_is_raised(self):
+        self.ssm.error = Exception("access denied")
+
+        with pytest.raises(Exception, match="access denied"):
+            self.cache.get(self.NAME)
+
+    def test_api_host_lookup_failure_is_logged(self, caplog):
+        with patch("presence_edge_hc.app._get_api_host", side_effect=Exception("access denied")), \
+                patch("presence_edge_hc.app._request_health", return_value={"health_status": "OK"}) as request_health:
+            app._fetch_origin_health("example.com")
+
+        request_health.assert_called_once_with("example.com")
+        assert "access denied" in caplog.text
@@ -1,14 +1,45 @@
 import json
+import random
 import re
+from pathlib import Path
 
 
-# Place IDs follow the adjective-adjective-place format (e.g. brave-sunny-beach)
+# Place IDs follow the adjective-adjective-place format (e.g. brave-quiet-beach)
 _PLACE_ID_RE = re.compile(r"^[a-z]+-[a-z]+-[a-z]+$")
 
+# Word lists shared with presence_sam's routes/huid.py (symlinked into the package)
+_DATA_DIR = Path(__file__).parent
 
-def _redirect(location):
+
+def _load_words(filename):
+    """Load words from a text file, one word per line."""
+    with (_DATA_DIR / filename).open() as f:
+        return tuple(line.strip() for line in f if line.strip())
+
+
+ADJECTIVES = _load_words("_adjectives.txt")
+PLACES = _load_words("_places.txt")
+_ADJECTIVE_SET = frozenset(ADJECTIVES)
+_PLACE_SET = frozenset(PLACES)
+
+
+def generate_place_id():
+    """Generate a place ID in adjective-adjective-place format."""
+    return f"{random.choice(ADJECTIVES)}-{random.choice(ADJECTIVES)}-{random.choice(PLACES)}"
+
+
+def is_place_id(segment):
+    """Return True when `segment` is an adjective-adjective-place ID made of known words."""
+    segment = segment.lower()
+    if not _PLACE_ID_RE.match(segment):
+        return False
+    adj1, adj2, place = segment.split("-")
+    return adj1 in _ADJECTIVE_SET and adj2 in _ADJECTIVE_SET and place in _PLACE_SET
+
+
+def _redirect(location, headers=None):
     """Return a 302 redirect response."""
-    return {
+    response = {
         "status": "302",
         "statusDescription": "Found",
         "headers": {
@@ -16,6 +47,9 @@ def _redirect(location):
             "cache-control": [{"key": "Cache-Control", "value": "no-cache"}],
         },
     }
+    for key, value in (headers or {}).items():
+        response["headers"][key.lower()] = [{"key": key, "value": value}]
+    return response
 
 
 def _bad_request(message):
@@ -37,9 +71,10 @@ def handler(event, context):
     # Strip trailing slash for consistent matching (but keep "/" as-is)
     parts = [p for p in uri.split("/") if p]
 
-    # Zero path components: / → redirect to /fn/index
+    # Zero path components: / → redirect to a new place
     if len(parts) == 0:
-        return _redirect("/fn/index")
+        place_id = generate_place_id()
+        return _redirect(f"/fn/place/{place_id}", {"X-Place-ID": place_id})
 
     # More than one path component: /a/b/... → 400
     if len(parts) > 1:
@@ -48,7 +83,7 @@ def handler(event, context):
     # Exactly one path component: /{something}
     segment = parts[0]
 
-    if _PLACE_ID_RE.match(segment.lower()):
+    if is_place_id(segment):
         return _redirect(f"/fn/place/{segment}")
 
     return _bad_request(f"invalid path: '{segment}' is not a valid place id")
@@ -1,5 +1,5 @@
 import json
-from presence_edge_root.app import handler
+from presence_edge_root.app import ADJECTIVES, PLACES, handler, is_place_id
 
 
 def _make_cf_event(uri, method="GET", host="example.com"):
@@ -27,29 +27,31 @@ def _make_cf_event(uri, method="GET", host="example.com"):
 
 
 class TestEdgeRootHandler:
-    def test_root_redirects_to_fn_index(self):
+    def test_root_redirects_to_new_place(self):
         event = _make_cf_event("/")
         result = handler(event, None)
 
         assert result["status"] == "302"
         location = result["headers"]["location"][0]["value"]
-        assert location == "/fn/index"
+        place_id = result["headers"]["x-place-id"][0]["value"]
+        assert location == f"/fn/place/{place_id}"
+        assert is_place_id(place_id)
 
     def test_place_id_redirects(self):
-        event = _make_cf_event("/brave-sunny-beach")
+        event = _make_cf_event("/brave-quiet-beach")
         result = handler(event, None)
 
         assert result["status"] == "302"
         location = result["headers"]["location"][0]["value"]
-        assert location == "/fn/place/brave-sunny-beach"
+        assert location == "/fn/place/brave-quiet-beach"
 
     def test_place_id_case_insensitive(self):
-        event = _make_cf_event("/Brave-Sunny-Beach")
+        event = _make_cf_event("/Brave-Quiet-Beach")
         result = handler(event, None)
 
         assert result["status"] == "302"
         location = result["headers"]["location"][0]["value"]
-        assert location == "/fn/place/Brave-Sunny-Beach"
+        assert location == "/fn/place/Brave-Quiet-Beach"
 
     def test_non_place_id_single_segment_returns_400(self):
         event = _make_cf_event("/notaplaceid")
@@ -83,6 +85,18 @@ class TestEdgeRootHandler:
         body = json.loads(result["body"])
         assert "not a valid place id" in body["error"]
 
+    def test_unknown_words_return_400(self):
+        event = _make_cf_event("/brave-quiet-zzzz")
+        result = handler(event, None)
+
+        assert result["status"] == "400"
+        body = json.loads(result["body"])
+        assert "not a valid place id" in body["error"]
+
+    def test_word_lists_are_packaged(self):
+        assert "brave" in ADJECTIVES
+        assert "beach" in PLACES
+
     def test_two_word_hyphenated_returns_400(self):
         event = _make_cf_event("/brave-sunny")
         result = handler(event, None)
@@ -0,0 +1,93 @@
+"""Benchmark: encoding a large GET /fn/place/{id}/events payload.
+
+Compares the serialization path the route used before orjson (the driver
+decodes json columns with the standard library, JSONResponse encodes the
+page again) with the current one (json columns selected as text, embedded
+with raw_json and encoded by ORJSONResponse). No database is needed: rows
+are built in memory in the shape the query returns.
+
+    python -m benchmarks.bench_events_json --events 1000 --snapshot-bytes 20000
+"""
+
+import argparse
+import base64
+import json
+import os
+import statistics
+import time
+from datetime import datetime, timedelta, timezone
+
+from fastapi.responses import JSONResponse
+
+from presence_sam.responses import ORJSONResponse
+from presence_sam.routes.events import _event_dict
+
+
+def _rows(count: int, snapshot_bytes: int):
+    """Build events rows as (id, event_type, people, pets, payload, created_at, snapshot_id) with text json columns."""
+    start = datetime.now(timezone.utc) - timedelta(hours=1)
+    snapshot = "data:image/jpeg;base64," + base64.b64encode(os.urandom(snapshot_bytes)).decode() if snapshot_bytes else None
+    rows = []
+    for i in range(count):
+        people = [{"name": f"person-{i % 7}", "descriptor": [round(j * 0.001, 6) for j in range(128)],
+                   "box": {"x": 10, "y": 20, "width": 64, "height": 64}}]
+        pets = [{"species": "dog", "score": 0.91}] if i % 3 == 0 else []
+        payload = {"faceCount": 1, "camera": "front"}
+        if snapshot:
+            payload["snapshot"] = snapshot
+        rows.append((i + 1, "snapshotTaken", json.dumps(people), json.dumps(pets), json.dumps(payload),
+                     start + timedelta(seconds=5 * i), None))
+    return rows
+
+
+def _before(rows):
+    """Stdlib path: decode every json column, then encode the whole page."""
+    events = []
+    for row in rows:
+        people, pets, payload = json.loads(row[2]), json.loads(row[3]), json.loads(row[4])
+        events.append({
+            "event_id": row[0],
+            "event_type": row[1],
+            "people": people or [],
+            "pets": pets or [],
+            "payload": payload or {},
+            "created_at": row[5].isoformat(),
+            "snapshot_id": row[6],
+        })
+    return JSONResponse(content={"place_id": "p", "events": events, "total": len(events)}).body
+
+
+def _after(rows):
+    """Current route path."""
+    events = [_event_dict(row) for row in rows]
+    return ORJSONResponse(content={"place_id": "p", "events": events, "total": len(events)}).body
+
+
+def _measure(fn, rows, repeat: int):
+    timings = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        body = fn(rows)
+        timings.append((time.perf_counter() - started) * 1000)
+    return statistics.median(timings), len(body)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--events", type=int, default=1000)
+    parser.add_argument("--snapshot-bytes", type=int, default=20000, help="legacy inline snapshot size per event (0 for none)")
+    parser.add_argument("--repeat", type=int, default=20)
+    args = parser.parse_args()
+
+    rows = _rows(args.events, args.snapshot_bytes)
+    before_ms, before_size = _measure(_before, rows, args.repeat)
+    after_ms, after_size = _measure(_after, rows, args.repeat)
+    assert json.loads(_before(rows)) == json.loads(_after(rows)), "both paths must produce the same document"
+
+    print(f"{args.events} events, {before_size / 1e6:.1f} MB body")
+    print(f"before (json + JSONResponse):       {before_ms:8.1f} ms")
+    print(f"after  (raw_json + ORJSONResponse): {after_ms:8.1f} ms  ({before_ms / after_ms:.1f}x)")
+
+
+if __name__ == "__main__":
+    main()
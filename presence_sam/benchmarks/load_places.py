@@ -0,0 +1,295 @@
+"""Load test: cameras and hub viewers of many places against presence_sam.
+
+Simulates --places places, each with --cameras camera pages
+(presence_lib/src/app.js) and --viewers hub pages
+(presence_web/src/app/js/presence_ui/hub.js):
+
+- a camera loads its history (GET /events?limit=1000) when the page opens
+  and again on the page's hourly (+-10%) reload. It PUTs a snapshotTaken
+  event every 15s; when it sees motion (probability --motion per snapshot)
+  it switches to a 30s burst with a snapshot every 5s. Events carry people
+  of the place (a UUID subject_id and a 128-float descriptor each, named
+  once someone names them), pets, and a JPEG data URL snapshot of
+  --snapshot-bytes. With probability --rename an event's people are named
+  afterwards (POST /events), as the history panel does.
+- a viewer polls /presence and /occupancy of the last --minutes, and
+  /events passing the previous cursor as `after`, every 15s. Like a browser
+  revalidating its cached responses, it sends the previous ETag as
+  If-None-Match.
+
+By default the app is started with uvicorn in a child process on a free
+port, using the database configured through DB_HOST/DB_USER/DB_PASSWORD
+(e.g. the docker compose Postgres); --url targets a server that is already
+running instead. SQL statements and database time per operation are taken
+from the responses' Server-Timing header (SERVER_TIMING must not be false).
+--time-scale shortens every interval, e.g. 0.1 runs the cadences ten times
+faster, to find where the service saturates.
+
+Needs httpx and uvicorn (pip install -r tests/requirements.txt):
+
+    python -m benchmarks.load_places --places 20 --cameras 2 --viewers 3 --duration 120
+"""
+
+import argparse
+import asyncio
+import base64
+import os
+import random
+import re
+import socket
+import subprocess
+import sys
+import time
+import uuid
+from collections import defaultdict
+
+import httpx
+
+NORMAL_INTERVAL = 15.0
+BURST_INTERVAL = 5.0
+BURST_DURATION = 30.0
+POLL_INTERVAL = 15.0
+RELOAD_INTERVAL = 3600.0
+RELOAD_VARIATION = 0.10
+
+_NAMES = ("ann", "bob", "cleo", "dan", "eve", "fay", "gus", "hal")
+_SPECIES = ("dog", "cat", "bird")
+_SERVER_TIMING = re.compile(r'db;desc="(\d+) statements";dur=([\d.]+)')
+
+
+class Stats:
+    """Latencies, outcomes and database cost per operation."""
+
+    def __init__(self):
+        self.latencies = defaultdict(list)
+        self.statuses = defaultdict(lambda: defaultdict(int))
+        self.errors = defaultdict(int)
+        self.statements = defaultdict(int)
+        self.db_ms = defaultdict(float)
+
+    def record(self, op, started, resp):
+        self.latencies[op].append((time.perf_counter() - started) * 1000)
+        self.statuses[op][resp.status_code] += 1
+        timing = _SERVER_TIMING.search(resp.headers.get("server-timing", ""))
+        if timing:
+            self.statements[op] += int(timing.group(1))
+            self.db_ms[op] += float(timing.group(2))
+
+    def fail(self, op):
+        self.errors[op] += 1
+
+
+def _descriptor():
+    return [round(random.uniform(-0.25, 0.25), 6) for _ in range(128)]
+
+
+def _snapshot(size):
+    return "data:image/jpeg;base64," + base64.b64encode(os.urandom(size)).decode()
+
+
+class Person:
+    """Someone who visits a place: a stable subject_id and face descriptor."""
+
+    def __init__(self):
+        self.subject_id = str(uuid.uuid4())
+        self.descriptor = _descriptor()
+        self.name = "unknown"
+
+
+def snapshot_event(visitors, snapshot_bytes, motion):
+    """Build a snapshotTaken body like App.emitSnapshot sends it."""
+    people = [{
+        "subject_id": person.subject_id,
+        "name": person.name,
+        "score": round(random.uniform(0.6, 0.99), 3),
+        "box": {"x": random.uniform(0, 500), "y": random.uniform(0, 300), "width": 90.0, "height": 110.0},
+        "descriptor": [round(v + random.uniform(-0.01, 0.01), 6) for v in person.descriptor],
+    } for person in random.sample(visitors, min(len(visitors), random.choice((0, 1, 1, 2, 3))))]
+    pets = [{
+        "subject_id": str(uuid.uuid4()),
+        "name": species,
+        "species": species,
+        "score": round(random.uniform(0.5, 0.95), 3),
+        "bbox": [10.0, 20.0, 120.0, 80.0],
+        "aspectRatio": 1.5,
+        "color": "#8a6b4f",
+    } for species in random.sample(_SPECIES, random.choice((0, 0, 0, 1)))]
+    return {
+        "event_type": "snapshotTaken",
+        "faceCount": len(people),
+        "animalCount": len(pets),
+        "people": people,
+        "pets": pets,
+        "timestamp": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+        "snapshot": _snapshot(snapshot_bytes),
+        "motion": motion,
+    }
+
+
+async def _request(client, stats, op, method, path, **kwargs):
+    """Send one request and record it; returns the response, or None on a transport error."""
+    started = time.perf_counter()
+    try:
+        resp = await client.request(method, path, **kwargs)
+    except httpx.HTTPError:
+        stats.fail(op)
+        return None
+    stats.record(op, started, resp)
+    return resp
+
+
+async def camera(client, stats, place_id, visitors, args, deadline):
+    names = random.sample(_NAMES, 3)
+    by_id = {person.subject_id: person for person in visitors}
+    burst_until = reload_at = 0.0
+    await asyncio.sleep(random.uniform(0, NORMAL_INTERVAL * args.time_scale))
+    while time.monotonic() < deadline:
+        now = time.monotonic()
+        if now >= reload_at:
+            # The page (re)loads and seeds its recognition history
+            await _request(client, stats, "GET history", "GET", f"/fn/place/{place_id}/events", params={"limit": 1000})
+            variation = 1 + random.uniform(-RELOAD_VARIATION, RELOAD_VARIATION)
+            reload_at = now + RELOAD_INTERVAL * variation * args.time_scale
+        if now >= burst_until and random.random() < args.motion:
+            burst_until = now + BURST_DURATION * args.time_scale
+        burst = now < burst_until
+        body = snapshot_event(visitors, args.snapshot_bytes, burst)
+        resp = await _request(client, stats, "PUT events", "PUT", f"/fn/place/{place_id}/events", json=body)
+        if resp is not None and resp.status_code == 200 and body["people"] and random.random() < args.rename:
+            # Someone names the people of the event in the history panel
+            seen = [by_id[sent["subject_id"]] for sent in body["people"]]
+            for person in seen:
+                if person.name == "unknown":
+                    person.name = random.choice(names)
+            update = {
+                "event_id": resp.json()["event_id"],
+                "people": [{"name": person.name} for person in seen],
+                "pets": [{"name": pet["name"], "species": pet["species"]} for pet in body["pets"]],
+            }
+            await _request(client, stats, "POST events", "POST", f"/fn/place/{place_id}/events", json=update)
+        await asyncio.sleep((BURST_INTERVAL if burst else NORMAL_INTERVAL) * args.time_scale)
+
+
+async def viewer(client, stats, place_id, args, deadline):
+    cursor, etags = None, {}
+    await asyncio.sleep(random.uniform(0, POLL_INTERVAL * args.time_scale))
+    while time.monotonic() < deadline:
+        polls = [
+            ("GET presence", "presence", {"minutes": args.minutes}),
+            ("GET events", "events", {"minutes": args.minutes, **({"after": cursor} if cursor else {})}),
+            ("GET occupancy", "occupancy", {"minutes": args.minutes}),
+        ]
+        responses = await asyncio.gather(*(
+            _request(client, stats, op, "GET", f"/fn/place/{place_id}/{path}", params=params,
+                     headers={"If-None-Match": etags[op]} if op in etags else {})
+            for op, path, params in polls
+        ))
+        for (op, _, _), resp in zip(polls, responses):
+            if resp is not None and resp.status_code == 200:
+                if resp.headers.get("etag"):
+                    etags[op] = resp.headers["etag"]
+                if op == "GET events":
+                    cursor = resp.json().get("cursor") or cursor
+        await asyncio.sleep(POLL_INTERVAL * args.time_scale)
+
+
+def _free_port():
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _start_server():
+    """Serve the app with uvicorn in a child process; returns its URL and process."""
+    from presence_sam.database import create_db_and_tables
+
+    create_db_and_tables()
+    port = _free_port()
+    env = {**os.environ, "SERVER_TIMING": "true"}
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "presence_sam.app:app", "--host", "127.0.0.1", "--port", str(port),
+         "--log-level", "warning"],
+        env=env,
+    )
+    url = f"http://127.0.0.1:{port}"
+    for _ in range(200):
+        if process.poll() is not None:
+            raise SystemExit(f"uvicorn exited with status {process.returncode}")
+        try:
+            httpx.get(f"{url}/fn/__version", timeout=1)
+            return url, process
+        except httpx.HTTPError:
+            time.sleep(0.1)
+    process.terminate()
+    raise SystemExit("uvicorn did not start")
+
+
+def _percentile(values, fraction):
+    return values[min(len(values) - 1, int(fraction * len(values)))]
+
+
+def report(stats, elapsed):
+    total = sum(len(values) for values in stats.latencies.values())
+    print(f"{'operation':<14} {'requests':>8} {'req/s':>7} {'p50 ms':>8} {'p90 ms':>8} {'p99 ms':>8} {'max ms':>8} "
+          f"{'sql/req':>7} {'db ms':>6} {'errors':>6}  statuses")
+    for op in sorted(set(stats.latencies) | set(stats.errors)):
+        values = sorted(stats.latencies[op]) or [0.0]
+        count = len(stats.latencies[op]) or 1
+        statuses = ", ".join(f"{code}: {n}" for code, n in sorted(stats.statuses[op].items()))
+        print(f"{op:<14} {len(stats.latencies[op]):>8} {len(stats.latencies[op]) / elapsed:>7.1f} {_percentile(values, 0.5):>8.1f} "
+              f"{_percentile(values, 0.9):>8.1f} {_percentile(values, 0.99):>8.1f} {values[-1]:>8.1f} "
+              f"{stats.statements[op] / count:>7.1f} {stats.db_ms[op] / count:>6.1f} {stats.errors[op]:>6}  {statuses}")
+    print(f"total: {total} requests in {elapsed:.1f}s, {total / elapsed:.1f} req/s")
+    statements = sum(stats.statements.values())
+    if statements and total:
+        db_seconds = sum(stats.db_ms.values()) / 1000
+        print(f"database: {statements} statements ({statements / total:.1f} per request), "
+              f"{db_seconds:.1f}s in SQL ({db_seconds * 1000 / total:.1f} ms per request)")
+
+
+async def run(args):
+    process = None
+    base_url = args.url
+    if base_url is None:
+        base_url, process = _start_server()
+
+    stats = Stats()
+    limits = httpx.Limits(max_connections=args.connections, max_keepalive_connections=args.connections)
+    started = time.monotonic()
+    deadline = started + args.duration
+    try:
+        async with httpx.AsyncClient(base_url=base_url, limits=limits, timeout=30, verify=False) as client:
+            workers = []
+            for _ in range(args.places):
+                place_id = f"load-{uuid.uuid4().hex[:8]}-place"
+                visitors = [Person() for _ in range(args.people)]
+                workers += [camera(client, stats, place_id, visitors, args, deadline) for _ in range(args.cameras)]
+                workers += [viewer(client, stats, place_id, args, deadline) for _ in range(args.viewers)]
+            await asyncio.gather(*workers)
+    finally:
+        if process is not None:
+            process.terminate()
+            process.wait()
+    report(stats, time.monotonic() - started)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--places", type=int, default=10)
+    parser.add_argument("--cameras", type=int, default=2, help="cameras per place")
+    parser.add_argument("--viewers", type=int, default=2, help="hub viewers per place")
+    parser.add_argument("--duration", type=float, default=60, help="seconds to run")
+    parser.add_argument("--motion", type=float, default=0.2, help="chance a snapshot starts a burst")
+    parser.add_argument("--people", type=int, default=6, help="people who visit each place")
+    parser.add_argument("--rename", type=float, default=0.05, help="chance an event's people are named afterwards")
+    parser.add_argument("--minutes", type=int, default=1440, help="time window of the hub viewers")
+    parser.add_argument("--snapshot-bytes", type=int, default=15000, help="JPEG bytes per snapshot")
+    parser.add_argument("--time-scale", type=float, default=1.0, help="multiplier for every interval")
+    parser.add_argument("--connections", type=int, default=100, help="maximum concurrent HTTP connections")
+    parser.add_argument("--url", help="base URL of a running server instead of starting one")
+    args = parser.parse_args(argv)
+    asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,11 +1,12 @@
 from mangum import Mangum
 from fastapi import FastAPI
 import importlib
-import pkgutil
 import os
 import logging
 from datetime import datetime
-from . import routes
+
+from .responses import ORJSONResponse
+from .sql_metrics import SqlMetricsMiddleware
 
 # Setup logging
 logger = logging.getLogger()
@@ -17,28 +18,33 @@ COMMIT_SHA = os.getenv("GIT_COMMIT", "unknown")
 
 logger.info(f"🚀 Presence Lambda initializing - Version: {VERSION}, Commit: {COMMIT_SHA}")
 
-app = FastAPI(title="Presence API", version=VERSION)
+app = FastAPI(title="Presence API", version=VERSION, default_response_class=ORJSONResponse)
+app.add_middleware(SqlMetricsMiddleware)
 
 
-def include_discovered_routers(application: FastAPI) -> None:
-    """Auto-discover routers in the routes package and include them.
+def include_routers(application: FastAPI) -> None:
+    """Include the routers of the modules listed in the route manifest.
 
-    Any module under routes.* that exposes a `router` attribute will be included.
+    The manifest is generated at build time (see route_manifest.py); without
+    one, the routes package is scanned instead. Modules sharing fn_router
+    include it only once.
     """
-    module_names = sorted(
-        module.name
-        for module in pkgutil.iter_modules(routes.__path__, routes.__name__ + ".")
-    )
-    for module_name in module_names:
+    try:
+        from .routes._manifest import ROUTE_MODULES
+    except ImportError:
+        from .route_manifest import discover_route_modules
+        ROUTE_MODULES = discover_route_modules()
+    included = []
+    for module_name in ROUTE_MODULES:
         module = importlib.import_module(module_name)
         router = getattr(module, "router", None)
-        if router is not None:
+        if router is not None and not any(router is r for r in included):
             application.include_router(router)
+            included.append(router)
 
 
-from .database import create_db_and_tables
-
-include_discovered_routers(app)
-create_db_and_tables()
+# The database engine is created, and the schema migrated, on the first request
+# that needs it, so routes like /fn/__version never wait for the database.
+include_routers(app)
 
 handler = Mangum(app)
@@ -0,0 +1,325 @@
+"""Archival of cold events to compressed per-place, per-day files.
+
+Events older than ARCHIVE_AFTER_DAYS (whole UTC days) are written to
+`<target>/<place_id>/<YYYY-MM-DD>.jsonl.gz`, one JSON object per line in the
+shape GET /fn/place/{id}/events returns plus place_id, and are then deleted
+together with their event_subjects links and event_changes rows,
+ARCHIVE_BATCH_SIZE events per transaction. The snapshots the day's events
+reference are written next to it, to `<YYYY-MM-DD>.snapshots.jsonl.gz`
+(snapshot_id, media_type, base64 data, created_at per line), and each batch
+also deletes the snapshots no remaining event references. Occupancy rollups
+are kept. Monthly events partitions left empty are dropped.
+
+The target is a directory or an s3://bucket/prefix URL (ARCHIVE_S3_ENDPOINT_URL
+selects an S3-compatible store). A day file is always complete before any of
+its rows are deleted; if a run stops halfway, the next one merges what is
+still in the database into the existing files. Pending offline schema
+migrations are applied before a run.
+
+    python -m presence_sam.archive --target s3://presence-archive/events --days 30
+"""
+
+import argparse
+import base64
+import gzip
+import logging
+import os
+import shutil
+import tempfile
+import time
+from contextlib import closing
+from datetime import datetime, timedelta, timezone
+from pathlib import Path
+
+import orjson
+from sqlmodel import Session, text
+
+from . import partitions
+from .database import get_engine
+from .migrations import migrate
+from .place_versions import touch_place_sync
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_AFTER_DAYS = int(os.getenv("ARCHIVE_AFTER_DAYS") or "30")
+ARCHIVE_TARGET = os.getenv("ARCHIVE_TARGET") or ""
+ARCHIVE_BATCH_SIZE = int(os.getenv("ARCHIVE_BATCH_SIZE") or "1000")
+
+# Rows fetched per round trip while writing a day file
+_FETCH_SIZE = 500
+# Snapshots (images of up to a few hundred kB) fetched per round trip
+_SNAPSHOT_FETCH_SIZE = 20
+
+
+class FileStore:
+    """Archive files under a local directory."""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+
+    def open_existing(self, key: str):
+        path = self.root / key
+        return path.open("rb") if path.exists() else None
+
+    def put(self, key: str, local_path: str):
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + ".tmp")
+        shutil.copyfile(local_path, tmp)
+        os.replace(tmp, path)
+
+
+class S3Store:
+    """Archive files in an S3 (or S3-compatible) bucket."""
+
+    def __init__(self, url: str):
+        import boto3
+        bucket, _, prefix = url.removeprefix("s3://").partition("/")
+        self.bucket, self.prefix = bucket, prefix.strip("/")
+        self.client = boto3.client("s3", endpoint_url=os.getenv("ARCHIVE_S3_ENDPOINT_URL") or None)
+
+    def _key(self, key: str) -> str:
+        return f"{self.prefix}/{key}" if self.prefix else key
+
+    def open_existing(self, key: str):
+        try:
+            return self.client.get_object(Bucket=self.bucket, Key=self._key(key))["Body"]
+        except self.client.exceptions.NoSuchKey:
+            return None
+
+    def put(self, key: str, local_path: str):
+        self.client.upload_file(local_path, self.bucket, self._key(key),
+                                ExtraArgs={"ContentType": "application/x-ndjson", "ContentEncoding": "gzip"})
+
+
+def open_store(target: str):
+    """Return the store for a directory path or s3:// URL."""
+    if not target:
+        raise ValueError("an archive target (directory or s3:// URL) is required")
+    return S3Store(target) if target.startswith("s3://") else FileStore(target)
+
+
+def archive_key(place_id: str, day: datetime) -> str:
+    return f"{place_id}/{day:%Y-%m-%d}.jsonl.gz"
+
+
+def snapshots_key(place_id: str, day: datetime) -> str:
+    return f"{place_id}/{day:%Y-%m-%d}.snapshots.jsonl.gz"
+
+
+def _day_bounds(day: datetime):
+    return {"start": day, "end": day + timedelta(days=1)}
+
+
+def _upload(store, key: str, write) -> int:
+    """Gzip the JSON lines `write(out)` writes and put them under `key`, unless there are none.
+
+    Returns the lines written.
+    """
+    with tempfile.NamedTemporaryFile(suffix=".jsonl.gz", delete=False) as tmp:
+        try:
+            with gzip.open(tmp, "wb") as out:
+                written = write(out)
+            tmp.flush()
+            if written:
+                store.put(key, tmp.name)
+        finally:
+            os.unlink(tmp.name)
+    return written
+
+
+def _copy_existing(store, key: str, out, keep) -> int:
+    """Copy the lines of an existing archive file for which `keep(record)` is true. Returns the lines copied."""
+    existing = store.open_existing(key)
+    if existing is None:
+        return 0
+    copied = 0
+    with closing(existing), gzip.open(existing, "rb") as previous:
+        for line in previous:
+            if keep(orjson.loads(line)):
+                out.write(line)
+                copied += 1
+    return copied
+
+
+def _write_day(store, place_id: str, day: datetime) -> int:
+    """Write the complete archive file of one place and day. Returns the events written."""
+    from .routes.events import _EVENT_COLUMNS, _event_dict
+
+    params = {"place_id": place_id, **_day_bounds(day)}
+    where = "place_id = :place_id AND created_at >= :start AND created_at < :end"
+
+    def write(out):
+        with Session(get_engine()) as session:
+            stored_ids = {row[0] for row in session.exec(text(f"SELECT id FROM events WHERE {where}"), params=params)}
+            # Lines left by an earlier, interrupted run whose rows are already deleted
+            written = _copy_existing(store, archive_key(place_id, day), out,
+                                     lambda record: record["event_id"] not in stored_ids)
+            result = session.connection().execution_options(stream_results=True, yield_per=_FETCH_SIZE).execute(
+                text(f"SELECT {_EVENT_COLUMNS} FROM events WHERE {where} ORDER BY created_at, id"), params,
+            )
+            for rows in result.partitions():
+                for row in rows:
+                    out.write(orjson.dumps({"place_id": place_id, **_event_dict(row)}) + b"\n")
+                written += len(rows)
+        return written
+
+    return _upload(store, archive_key(place_id, day), write)
+
+
+def _write_snapshots(store, place_id: str, day: datetime) -> int:
+    """Write the snapshots referenced by the events of one place and day. Returns the snapshots written."""
+    params = {"place_id": place_id, **_day_bounds(day)}
+
+    def write(out):
+        written_ids = set()
+        with Session(get_engine()) as session:
+            result = session.connection().execution_options(stream_results=True, yield_per=_SNAPSHOT_FETCH_SIZE).execute(
+                text("""
+                    SELECT id, media_type, data, created_at FROM snapshots WHERE id IN (
+                        SELECT snapshot_id FROM events
+                        WHERE place_id = :place_id AND created_at >= :start AND created_at < :end
+                    )
+                    ORDER BY id
+                """),
+                params,
+            )
+            for rows in result.partitions():
+                for snapshot_id, media_type, data, created_at in rows:
+                    out.write(orjson.dumps({
+                        "snapshot_id": snapshot_id,
+                        "media_type": media_type,
+                        "data": base64.b64encode(data).decode(),
+                        "created_at": created_at.isoformat() if created_at else None,
+                    }) + b"\n")
+                    written_ids.add(snapshot_id)
+        # Snapshots of an earlier, interrupted run that are already deleted
+        return len(written_ids) + _copy_existing(store, snapshots_key(place_id, day), out,
+                                                 lambda record: record["snapshot_id"] not in written_ids)
+
+    return _upload(store, snapshots_key(place_id, day), write)
+
+
+def _delete_day(place_id: str, day: datetime, batch_size: int) -> int:
+    """Delete the archived events of one place and day, one bounded batch per transaction.
+
+    The snapshots of a batch's events go with it unless an event outside the
+    batch still references them. Each batch bumps the place's version, so
+    conditional reads stop answering 304.
+    """
+    params = {"place_id": place_id, "limit": batch_size, **_day_bounds(day)}
+    deleted = 0
+    while True:
+        with Session(get_engine()) as session:
+            count = session.exec(
+                text("""
+                    WITH doomed AS (
+                        SELECT id, created_at FROM events
+                        WHERE place_id = :place_id AND created_at >= :start AND created_at < :end
+                        ORDER BY created_at, id LIMIT :limit
+                    ), gone AS (
+                        DELETE FROM events e USING doomed d
+                        WHERE e.id = d.id AND e.created_at = d.created_at
+                        RETURNING e.id, e.snapshot_id
+                    ), unlinked AS (
+                        DELETE FROM event_subjects WHERE event_id IN (SELECT id FROM gone)
+                    ), unchanged AS (
+                        DELETE FROM event_changes WHERE event_id IN (SELECT id FROM gone)
+                    ), orphaned AS (
+                        -- Every part of the statement sees the events as they were before it
+                        DELETE FROM snapshots s WHERE s.id IN (SELECT snapshot_id FROM gone)
+                        AND NOT EXISTS (
+                            SELECT 1 FROM events e
+                            WHERE e.snapshot_id = s.id AND (e.id, e.created_at) NOT IN (SELECT id, created_at FROM doomed)
+                        )
+                    )
+                    SELECT COUNT(*) FROM gone
+                """),
+                params=params,
+            ).one()[0]
+            if count:
+                touch_place_sync(session, place_id)
+            session.commit()
+        deleted += count
+        if count < batch_size:
+            return deleted
+
+
+def _drop_empty_partitions(cutoff: datetime):
+    """Drop the monthly events partitions that end before `cutoff` and hold no rows."""
+    with Session(get_engine()) as session:
+        names = session.exec(text("""
+            SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid
+            WHERE i.inhparent = to_regclass('events') AND c.relname ~ '^events_[0-9]{4}_[0-9]{2}$'
+        """)).all()
+        for (name,) in names:
+            month = datetime.strptime(name, "events_%Y_%m").replace(tzinfo=timezone.utc)
+            if partitions.add_months(month, 1) > cutoff:
+                continue
+            if session.exec(text(f"SELECT NOT EXISTS (SELECT 1 FROM {name})")).one()[0]:
+                logger.info(f"Dropping empty partition {name}")
+                session.exec(text(f"DROP TABLE {name}"))
+        session.commit()
+
+
+def archive_events(target: str = ARCHIVE_TARGET, days: int = ARCHIVE_AFTER_DAYS,
+                   batch_size: int = ARCHIVE_BATCH_SIZE, deadline: float = None, dry_run: bool = False) -> dict:
+    """Archive and delete the events of every place and day older than `days` whole days.
+
+    Stops between day files once time.monotonic() passes `deadline`.
+    Returns counts of the days, events written and events deleted.
+    """
+    store = open_store(target)
+    if not dry_run:
+        migrate(get_engine(), offline=True)
+    today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+    cutoff = today - timedelta(days=days)
+    with Session(get_engine()) as session:
+        groups = session.exec(
+            text("""
+                SELECT place_id, date_trunc('day', created_at, 'UTC') AS day, COUNT(*)
+                FROM events WHERE created_at < :cutoff
+                GROUP BY 1, 2 ORDER BY 2, 1
+            """),
+            params={"cutoff": cutoff},
+        ).all()
+
+    stats = {"days": 0, "written": 0, "deleted": 0, "pending": len(groups)}
+    for place_id, day, count in groups:
+        if deadline is not None and time.monotonic() > deadline:
+            break
+        logger.info(f"Archiving {count} events of {place_id} on {day:%Y-%m-%d}")
+        if not dry_run:
+            stats["written"] += _write_day(store, place_id, day)
+            _write_snapshots(store, place_id, day)
+            stats["deleted"] += _delete_day(place_id, day, batch_size)
+        stats["days"] += 1
+        stats["pending"] -= 1
+    if not dry_run and not stats["pending"]:
+        _drop_empty_partitions(cutoff)
+    return stats
+
+
+def handler(event, context):
+    """Scheduled Lambda entry point; leaves a minute of the timeout for the last day file."""
+    deadline = None
+    if context is not None:
+        deadline = time.monotonic() + context.get_remaining_time_in_millis() / 1000 - 60
+    stats = archive_events(deadline=deadline)
+    logger.info(f"Archive run: {stats}")
+    return stats
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Archive cold events to per-place, per-day JSONL.gz files.")
+    parser.add_argument("--target", default=ARCHIVE_TARGET, help="directory or s3://bucket/prefix")
+    parser.add_argument("--days", type=int, default=ARCHIVE_AFTER_DAYS, help="archive events older than this many days")
+    parser.add_argument("--batch-size", type=int, default=ARCHIVE_BATCH_SIZE, help="events deleted per transaction")
+    parser.add_argument("--dry-run", action="store_true", help="only list the days that would be archived")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    print(archive_events(args.target, args.days, args.batch_size, dry_run=args.dry_run))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,95 @@
+"""In-container cache of read responses, shared by the viewers of a place.
+
+Hub viewers of the same place poll the same windows at the same cadence, so
+the presence and events routes keep their encoded responses here for
+RESPONSE_CACHE_TTL seconds. Entries are keyed on the place and the request's
+window parameters and are dropped for a place as soon as this container
+writes to it. Writes handled by other containers show up once the entry
+expires. RESPONSE_CACHE_TTL=0 disables the cache.
+"""
+
+import os
+import threading
+import time
+from collections import OrderedDict
+
+from fastapi import Request
+from fastapi.responses import Response
+
+from .place_versions import not_modified
+
+RESPONSE_CACHE_TTL = float(os.getenv("RESPONSE_CACHE_TTL") or "10")
+# Responses kept per container (least recently used are dropped)
+RESPONSE_CACHE_SIZE = int(os.getenv("RESPONSE_CACHE_SIZE") or "256")
+
+
+class ResponseCache:
+    """LRU of (etag, body) pairs that expire after `ttl` seconds.
+
+    Keys are tuples whose first item is the place id.
+    """
+
+    def __init__(self, ttl: float = RESPONSE_CACHE_TTL, max_entries: int = RESPONSE_CACHE_SIZE):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, etag, body)
+        self._generations = {}  # place id -> number of invalidations
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        """Return the cached (etag, body) of `key`, or None."""
+        if self.ttl <= 0:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[0] <= time.monotonic():
+                del self._entries[key]
+                return None
+            self._entries.move_to_end(key)
+            return entry[1], entry[2]
+
+    def generation(self, place_id: str) -> int:
+        """Return a token to pass to put(), taken before reading the database."""
+        return self._generations.get(place_id, 0)
+
+    def put(self, key, etag: str, body: bytes, generation: int):
+        """Cache a response, unless its place was invalidated since `generation` was taken."""
+        if self.ttl <= 0:
+            return
+        with self._lock:
+            if self._generations.get(key[0], 0) != generation:
+                return
+            self._entries[key] = (time.monotonic() + self.ttl, etag, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, place_id: str):
+        """Drop every cached response of a place."""
+        with self._lock:
+            self._generations[place_id] = self._generations.get(place_id, 0) + 1
+            for key in [key for key in self._entries if key[0] == place_id]:
+                del self._entries[key]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._generations.clear()
+
+
+responses = ResponseCache()
+
+
+def cached_response(request: Request, key):
+    """Return the cached response of `key` (or a 304 for it), or None on a miss."""
+    hit = responses.get(key)
+    if hit is None:
+        return None
+    etag, body = hit
+    return not_modified(request, etag) or Response(
+        content=body,
+        media_type="application/json",
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
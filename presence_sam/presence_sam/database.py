@@ -2,11 +2,19 @@
 
 import os
 import logging
+import threading
+import time
 from urllib.parse import quote_plus
-import boto3
-from sqlmodel import SQLModel, create_engine, Session, text
+import orjson
+from sqlalchemy import event
+from sqlalchemy.ext.asyncio import create_async_engine
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+from sqlmodel import create_engine, Session, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+from starlette.concurrency import run_in_threadpool
 
 from . import models  # noqa: F401 — registers table definitions with SQLModel.metadata
+from . import sql_metrics
 
 logger = logging.getLogger(__name__)
 
@@ -17,79 +25,247 @@ DB_PORT = os.getenv("DB_PORT") or "5432"
 DB_NAME = os.getenv("DB_NAME") or "presence"
 DB_IAM_AUTH = (os.getenv("DB_IAM_AUTH") or "false").lower() == "true"
 
+# Connection pool policy, chosen per deployment:
+#   single - one persistent connection per engine and container, pinged before
+#            reuse. Lambda serves one request at a time and Mangum keeps one
+#            event loop per container, so the asyncio engine (write routes) can
+#            keep its connection like the sync engine (read routes) does. A read
+#            that needs a second connection (e.g. streaming) gets a temporary
+#            one. At most three connections per container, two of them kept
+#            open (1 async + 1 sync).
+#   null   - a new connection for every session, closed afterwards; one
+#            connection per container (two while streaming).
+#   queue  - a bounded pool of DB_POOL_SIZE connections for long-running servers,
+#            per engine: up to 2 * DB_POOL_SIZE connections per process.
+DB_POOL_MODE = (os.getenv("DB_POOL_MODE") or "queue").lower()
+DB_POOL_SIZE = int(os.getenv("DB_POOL_SIZE") or "5")
+DB_POOL_MODES = ("single", "null", "queue")
 
-def _get_engine():
-    """Create a SQLAlchemy engine, using IAM auth token if enabled."""
-    if DB_IAM_AUTH:
+# RDS IAM auth tokens are valid for 15 minutes; new connections use a cached
+# token that is replaced well before it expires
+IAM_TOKEN_TTL = 10 * 60
+
+
+class IamAuthToken:
+    """RDS IAM auth token for DB_USER, regenerated once it is IAM_TOKEN_TTL old."""
+
+    def __init__(self, ttl: float = IAM_TOKEN_TTL):
+        self.ttl = ttl
+        self._token = None
+        self._expires_at = 0.0
+        self._client = None
+        self._lock = threading.Lock()
+
+    def _generate(self) -> str:
         region = os.getenv("AWS_REGION_NAME", os.getenv("AWS_REGION", "us-east-1"))
-        rds_client = boto3.client("rds", region_name=region)
-        token = rds_client.generate_db_auth_token(
+        if self._client is None:
+            import boto3
+            self._client = boto3.client("rds", region_name=region)
+        return self._client.generate_db_auth_token(
             DBHostname=DB_HOST,
             Port=int(DB_PORT),
             DBUsername=DB_USER,
             Region=region,
         )
-        database_url = f"postgresql://{DB_USER}:{quote_plus(token)}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-        return create_engine(database_url, echo=False, connect_args={"sslmode": "require"})
-    else:
-        db_password = os.getenv("DB_PASSWORD", "DoNotUseDefaultPasswordsPlease")
-        database_url = f"postgresql://{DB_USER}:{db_password}@{DB_HOST}:{DB_PORT}/{DB_NAME}"
-        return create_engine(database_url, echo=False)
+
+    def get(self) -> str:
+        with self._lock:
+            now = time.monotonic()
+            if self._token is None or now >= self._expires_at:
+                self._token = self._generate()
+                self._expires_at = now + self.ttl
+            return self._token
+
+
+_iam_token = IamAuthToken()
+
+
+def _pool_args(mode: str, async_engine: bool = False) -> dict:
+    """Return create_engine keyword arguments for a pool mode."""
+    queue_pool = AsyncAdaptedQueuePool if async_engine else QueuePool
+    if mode == "single":
+        overflow = 0 if async_engine else 1
+        return {"poolclass": queue_pool, "pool_size": 1, "max_overflow": overflow, "pool_pre_ping": True}
+    if mode == "null":
+        return {"poolclass": NullPool}
+    if mode == "queue":
+        return {"poolclass": queue_pool, "pool_size": DB_POOL_SIZE, "max_overflow": 0, "pool_pre_ping": True}
+    raise ValueError(f"DB_POOL_MODE must be one of {', '.join(DB_POOL_MODES)}, got {mode!r}")
+
+
+def _engine_args(driver: str):
+    """Return the URL and connection arguments for a driver, e.g. postgresql+psycopg."""
+    if DB_IAM_AUTH:
+        # The token is set on every new connection, so the URL carries no password
+        return f"{driver}://{DB_USER}@{DB_HOST}:{DB_PORT}/{DB_NAME}", {"sslmode": "require"}
+    db_password = os.getenv("DB_PASSWORD", "DoNotUseDefaultPasswordsPlease")
+    return f"{driver}://{DB_USER}:{quote_plus(db_password)}@{DB_HOST}:{DB_PORT}/{DB_NAME}", {}
+
+
+def _use_iam_auth(engine):
+    """Set a fresh IAM auth token as the password of every new connection."""
+    @event.listens_for(engine, "do_connect")
+    def _set_iam_token(dialect, conn_rec, cargs, cparams):
+        cparams["password"] = _iam_token.get()
+
+
+def _use_orjson():
+    """Decode json columns returned by raw SQL with orjson instead of the json module."""
+    try:
+        from psycopg.types.json import set_json_loads
+    except ImportError:
+        return
+    set_json_loads(orjson.loads)
+
+
+def _create_engine():
+    """Create a SQLAlchemy engine on psycopg 3, using IAM auth tokens if enabled."""
+    database_url, connect_args = _engine_args("postgresql+psycopg")
+    engine = create_engine(database_url, echo=False, connect_args=connect_args, **_pool_args(DB_POOL_MODE))
+    _use_orjson()
+    sql_metrics.instrument(engine)
+    if DB_IAM_AUTH:
+        _use_iam_auth(engine)
+    return engine
+
+
+def _create_async_engine():
+    """Create an asyncio engine on psycopg 3, with the same auth and pool policy."""
+    database_url, connect_args = _engine_args("postgresql+psycopg")
+    engine = create_async_engine(database_url, echo=False, connect_args=connect_args, **_pool_args(DB_POOL_MODE, async_engine=True))
+    _use_orjson()
+    sql_metrics.instrument(engine.sync_engine)
+    if DB_IAM_AUTH:
+        _use_iam_auth(engine.sync_engine)
+    return engine
 
 
-engine = _get_engine()
+_engine = None
+_async_engine = None
+_schema_checked_at = None
+_engine_lock = threading.Lock()
+
+# Long-lived processes re-run the (normally one-statement) schema check this
+# often, so monthly events partitions keep being created ahead
+SCHEMA_CHECK_INTERVAL = 60 * 60
+
+
+def _schema_ready() -> bool:
+    return _schema_checked_at is not None and time.monotonic() - _schema_checked_at < SCHEMA_CHECK_INTERVAL
+
+
+def get_engine():
+    """Return the shared engine, creating it and migrating the schema on first use."""
+    global _engine, _schema_checked_at
+    if _schema_ready():
+        return _engine
+    with _engine_lock:
+        if _engine is None:
+            _engine = _create_engine()
+        if not _schema_ready():
+            from .migrations import migrate
+            if migrate(_engine):
+                _schema_checked_at = time.monotonic()
+    return _engine
+
+
+async def get_async_engine():
+    """Return the shared asyncio engine. The schema is migrated first, off the event loop."""
+    global _async_engine
+    if not _schema_ready():
+        await run_in_threadpool(get_engine)
+    if _async_engine is None:
+        _async_engine = _create_async_engine()
+    return _async_engine
 
 
 def create_db_and_tables():
-    """Create tables if missing and add any new columns to existing tables."""
-    from sqlalchemy import inspect
-    SQLModel.metadata.create_all(engine)
-    inspector = inspect(engine)
-    with Session(engine) as session:
-        for table in SQLModel.metadata.sorted_tables:
-            if not inspector.has_table(table.name):
-                continue
-            existing = {col["name"] for col in inspector.get_columns(table.name)}
-            for col in table.columns:
-                if col.name not in existing:
-                    col_type = col.type.compile(engine.dialect)
-                    nullable = "NULL" if col.nullable else "NOT NULL"
-                    default = ""
-                    if col.server_default is not None:
-                        default = f" DEFAULT {col.server_default.arg.text}"
-                    stmt = f'ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type} {nullable}{default}'
-                    logger.info(f"Applying schema change: {stmt}")
-                    session.exec(text(stmt))
-            # Add unique constraints defined in model but missing from DB
-            existing_ucs = {tuple(sorted(uc["column_names"])) for uc in inspector.get_unique_constraints(table.name)}
-            for constraint in table.constraints:
-                from sqlalchemy import UniqueConstraint as UC
-                if isinstance(constraint, UC) and constraint.columns:
-                    col_names = tuple(sorted(c.name for c in constraint.columns))
-                    if col_names not in existing_ucs:
-                        cols = ", ".join(c.name for c in constraint.columns)
-                        cname = constraint.name or f"uq_{'_'.join(col_names)}"
-                        stmt = f'ALTER TABLE {table.name} ADD CONSTRAINT {cname} UNIQUE ({cols})'
-                        logger.info(f"Applying schema change: {stmt}")
-                        try:
-                            session.exec(text(stmt))
-                        except Exception as e:
-                            logger.warning(f"Could not add constraint {cname}: {e}")
-        session.commit()
+    """Apply pending schema migrations now instead of on the first request."""
+    get_engine()
 
 
 def get_session():
     """FastAPI dependency that yields a database session."""
-    with Session(engine) as session:
+    with Session(get_engine()) as session:
+        yield session
+
+
+async def get_async_session():
+    """FastAPI dependency that yields an asyncio database session, for async routes."""
+    async with AsyncSession(await get_async_engine()) as session:
         yield session
 
 
-def check_connection() -> str:
+def check_connection(timeout: float = None) -> str:
     """Test the database connection. Returns 'OK' or error message."""
+    return measure_connection(timeout)[0]
+
+
+def measure_connection(timeout: float = None):
+    """Run a trivial query. Returns ('OK' or an error message, round trip in ms or None)."""
     try:
+        engine = get_engine()
+        started = time.monotonic()
         with Session(engine) as session:
+            if timeout:
+                session.exec(text(f"SET LOCAL statement_timeout = {int(timeout * 1000)}"))
             result = session.exec(text("SELECT 'O' || 'K'")).first()
-            return result[0] if result else "NO RESULT"
+        latency_ms = round((time.monotonic() - started) * 1000, 1)
+        return (result[0] if result else "NO RESULT"), latency_ms
     except Exception as e:
         logger.error(f"Database connection check failed: {e}")
-        return str(e)
+        return str(e), None
+
+
+# Health checks reuse a database probe for HC_CACHE_TTL seconds and wait at
+# most HC_DB_TIMEOUT seconds for a new one
+HC_CACHE_TTL = float(os.getenv("HC_CACHE_TTL") or "5")
+HC_DB_TIMEOUT = float(os.getenv("HC_DB_TIMEOUT") or "2")
+
+
+class ConnectionProbe:
+    """Result of measure_connection, shared by health checks for `ttl` seconds.
+
+    The probe runs on a background thread, one at a time. Callers wait for it
+    at most `timeout` seconds; a probe that takes longer reports a timeout
+    while it finishes, and its result is kept for the callers after it.
+    """
+
+    def __init__(self, ttl: float = HC_CACHE_TTL, timeout: float = HC_DB_TIMEOUT):
+        self.ttl = ttl
+        self.timeout = timeout
+        self._result = None
+        self._expires_at = 0.0
+        self._running = None  # threading.Event set when the probe in flight ends
+        self._lock = threading.Lock()
+
+    def _probe(self):
+        return measure_connection(self.timeout)
+
+    def _run(self, done: threading.Event):
+        try:
+            result = self._probe()
+        except Exception as e:
+            result = (str(e), None)
+        with self._lock:
+            self._result = result
+            self._expires_at = time.monotonic() + self.ttl
+            self._running = None
+        done.set()
+
+    def get(self):
+        """Return (status, latency_ms) of the latest probe, probing again once it expires."""
+        with self._lock:
+            if self._result is not None and time.monotonic() < self._expires_at:
+                return self._result
+            done = self._running
+            if done is None:
+                done = self._running = threading.Event()
+                threading.Thread(target=self._run, args=(done,), daemon=True).start()
+        if not done.wait(self.timeout):
+            return f"timed out after {self.timeout:g}s", None
+        with self._lock:
+            return self._result
+
+
+connection_probe = ConnectionProbe()
@@ -0,0 +1,279 @@
+"""Per-place face descriptor index for server-side re-identification.
+
+Mirrors PresenceHistory.findMatchByDescriptor in presence_lib/src/history.js,
+but keeps every known descriptor of a place in one NumPy matrix so a batch of
+query descriptors is answered with a single vectorized distance computation.
+Indexes are built lazily per container from the last FACE_INDEX_DAYS of
+events and extended with events stored since the last lookup. Events renamed
+or stored late (see event_changes) since the last lookup are relabelled or
+added, whichever container handled the write. All indexes of a container
+together are bounded by FACE_INDEX_MAX_BYTES. NumPy is imported
+on first use so that importing this module (and the routes that use it) does
+not add to every cold start.
+"""
+
+import logging
+import os
+import threading
+from collections import OrderedDict
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from sqlmodel import Session, text
+
+from .place_versions import DELTA_OVERLAP
+
+logger = logging.getLogger(__name__)
+
+DESCRIPTOR_SIZE = 128
+# face-api.js recommended threshold, same as PresenceHistory.findMatchByDescriptor
+MATCH_THRESHOLD = 0.6
+# Newest descriptors kept per place; a full index holds MAX_DESCRIPTORS float32
+# rows (512 bytes each) plus their labels
+MAX_DESCRIPTORS = int(os.getenv("FACE_INDEX_MAX_DESCRIPTORS") or "5000")
+# Memory of all indexes of a container (least recently used places are
+# dropped). PresenceFunction has 128 MB, about 76 MB of which the imported app
+# already uses, so the default leaves room for the refresh query and a match.
+MAX_BYTES = int(os.getenv("FACE_INDEX_MAX_BYTES") or str(16 * 1024 * 1024))
+# Days of events an index is first built from
+INDEX_DAYS = int(os.getenv("FACE_INDEX_DAYS") or "30")
+# Estimated memory of one row label (tuple, ids and name)
+_ROW_BYTES = 160
+# Events read from the database per round trip while refreshing
+_FETCH_SIZE = 500
+
+
+def _label(name):
+    """Return a subject name, or None when the subject was never named."""
+    return name if name and name != "unknown" else None
+
+
+class FaceIndex:
+    """Known face descriptors of one place and the subjects they belong to.
+
+    Descriptors live in a float32 ring buffer that grows by doubling up to
+    `max_descriptors` rows and then overwrites the oldest rows.
+    """
+
+    def __init__(self, place_id: str, max_descriptors: int = MAX_DESCRIPTORS):
+        import numpy as np
+        self.place_id = place_id
+        self.max_descriptors = max_descriptors
+        self.watermark = None  # created_at of the newest event indexed
+        self.changed_at = None  # changed_at of the newest event change applied
+        self._seen = {}  # event id -> created_at, for events within DELTA_OVERLAP of the watermark
+        self._matrix = np.empty((0, DESCRIPTOR_SIZE), dtype=np.float32)
+        self._sq_norms = np.empty(0, dtype=np.float32)
+        self._rows = []  # (event_id, position, subject_id, name) per matrix row
+        self._count = 0
+        self._next = 0  # row written next
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._count
+
+    @property
+    def nbytes(self) -> int:
+        """Approximate memory held by the index."""
+        return self._matrix.nbytes + self._sq_norms.nbytes + len(self._rows) * _ROW_BYTES
+
+    def _reserve(self, count: int):
+        """Grow the buffers to hold `count` rows, up to max_descriptors. Called with the lock held."""
+        import numpy as np
+        capacity = len(self._rows)
+        if count <= capacity or capacity >= self.max_descriptors:
+            return
+        capacity = min(self.max_descriptors, max(count, 2 * capacity, 256))
+        matrix = np.empty((capacity, DESCRIPTOR_SIZE), dtype=np.float32)
+        sq_norms = np.empty(capacity, dtype=np.float32)
+        # Before the buffer wraps, rows 0.._count are the filled ones
+        matrix[:self._count] = self._matrix[:self._count]
+        sq_norms[:self._count] = self._sq_norms[:self._count]
+        self._matrix, self._sq_norms = matrix, sq_norms
+        self._rows.extend([None] * (capacity - len(self._rows)))
+
+    def add_events(self, events):
+        """Append the descriptors found in (event_id, created_at, people) triples.
+
+        Events already indexed (re-read because of the refresh overlap) are skipped.
+        """
+        import numpy as np
+        vectors, rows = [], []
+        for event_id, created_at, people in events:
+            if event_id in self._seen:
+                continue
+            self._seen[event_id] = created_at
+            if self.watermark is None or created_at > self.watermark:
+                self.watermark = created_at
+            for position, person in enumerate(people or []):
+                descriptor = person.get("descriptor") if isinstance(person, dict) else None
+                if not isinstance(descriptor, list) or len(descriptor) != DESCRIPTOR_SIZE:
+                    continue
+                vectors.append(descriptor)
+                rows.append((event_id, position, person.get("subject_id"), _label(person.get("name"))))
+        if self.watermark is not None:
+            horizon = self.watermark - DELTA_OVERLAP
+            self._seen = {event_id: at for event_id, at in self._seen.items() if at >= horizon}
+        if not vectors:
+            return
+
+        vectors, rows = vectors[-self.max_descriptors:], rows[-self.max_descriptors:]
+        added = np.asarray(vectors, dtype=np.float32)
+        with self._lock:
+            self._reserve(self._count + len(rows))
+            capacity = len(self._rows)
+            slots = (self._next + np.arange(len(rows))) % capacity
+            self._matrix[slots] = added
+            self._sq_norms[slots] = np.einsum("ij,ij->i", added, added)
+            for slot, row in zip(slots.tolist(), rows):
+                self._rows[slot] = row
+            self._next = int(slots[-1] + 1) % capacity
+            self._count = min(capacity, self._count + len(rows))
+
+    def rename(self, event_id: int, names):
+        """Relabel the people of an event, in the order they were detected."""
+        self._relabel({event_id: names})
+
+    def _relabel(self, names_by_event):
+        """Relabel the people of several events in one pass over the rows."""
+        with self._lock:
+            for i in range(self._count):
+                row_event_id, position, subject_id, _ = self._rows[i]
+                names = names_by_event.get(row_event_id)
+                if names is not None and position < len(names):
+                    self._rows[i] = (row_event_id, position, subject_id, _label(names[position]))
+
+    def update_events(self, events):
+        """Apply changed (event_id, created_at, people) triples.
+
+        Events with indexed descriptors are relabelled; the others (such as
+        events stored with an earlier timestamp) are added.
+        """
+        with self._lock:
+            indexed = {row[0] for row in self._rows[:self._count]}
+        names_by_event, added = {}, []
+        for event_id, created_at, people in events:
+            if event_id in indexed:
+                names_by_event[event_id] = [person.get("name") if isinstance(person, dict) else None
+                                            for person in people or []]
+            else:
+                added.append((event_id, created_at, people))
+        if names_by_event:
+            self._relabel(names_by_event)
+        self.add_events(added)
+
+    def match(self, queries, threshold: float = MATCH_THRESHOLD):
+        """Return the nearest known subject for each query descriptor.
+
+        Each result is a dict with subject_id, name and distance, or None when
+        nothing is closer than `threshold`.
+        """
+        import numpy as np
+        queries = np.asarray(queries, dtype=np.float32).reshape(-1, DESCRIPTOR_SIZE)
+        with self._lock:
+            count = self._count
+            if not count:
+                return [None] * len(queries)
+            # |q - k|^2 = |q|^2 + |k|^2 - 2 q.k for every query/known pair at once
+            sq_dist = (np.einsum("ij,ij->i", queries, queries)[:, None] + self._sq_norms[None, :count]
+                       - 2.0 * (queries @ self._matrix[:count].T))
+            best = sq_dist.argmin(axis=1)
+            distances = np.sqrt(np.maximum(sq_dist[np.arange(len(queries)), best], 0.0))
+            rows = [self._rows[i] for i in best.tolist()]
+
+        results = []
+        for row, distance in zip(rows, distances):
+            if distance >= threshold:
+                results.append(None)
+                continue
+            event_id, _, subject_id, name = row
+            results.append({
+                "subject_id": subject_id,
+                "name": name,
+                "distance": round(float(distance), 4),
+                "event_id": event_id,
+            })
+        return results
+
+
+_indexes = OrderedDict()
+_indexes_lock = threading.Lock()
+
+
+def _refresh(session: Session, index: FaceIndex):
+    """Load the place's events stored since the watermark, minus DELTA_OVERLAP.
+
+    Events are read by created_at rather than id: an id reserved early can
+    commit after later ids were indexed, but its created_at still falls
+    within the overlap. The bound also limits the scan to recent partitions.
+    Events changed since the last refresh are then read from event_changes.
+    """
+    oldest = datetime.now(timezone.utc) - timedelta(days=INDEX_DAYS)
+    changed_since = index.changed_at - DELTA_OVERLAP if index.changed_at else None
+    if index.changed_at is None:
+        # Events read by the first build already carry their current names
+        index.changed_at = datetime.now(timezone.utc)
+    since = oldest if index.watermark is None else index.watermark - DELTA_OVERLAP
+    result = session.connection().execution_options(stream_results=True, yield_per=_FETCH_SIZE).execute(
+        text("""
+            SELECT id, created_at, CAST(people AS text) FROM (
+                SELECT id, created_at, people FROM events
+                WHERE place_id = :place_id AND created_at >= :since
+                ORDER BY created_at DESC, id DESC LIMIT :limit
+            ) newest
+            ORDER BY created_at, id
+        """),
+        {"place_id": index.place_id, "since": since, "limit": index.max_descriptors},
+    )
+    for rows in result.partitions():
+        index.add_events([(event_id, created_at, orjson.loads(people) if people else None)
+                          for event_id, created_at, people in rows])
+    if changed_since is None:
+        return
+
+    changes = session.exec(
+        text("""
+            SELECT e.id, e.created_at, CAST(e.people AS text), c.changed_at FROM event_changes c
+            JOIN events e ON e.id = c.event_id AND e.created_at = c.created_at
+            WHERE c.place_id = :place_id AND c.changed_at >= :changed_since AND e.created_at >= :oldest
+            ORDER BY c.changed_at, e.id
+        """),
+        params={"place_id": index.place_id, "changed_since": changed_since, "oldest": oldest},
+    ).all()
+    if changes:
+        index.update_events([(event_id, created_at, orjson.loads(people) if people else None)
+                             for event_id, created_at, people, _ in changes])
+        index.changed_at = max(index.changed_at, changes[-1][3])
+
+
+def _evict(keep: str):
+    """Drop least recently used indexes until they fit in MAX_BYTES. Called with _indexes_lock held."""
+    total = sum(index.nbytes for index in _indexes.values())
+    for place_id in list(_indexes):
+        if total <= MAX_BYTES:
+            break
+        if place_id != keep:
+            total -= _indexes.pop(place_id).nbytes
+
+
+def get_index(session: Session, place_id: str) -> FaceIndex:
+    """Return the up-to-date face index of a place, building it on first use."""
+    with _indexes_lock:
+        index = _indexes.get(place_id)
+        if index is None:
+            index = _indexes[place_id] = FaceIndex(place_id)
+        _indexes.move_to_end(place_id)
+    _refresh(session, index)
+    with _indexes_lock:
+        _evict(keep=place_id)
+    return index
+
+
+def rename(place_id: str, event_id: int, names):
+    """Propagate names given to an event's people to this container's loaded index.
+
+    Indexes in other containers pick the change up from event_changes.
+    """
+    index = _indexes.get(place_id)
+    if index is not None:
+        index.rename(event_id, names)
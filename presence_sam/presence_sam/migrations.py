@@ -0,0 +1,217 @@
+"""Versioned schema migrations.
+
+schema_migrations records the highest applied migration and a fingerprint of
+the table definitions in models.py. A cold start reads that row and, when
+both still match, touches nothing else. Only when a migration was added or a
+model changed does the runner take an advisory lock, reconcile the tables
+with the models and apply the pending migrations.
+
+Additive model changes (new tables, columns, indexes and unique constraints)
+are picked up by the reconcile step and only change the fingerprint. Changes
+it cannot express get a new entry at the end of MIGRATIONS. The recorded
+fingerprint also carries the current month, so the first start of a month
+creates the next events partitions (see partitions.py).
+
+Migrations that rewrite or scan the event history are marked offline. The
+check on the request path never runs them against a populated database; it
+logs that they are pending and keeps serving the current schema. They run
+from `python -m presence_sam.migrations` as a deploy step, or at the start
+of the next archive run, which has the time budget for them.
+"""
+
+import argparse
+import hashlib
+import logging
+from datetime import datetime, timezone
+
+from sqlalchemy import UniqueConstraint, inspect
+from sqlalchemy.dialects import postgresql
+from sqlalchemy.exc import ProgrammingError
+from sqlalchemy.schema import CreateIndex, CreateTable
+from sqlmodel import SQLModel, Session, text
+
+from . import models  # noqa: F401 — registers table definitions with SQLModel.metadata
+from . import partitions
+
+logger = logging.getLogger(__name__)
+
+# Serializes migrations across containers starting at the same time
+_LOCK_KEY = 0x70726573
+
+
+def fingerprint(metadata=SQLModel.metadata) -> str:
+    """Hash the DDL of every table and index in `metadata`."""
+    dialect = postgresql.dialect()
+    ddl = []
+    for table in metadata.sorted_tables:
+        ddl.append(str(CreateTable(table).compile(dialect=dialect)).strip())
+        for index in sorted(table.indexes, key=lambda i: i.name):
+            ddl.append(str(CreateIndex(index).compile(dialect=dialect)).strip())
+    return hashlib.sha256("\n".join(ddl).encode()).hexdigest()
+
+
+def _reconcile(session: Session):
+    """Create missing tables and add missing columns, indexes and unique constraints."""
+    connection = session.connection()
+    SQLModel.metadata.create_all(connection)
+    inspector = inspect(connection)
+    for table in SQLModel.metadata.sorted_tables:
+        existing = {col["name"] for col in inspector.get_columns(table.name)}
+        for col in table.columns:
+            if col.name not in existing:
+                col_type = col.type.compile(connection.dialect)
+                nullable = "NULL" if col.nullable else "NOT NULL"
+                default = ""
+                if col.server_default is not None:
+                    default = f" DEFAULT {col.server_default.arg.text}"
+                stmt = f'ALTER TABLE {table.name} ADD COLUMN {col.name} {col_type} {nullable}{default}'
+                logger.info(f"Applying schema change: {stmt}")
+                session.exec(text(stmt))
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+        existing_ucs = {tuple(sorted(uc["column_names"])) for uc in inspector.get_unique_constraints(table.name)}
+        for constraint in table.constraints:
+            if isinstance(constraint, UniqueConstraint) and constraint.columns:
+                col_names = tuple(sorted(c.name for c in constraint.columns))
+                if col_names not in existing_ucs:
+                    cols = ", ".join(c.name for c in constraint.columns)
+                    cname = constraint.name or f"uq_{'_'.join(col_names)}"
+                    stmt = f'ALTER TABLE {table.name} ADD CONSTRAINT {cname} UNIQUE ({cols})'
+                    logger.info(f"Applying schema change: {stmt}")
+                    try:
+                        with connection.begin_nested():
+                            session.exec(text(stmt))
+                    except Exception as e:
+                        logger.warning(f"Could not add constraint {cname}: {e}")
+
+
+def _backfill_occupancy(session: Session):
+    """Build occupancy rollups for events stored before rollups were maintained."""
+    from . import occupancy
+    has_rollups = session.exec(text("SELECT EXISTS (SELECT 1 FROM occupancy_minutes)")).one()[0]
+    if not has_rollups:
+        logger.info("Backfilling occupancy rollups from stored events")
+        occupancy.backfill(session)
+
+
+def _index_event_snapshots(session: Session):
+    """Index events.snapshot_id, which the archive checks before deleting a snapshot.
+
+    Not declared on the model, so the reconcile step never builds it on the
+    request path.
+    """
+    session.exec(text("CREATE INDEX IF NOT EXISTS ix_events_snapshot_id ON events (snapshot_id) WHERE snapshot_id IS NOT NULL"))
+
+
+# (version, description, function, offline) in the order they are applied.
+# Versions are never reused or reordered once deployed. Offline migrations
+# only run inside the request path while events is still empty.
+MIGRATIONS = [
+    (1, "backfill occupancy rollups", _backfill_occupancy, True),
+    (2, "partition events by created_at", partitions.partition_events, True),
+    (3, "index events by snapshot_id", _index_event_snapshots, True),
+]
+
+LATEST_VERSION = MIGRATIONS[-1][0]
+
+
+def _current(session: Session):
+    """Return the recorded (version, fingerprint), or None before the first migration."""
+    try:
+        row = session.exec(
+            text("SELECT version, fingerprint FROM schema_migrations ORDER BY version DESC LIMIT 1")
+        ).first()
+    except ProgrammingError:
+        session.rollback()
+        return None
+    return (row[0], row[1]) if row else None
+
+
+def _target() -> str:
+    """Fingerprint of the models and of the month, so partitions are extended monthly."""
+    month = partitions.month_start(datetime.now(timezone.utc))
+    return f"{fingerprint()}@{month:%Y-%m}"
+
+
+def _pending(version: int):
+    return [migration for migration in MIGRATIONS if migration[0] > version]
+
+
+def _up_to_date(current, target: str, offline: bool) -> bool:
+    """True when nothing is left to do; online, pending offline migrations are left alone."""
+    if current is None or current[1] != target:
+        return False
+    pending = _pending(current[0])
+    if pending and not offline and all(heavy for _, _, _, heavy in pending):
+        logger.warning(
+            f"Offline migrations pending from version {current[0]}; run `python -m presence_sam.migrations`"
+        )
+        return True
+    return not pending
+
+
+def migrate(engine, offline: bool = False) -> bool:
+    """Bring the database schema up to date with the models, if it is not already.
+
+    With offline=False (the request path) offline migrations are skipped unless
+    events is empty, and a migration already running elsewhere is not waited
+    for. Returns False when the check was skipped for that reason.
+    """
+    target = _target()
+    with Session(engine) as session:
+        if _up_to_date(_current(session), target, offline):
+            return True
+        session.rollback()
+
+        if offline:
+            session.exec(text("SELECT pg_advisory_xact_lock(:key)"), params={"key": _LOCK_KEY})
+        elif not session.exec(text("SELECT pg_try_advisory_xact_lock(:key)"), params={"key": _LOCK_KEY}).one()[0]:
+            logger.info("Schema migration running elsewhere; serving the current schema")
+            return False
+        session.exec(text("""
+            CREATE TABLE IF NOT EXISTS schema_migrations (
+                version integer PRIMARY KEY,
+                fingerprint text NOT NULL,
+                applied_at timestamptz NOT NULL DEFAULT now()
+            )
+        """))
+        current = _current(session)
+        if _up_to_date(current, target, offline):
+            return True
+        applied = current[0] if current else 0
+
+        logger.info(f"Migrating schema from version {applied} to {LATEST_VERSION}")
+        _reconcile(session)
+        empty = not session.exec(text("SELECT EXISTS (SELECT 1 FROM events)")).one()[0]
+        for version, description, migration, heavy in _pending(applied):
+            if heavy and not (offline or empty):
+                logger.warning(
+                    f"Migration {version} ({description}) runs offline; run `python -m presence_sam.migrations`"
+                )
+                break
+            logger.info(f"Applying migration {version}: {description}")
+            migration(session)
+            applied = version
+        if partitions.is_partitioned(session):
+            partitions.ensure_partitions(session)
+        session.exec(
+            text("""
+                INSERT INTO schema_migrations (version, fingerprint) VALUES (:version, :fingerprint)
+                ON CONFLICT (version) DO UPDATE SET fingerprint = EXCLUDED.fingerprint, applied_at = now()
+            """),
+            params={"version": applied, "fingerprint": target},
+        )
+        session.commit()
+    return True
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Apply pending schema migrations, including the offline ones.")
+    parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO)
+    from .database import get_engine
+    migrate(get_engine(), offline=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -3,19 +3,36 @@
 from datetime import datetime, timezone
 from typing import Any, List, Optional
 from sqlmodel import SQLModel, Field, Column
-from sqlalchemy import JSON, func, DateTime, ForeignKey, UniqueConstraint
+from sqlalchemy import JSON, func, DateTime, ForeignKey, Index, Integer, LargeBinary, UniqueConstraint
+
+
+class Snapshot(SQLModel, table=True):
+    __tablename__ = "snapshots"
+
+    id: str = Field(primary_key=True)  # sha256 of the image bytes
+    media_type: str
+    data: bytes = Field(sa_column=Column(LargeBinary, nullable=False))
+    created_at: datetime = Field(sa_column=Column(DateTime(timezone=True), server_default=func.now()))
 
 
 class Event(SQLModel, table=True):
     __tablename__ = "events"
+    __table_args__ = (
+        # Serves place history newest first and keyset pagination on (created_at, id)
+        Index("ix_events_place_id_created_at_id", "place_id", "created_at", "id"),
+        # Monthly partitions are managed by partitions.py
+        {"postgresql_partition_by": "RANGE (created_at)"},
+    )
 
-    id: Optional[int] = Field(default=None, primary_key=True)
+    # The partition key has to be part of the primary key
+    id: Optional[int] = Field(default=None, sa_column=Column(Integer, primary_key=True, autoincrement=True))
     place_id: str = Field(index=True)
     event_type: str = Field(index=True)
     people: Any = Field(default=[], sa_column=Column(JSON, nullable=True))
     pets: Any = Field(default=[], sa_column=Column(JSON, nullable=True))
     payload: Any = Field(sa_column=Column(JSON))
-    created_at: datetime = Field(sa_column=Column(DateTime(timezone=True), server_default=func.now()))
+    snapshot_id: Optional[str] = Field(default=None, foreign_key="snapshots.id")
+    created_at: datetime = Field(sa_column=Column(DateTime(timezone=True), primary_key=True, server_default=func.now()))
 
 
 class Subject(SQLModel, table=True):
@@ -31,5 +48,37 @@ class EventSubject(SQLModel, table=True):
     __tablename__ = "event_subjects"
 
     id: Optional[int] = Field(default=None, primary_key=True)
-    event_id: int = Field(sa_column=Column(ForeignKey("events.id"), nullable=False, index=True))
+    # No foreign key: ids of the partitioned events table are only unique with created_at
+    event_id: int = Field(sa_column=Column(Integer, nullable=False, index=True))
     subject_id: int = Field(sa_column=Column(ForeignKey("subjects.id"), nullable=False, index=True))
+
+
+class EventChange(SQLModel, table=True):
+    __tablename__ = "event_changes"
+    # Serves delta reads of the events changed since a cursor
+    __table_args__ = (Index("ix_event_changes_place_id_changed_at", "place_id", "changed_at"),)
+
+    # One row per event edited after it was stored; created_at locates the event's partition
+    event_id: int = Field(sa_column=Column(Integer, primary_key=True, autoincrement=False))
+    place_id: str
+    created_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    changed_at: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False, server_default=func.now()))
+
+
+class PlaceVersion(SQLModel, table=True):
+    __tablename__ = "place_versions"
+
+    place_id: str = Field(primary_key=True)
+    version: int = Field(default=0)
+    updated_at: datetime = Field(sa_column=Column(DateTime(timezone=True), server_default=func.now()))
+
+
+class OccupancyMinute(SQLModel, table=True):
+    __tablename__ = "occupancy_minutes"
+
+    place_id: str = Field(primary_key=True)
+    subject_id: int = Field(primary_key=True)  # 0 counts every event of the place
+    bucket: datetime = Field(sa_column=Column(DateTime(timezone=True), primary_key=True))
+    event_count: int = Field(default=0)
+    first_seen: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
+    last_seen: datetime = Field(sa_column=Column(DateTime(timezone=True), nullable=False))
@@ -0,0 +1,62 @@
+"""Minute-bucket occupancy rollups maintained on ingest.
+
+occupancy_minutes holds, per place, subject and minute, how many events saw
+the subject and when it was first and last seen in that minute. The row with
+subject_id 0 counts every event of the place, linked to a subject or not.
+Rollups are written in the same transaction as the events they summarize, so
+time-series reads never have to scan events or event_subjects.
+"""
+
+from sqlmodel import Session, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Place-wide total rows use this subject id
+ALL_EVENTS = 0
+
+_ROLLUP_SQL = """
+    INSERT INTO occupancy_minutes (place_id, subject_id, bucket, event_count, first_seen, last_seen)
+    SELECT e.place_id, s.subject_id, date_trunc('minute', e.created_at),
+           :delta * COUNT(*), MIN(e.created_at), MAX(e.created_at)
+    FROM events e
+    CROSS JOIN LATERAL (
+        SELECT {all_events} AS subject_id WHERE :with_total
+        UNION
+        SELECT es.subject_id FROM event_subjects es WHERE es.event_id = e.id
+    ) s
+    WHERE {condition}
+    GROUP BY e.place_id, s.subject_id, date_trunc('minute', e.created_at)
+    ON CONFLICT (place_id, subject_id, bucket) DO UPDATE SET
+        event_count = occupancy_minutes.event_count + EXCLUDED.event_count,
+        first_seen = LEAST(occupancy_minutes.first_seen, EXCLUDED.first_seen),
+        last_seen = GREATEST(occupancy_minutes.last_seen, EXCLUDED.last_seen)
+"""
+
+
+async def rollup_events(session: AsyncSession, event_ids, delta: int = 1, with_total: bool = True):
+    """Add (or with delta=-1, remove) events and their subject links to the rollups.
+
+    Call after the events and their event_subjects rows are written. Pass
+    with_total=False when only the subject links of existing events changed.
+    """
+    if not event_ids:
+        return
+    await session.exec(
+        text(_ROLLUP_SQL.format(all_events=ALL_EVENTS, condition="e.id = ANY(CAST(:event_ids AS integer[]))")),
+        params={"event_ids": list(event_ids), "delta": delta, "with_total": with_total},
+    )
+
+
+async def prune_empty(session: AsyncSession, place_id: str):
+    """Delete rollup rows of a place whose count dropped to zero."""
+    await session.exec(
+        text("DELETE FROM occupancy_minutes WHERE place_id = :place_id AND event_count <= 0"),
+        params={"place_id": place_id},
+    )
+
+
+def backfill(session: Session):
+    """Build rollups for every stored event. Run once, when the table is created."""
+    session.exec(
+        text(_ROLLUP_SQL.format(all_events=ALL_EVENTS, condition="TRUE")),
+        params={"delta": 1, "with_total": True},
+    )
@@ -0,0 +1,118 @@
+"""Monthly range partitions of the events table.
+
+events is partitioned by RANGE (created_at), one partition per UTC month plus
+events_default for rows outside every partition. Queries bounded by
+created_at (the `minutes` window of the read routes) only scan the partitions
+the window overlaps, so their cost follows the window, not the history.
+
+Partitions are created ahead of time by ensure_partitions, which the migration
+runner calls whenever the month changes. Should rows land in events_default
+anyway, creating their month's partition moves them out of it.
+"""
+
+import logging
+from datetime import datetime, timezone
+
+from sqlmodel import Session, text
+
+logger = logging.getLogger(__name__)
+
+# Months created past the current one
+PARTITION_MONTHS_AHEAD = 3
+
+
+def month_start(moment: datetime) -> datetime:
+    """Return the first instant (UTC) of the month holding `moment`."""
+    moment = moment.astimezone(timezone.utc)
+    return datetime(moment.year, moment.month, 1, tzinfo=timezone.utc)
+
+
+def add_months(month: datetime, count: int) -> datetime:
+    """Return the month `count` months after the month starting at `month`."""
+    index = month.year * 12 + month.month - 1 + count
+    return datetime(index // 12, index % 12 + 1, 1, tzinfo=timezone.utc)
+
+
+def partition_name(month: datetime) -> str:
+    return f"events_{month:%Y_%m}"
+
+
+def _exists(session: Session, name: str) -> bool:
+    return session.exec(text("SELECT to_regclass(:name) IS NOT NULL"), params={"name": name}).one()[0]
+
+
+def _create_partition(session: Session, month: datetime):
+    """Create and attach the partition of one month, moving its rows out of events_default."""
+    name, end = partition_name(month), add_months(month, 1)
+    if _exists(session, name):
+        return
+    logger.info(f"Creating partition {name}")
+    bounds = {"start": month, "end": end}
+    session.exec(text(f"CREATE TABLE {name} (LIKE events INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"))
+    session.exec(
+        text(f"""
+            WITH moved AS (
+                DELETE FROM events_default WHERE created_at >= :start AND created_at < :end RETURNING *
+            )
+            INSERT INTO {name} SELECT * FROM moved
+        """),
+        params=bounds,
+    )
+    session.exec(text(
+        f"ALTER TABLE events ATTACH PARTITION {name} "
+        f"FOR VALUES FROM ('{month.isoformat()}') TO ('{end.isoformat()}')"
+    ))
+
+
+def ensure_partitions(session: Session, start: datetime = None, months_ahead: int = PARTITION_MONTHS_AHEAD):
+    """Create the default partition and the monthly partitions from `start` through the months ahead."""
+    session.exec(text("CREATE TABLE IF NOT EXISTS events_default PARTITION OF events DEFAULT"))
+    current = month_start(datetime.now(timezone.utc))
+    month = month_start(start) if start else current
+    while month <= add_months(current, months_ahead):
+        _create_partition(session, month)
+        month = add_months(month, 1)
+
+
+def is_partitioned(session: Session) -> bool:
+    """Return True when events is a partitioned table."""
+    return session.exec(
+        text("SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass('events'))")
+    ).one()[0]
+
+
+def partition_events(session: Session):
+    """Convert a plain events table into the partitioned one, keeping ids and links.
+
+    The old table and its sequence are renamed, the partitioned table is
+    created from the model, every month holding rows gets its partition and
+    the rows are copied over in one statement. Dropping the old table also
+    drops the event_subjects foreign key, which partitioned events cannot back.
+    """
+    from .models import Event
+
+    if is_partitioned(session):
+        ensure_partitions(session)
+        return
+
+    logger.info("Partitioning events by created_at")
+    session.exec(text("ALTER TABLE events RENAME TO events_unpartitioned"))
+    session.exec(text("ALTER SEQUENCE IF EXISTS events_id_seq RENAME TO events_unpartitioned_id_seq"))
+    indexes = session.exec(
+        text("SELECT indexname FROM pg_indexes WHERE schemaname = current_schema() AND tablename = 'events_unpartitioned'")
+    ).all()
+    for (index_name,) in indexes:
+        session.exec(text(f'ALTER INDEX "{index_name}" RENAME TO "{index_name}_unpartitioned"'))
+
+    Event.__table__.create(session.connection())
+    oldest = session.exec(text("SELECT MIN(created_at) FROM events_unpartitioned")).one()[0]
+    ensure_partitions(session, start=oldest)
+
+    columns = [column.name for column in Event.__table__.columns]
+    values = ["COALESCE(created_at, now())" if name == "created_at" else name for name in columns]
+    session.exec(text(f"INSERT INTO events ({', '.join(columns)}) SELECT {', '.join(values)} FROM events_unpartitioned"))
+    session.exec(text(
+        "SELECT setval(pg_get_serial_sequence('events', 'id'), "
+        "COALESCE((SELECT MAX(id) FROM events_unpartitioned), 0) + 1, false)"
+    ))
+    session.exec(text("DROP TABLE events_unpartitioned CASCADE"))
@@ -0,0 +1,65 @@
+"""Change tracking for conditional and delta reads of a place.
+
+Every write to a place bumps its version in the same transaction, so a read
+route can answer a conditional GET with 304 after a single primary-key lookup
+instead of re-running its query.
+"""
+
+import hashlib
+from datetime import datetime, timedelta
+
+from fastapi import Request
+from fastapi.responses import Response
+from sqlmodel import Session, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+# Delta reads re-send rows this far before the client's cursor: created_at is
+# the transaction start, so a slower transaction can commit an older row later
+DELTA_OVERLAP = timedelta(seconds=5)
+
+
+_TOUCH_SQL = text("""
+    INSERT INTO place_versions (place_id, version, updated_at) VALUES (:place_id, 1, now())
+    ON CONFLICT (place_id) DO UPDATE SET version = place_versions.version + 1, updated_at = now()
+""")
+
+
+async def touch_place(session: AsyncSession, place_id: str):
+    """Record that a place changed. Call inside the writing transaction."""
+    await session.exec(_TOUCH_SQL, params={"place_id": place_id})
+
+
+def touch_place_sync(session: Session, place_id: str):
+    """touch_place for jobs that write through a sync Session."""
+    session.exec(_TOUCH_SQL, params={"place_id": place_id})
+
+
+def place_version(session: Session, place_id: str) -> int:
+    """Return the current version of a place (0 if it was never written)."""
+    row = session.exec(
+        text("SELECT version FROM place_versions WHERE place_id = :place_id"),
+        params={"place_id": place_id},
+    ).first()
+    return row[0] if row else 0
+
+
+def make_etag(*parts) -> str:
+    """Build a weak ETag from the values a response depends on.
+
+    Datetimes are truncated to the minute so a sliding time window keeps the
+    same tag between polls within a minute.
+    """
+    normalized = [p.replace(second=0, microsecond=0).isoformat() if isinstance(p, datetime) else str(p) for p in parts]
+    digest = hashlib.sha1("|".join(normalized).encode()).hexdigest()[:20]
+    return f'W/"{digest}"'
+
+
+def not_modified(request: Request, etag: str):
+    """Return a 304 response when the client already holds `etag`, else None."""
+    header = request.headers.get("if-none-match")
+    if not header:
+        return None
+    candidates = {tag.strip().removeprefix("W/") for tag in header.split(",")}
+    if etag.removeprefix("W/") in candidates or "*" in candidates:
+        return Response(status_code=304, headers={"ETag": etag, "Cache-Control": "no-cache"})
+    return None
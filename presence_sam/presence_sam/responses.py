@@ -0,0 +1,46 @@
+"""JSON encoding and decoding for routes, backed by orjson.
+
+ORJSONResponse is the application's default response class. Routes read
+request bodies with read_json (or the json_body dependency) and encode JSON
+query parameters with dumps. JSON columns that go straight back to the client
+are selected as text and wrapped in raw_json, so they are embedded in the
+response without being decoded and encoded again.
+"""
+
+from typing import Any
+
+import orjson
+from fastapi import Request
+from fastapi.responses import JSONResponse
+
+loads = orjson.loads
+
+
+def dumps(obj: Any) -> str:
+    """Encode `obj` as a JSON string."""
+    return orjson.dumps(obj).decode()
+
+
+def raw_json(text):
+    """Embed already-encoded JSON text in a response as is."""
+    return orjson.Fragment(text)
+
+
+async def read_json(request: Request):
+    """Decode the JSON body of a request."""
+    return orjson.loads(await request.body())
+
+
+async def json_body(request: Request):
+    """Dependency returning the decoded JSON body, or None when it is not valid JSON."""
+    try:
+        return orjson.loads(await request.body())
+    except orjson.JSONDecodeError:
+        return None
+
+
+class ORJSONResponse(JSONResponse):
+    """JSONResponse encoded with orjson."""
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
@@ -0,0 +1,77 @@
+"""Build-time discovery of route modules.
+
+The application includes the routers listed in routes/_manifest.py instead of
+walking the routes package on every cold start. The manifest is regenerated
+by the build scripts before `sam build`:
+
+    python3 -m presence_sam.route_manifest          # rewrite the manifest
+    python3 -m presence_sam.route_manifest --check  # fail if it is stale
+
+Modules are inspected with `ast`, so generating the manifest does not import
+them or need the function's dependencies installed.
+"""
+
+import ast
+import sys
+from pathlib import Path
+
+ROUTES_DIR = Path(__file__).parent / "routes"
+MANIFEST_PATH = ROUTES_DIR / "_manifest.py"
+
+
+def _binds_router(tree: ast.Module) -> bool:
+    """Return True when a module binds the name `router` at top level."""
+    for node in tree.body:
+        if isinstance(node, (ast.Import, ast.ImportFrom)):
+            if any((alias.asname or alias.name) == "router" for alias in node.names):
+                return True
+        elif isinstance(node, (ast.Assign, ast.AnnAssign)):
+            targets = node.targets if isinstance(node, ast.Assign) else [node.target]
+            if any(isinstance(target, ast.Name) and target.id == "router" for target in targets):
+                return True
+    return False
+
+
+def discover_route_modules() -> list:
+    """Return the sorted names of the modules under routes/ that expose a `router`."""
+    modules = []
+    for path in sorted(ROUTES_DIR.glob("*.py")):
+        if path.name.startswith("_"):
+            continue
+        if _binds_router(ast.parse(path.read_text(), filename=str(path))):
+            modules.append(f"{__package__}.routes.{path.stem}")
+    return modules
+
+
+def render(modules) -> str:
+    """Return the source of a manifest listing `modules`."""
+    lines = [
+        '"""Route modules included by the application.',
+        "",
+        "Generated by `python3 -m presence_sam.route_manifest`; do not edit.",
+        '"""',
+        "",
+        "ROUTE_MODULES = (",
+        *(f'    "{module}",' for module in modules),
+        ")",
+    ]
+    return "\n".join(lines) + "\n"
+
+
+def main(argv=None) -> int:
+    argv = sys.argv[1:] if argv is None else argv
+    source = render(discover_route_modules())
+    current = MANIFEST_PATH.read_text() if MANIFEST_PATH.exists() else None
+    if "--check" in argv:
+        if current != source:
+            print(f"{MANIFEST_PATH} is out of date, run: python3 -m presence_sam.route_manifest", file=sys.stderr)
+            return 1
+        return 0
+    if current != source:
+        MANIFEST_PATH.write_text(source)
+        print(f"Wrote {MANIFEST_PATH}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,18 @@
+"""Route modules included by the application.
+
+Generated by `python3 -m presence_sam.route_manifest`; do not edit.
+"""
+
+ROUTE_MODULES = (
+    "presence_sam.routes.config",
+    "presence_sam.routes.events",
+    "presence_sam.routes.healthcheck",
+    "presence_sam.routes.index",
+    "presence_sam.routes.match",
+    "presence_sam.routes.metrics",
+    "presence_sam.routes.place",
+    "presence_sam.routes.snapshot",
+    "presence_sam.routes.user_data",
+    "presence_sam.routes.version",
+    "presence_sam.routes.whoami",
+)
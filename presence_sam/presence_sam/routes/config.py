@@ -1,5 +1,5 @@
-from fastapi.responses import JSONResponse
 from . import fn_router as router
+from ..responses import ORJSONResponse
 import os
 import logging
 
@@ -11,7 +11,7 @@ log = logging.getLogger(__name__)
 def get(key: str = None):
     if key.startswith("_"):
         log.warning(f"Unauthorized access attempt for key: {key}")
-        return JSONResponse({"error": "Unauthorized"}, status_code=403)
+        return ORJSONResponse({"error": "Unauthorized"}, status_code=403)
     value = os.getenv(key)
     envs = os.environ
     log.info(f"########## Retrieving configuration for key: {key}")
@@ -19,6 +19,6 @@ def get(key: str = None):
         log.info(f"Environment variable: {env_key}={envs[env_key]}")
     if not value:
         log.info(f"Key not found: {key}")
-        return JSONResponse({"error": "Not Found"}, status_code=404)
+        return ORJSONResponse({"error": "Not Found"}, status_code=404)
     log.info(f"Retrieved value for key: {key}")
     return {"value": value}
@@ -1,176 +1,449 @@
 from fastapi import Path, Depends, Request
-from fastapi.responses import JSONResponse
+from fastapi.responses import StreamingResponse
 from sqlmodel import Session, text
+from sqlmodel.ext.asyncio.session import AsyncSession
 from datetime import datetime, timezone, timedelta
+import base64
+import binascii
+import hashlib
 import logging
-import json
+import re
 
 from . import fn_router as router
-from ..database import get_session
+from .. import cache, face_index, occupancy
+from ..cache import cached_response
+from ..database import get_async_session, get_engine, get_session
+from ..responses import ORJSONResponse, dumps, raw_json, read_json
+from ..place_versions import DELTA_OVERLAP, make_etag, not_modified, place_version, touch_place
+from .snapshot import SNAPSHOT_MEDIA_TYPES
 
 logger = logging.getLogger(__name__)
 
+# Upper bound on events accepted by a single batch request
+MAX_BATCH_EVENTS = 500
+
+# Batched events are stored at their own `timestamp`, clamped to at most this
+# far in the past (and never in the future)
+MAX_BATCH_EVENT_AGE = timedelta(days=1)
+
+# Upper bound on events returned per page by GET /place/{place_id}/events
+MAX_EVENTS_LIMIT = 1000
+
+# Rows fetched per round trip when streaming events
+STREAM_CHUNK_SIZE = 200
+
+# Camera snapshots arrive as base64 data URLs (canvas.toDataURL)
+_DATA_URL_RE = re.compile(r"^data:([\w.+-]+/[\w.+-]+);base64,(.*)$", re.DOTALL)
+
+
+def _encode_cursor(created_at: datetime, event_id: int) -> str:
+    """Build an opaque keyset cursor pointing at an event."""
+    raw = f"{created_at.isoformat()}|{event_id}".encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def _decode_cursor(cursor: str):
+    """Return the (created_at, id) pair of a cursor. Raises ValueError if malformed."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4)).decode()
+    except (binascii.Error, UnicodeDecodeError) as e:
+        raise ValueError(str(e)) from e
+    created_at, _, event_id = raw.partition("|")
+    return datetime.fromisoformat(created_at), int(event_id)
+
+
+def _parse_timestamp(value):
+    """Return an ISO 8601 timestamp with a UTC offset as a datetime, or None."""
+    if not isinstance(value, str):
+        return None
+    try:
+        moment = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    return moment if moment.tzinfo else None
+
+
+def _parse_snapshot(snapshot):
+    """Decode an image data URL into (sha256 id, media type, bytes).
+
+    Returns None unless it is a data URL of one of SNAPSHOT_MEDIA_TYPES; any
+    other snapshot stays inline in the payload.
+    """
+    match = _DATA_URL_RE.match(snapshot) if isinstance(snapshot, str) else None
+    if not match or match.group(1).lower() not in SNAPSHOT_MEDIA_TYPES:
+        return None
+    try:
+        data = base64.b64decode(match.group(2), validate=True)
+    except (binascii.Error, ValueError):
+        return None
+    return hashlib.sha256(data).hexdigest(), match.group(1).lower(), data
+
+
+async def _store_snapshots(session: AsyncSession, payloads):
+    """Move snapshots out of event payloads into the content-addressed store.
+
+    Each payload loses its `snapshot` key when it holds a decodable data URL.
+    Returns the snapshot id for each payload (None when it had no snapshot).
+    """
+    snapshot_ids, stored = [], {}
+    for payload in payloads:
+        parsed = _parse_snapshot(payload.get("snapshot"))
+        if parsed is None:
+            snapshot_ids.append(None)
+            continue
+        del payload["snapshot"]
+        snapshot_ids.append(parsed[0])
+        stored[parsed[0]] = parsed
+    if stored:
+        ids, media_types, datas = zip(*stored.values())
+        await session.exec(
+            text("""
+                INSERT INTO snapshots (id, media_type, data)
+                SELECT * FROM unnest(CAST(:ids AS text[]), CAST(:media_types AS text[]), CAST(:datas AS bytea[]))
+                ON CONFLICT DO NOTHING
+            """),
+            params={"ids": list(ids), "media_types": list(media_types), "datas": list(datas)},
+        )
+    return snapshot_ids
+
+
+def _subject_keys(people, pets):
+    """Return the (name, subject_type) pairs an event should be linked to."""
+    keys = [(person.get('name') or 'unknown', 'person') for person in people]
+    keys += [(pet.get('species') or pet.get('name') or 'pet', 'pet') for pet in pets]
+    return keys
+
+
+async def _link_subjects(session: AsyncSession, event_keys):
+    """Upsert subjects and link them to their events using set-based statements.
+
+    `event_keys` is a list of (event_id, [(name, subject_type), ...]) pairs.
+    """
+    links = [(event_id, key) for event_id, keys in event_keys for key in keys]
+    if not links:
+        return
+    wanted = sorted({key for _, key in links})
+    params = {"names": [name for name, _ in wanted], "types": [sub_type for _, sub_type in wanted]}
+    rows = (await session.exec(
+        text("""
+            WITH wanted AS (
+                SELECT * FROM unnest(CAST(:names AS text[]), CAST(:types AS text[])) AS w(name, subject_type)
+            ), inserted AS (
+                INSERT INTO subjects (name, subject_type)
+                SELECT name, subject_type FROM wanted
+                ON CONFLICT DO NOTHING
+                RETURNING id, name, subject_type
+            )
+            SELECT id, name, subject_type FROM inserted
+            UNION ALL
+            SELECT s.id, s.name, s.subject_type FROM subjects s JOIN wanted w USING (name, subject_type)
+        """),
+        params=params,
+    )).all()
+    subject_ids = {(name, sub_type): subject_id for subject_id, name, sub_type in rows}
+
+    # A concurrent insert of the same subject is invisible to the statement above
+    missing = [key for key in wanted if key not in subject_ids]
+    if missing:
+        rows = (await session.exec(
+            text("""
+                SELECT s.id, s.name, s.subject_type FROM subjects s
+                JOIN unnest(CAST(:names AS text[]), CAST(:types AS text[])) AS w(name, subject_type) USING (name, subject_type)
+            """),
+            params={"names": [name for name, _ in missing], "types": [sub_type for _, sub_type in missing]},
+        )).all()
+        subject_ids.update({(name, sub_type): subject_id for subject_id, name, sub_type in rows})
+
+    await session.exec(
+        text("INSERT INTO event_subjects (event_id, subject_id) SELECT * FROM unnest(CAST(:event_ids AS integer[]), CAST(:subject_ids AS integer[]))"),
+        params={"event_ids": [event_id for event_id, _ in links], "subject_ids": [subject_ids[key] for _, key in links]},
+    )
+
 
 @router.put("/place/{place_id}/events")
-async def events_put(place_id: str, request: Request, session: Session = Depends(get_session)):
-    body = await request.json()
+async def events_put(place_id: str, request: Request, session: AsyncSession = Depends(get_async_session)):
+    body = await read_json(request)
     event_type = body.pop("event_type", "unknown")
     people = body.pop("people", [])
     pets = body.pop("pets", [])
 
+    snapshot_id = (await _store_snapshots(session, [body]))[0]
+
     # Insert the event and get its id
-    result = session.exec(
-        text("INSERT INTO events (place_id, event_type, people, pets, payload) VALUES (:place_id, :event_type, :people, :pets, :payload) RETURNING id"),
-        params={"place_id": place_id, "event_type": event_type, "people": json.dumps(people), "pets": json.dumps(pets), "payload": json.dumps(body)},
+    result = await session.exec(
+        text("INSERT INTO events (place_id, event_type, people, pets, payload, snapshot_id) VALUES (:place_id, :event_type, :people, :pets, :payload, :snapshot_id) RETURNING id"),
+        params={"place_id": place_id, "event_type": event_type, "people": dumps(people), "pets": dumps(pets), "payload": dumps(body), "snapshot_id": snapshot_id},
     )
     event_id = result.first()[0]
 
-    # Upsert people into subjects and link to event
-    for person in people:
-        name = person.get('name') or 'unknown'
-        row = session.exec(
-            text("INSERT INTO subjects (name, subject_type) VALUES (:name, 'person') ON CONFLICT DO NOTHING RETURNING id"),
-            params={"name": name},
-        ).first()
-        if row:
-            subject_id = row[0]
-        else:
-            subject_id = session.exec(
-                text("SELECT id FROM subjects WHERE name = :name AND subject_type = 'person'"),
-                params={"name": name},
-            ).first()[0]
-        session.exec(
-            text("INSERT INTO event_subjects (event_id, subject_id) VALUES (:event_id, :subject_id)"),
-            params={"event_id": event_id, "subject_id": subject_id},
-        )
+    await _link_subjects(session, [(event_id, _subject_keys(people, pets))])
+    await occupancy.rollup_events(session, [event_id])
+    await touch_place(session, place_id)
 
-    # Upsert pets into subjects and link to event
-    for pet in pets:
-        name = pet.get('species') or pet.get('name') or 'pet'
-        row = session.exec(
-            text("INSERT INTO subjects (name, subject_type) VALUES (:name, 'pet') ON CONFLICT DO NOTHING RETURNING id"),
-            params={"name": name},
-        ).first()
-        if row:
-            subject_id = row[0]
-        else:
-            subject_id = session.exec(
-                text("SELECT id FROM subjects WHERE name = :name AND subject_type = 'pet'"),
-                params={"name": name},
-            ).first()[0]
-        session.exec(
-            text("INSERT INTO event_subjects (event_id, subject_id) VALUES (:event_id, :subject_id)"),
-            params={"event_id": event_id, "subject_id": subject_id},
-        )
+    await session.commit()
+    cache.responses.invalidate(place_id)
+    return ORJSONResponse(status_code=200, content={"status": "ok", "place_id": place_id, "event_id": event_id})
+
+
+@router.put("/place/{place_id}/events/batch")
+async def events_put_batch(place_id: str, request: Request, session: AsyncSession = Depends(get_async_session)):
+    """Insert many buffered events for a place in a single transaction.
+
+    Each event is stored at its `timestamp` when it has a valid one, so a
+    flushed buffer keeps the times its events were taken; others get the
+    time of the request. Events stored in the past are recorded as changed,
+    so delta reads and the face index still pick them up.
+    """
+    body = await read_json(request)
+    items = body.get("events") if isinstance(body, dict) else None
+    if not isinstance(items, list) or not items or not all(isinstance(item, dict) for item in items):
+        return ORJSONResponse(status_code=400, content={"error": "events must be a non-empty list of objects"})
+    if len(items) > MAX_BATCH_EVENTS:
+        return ORJSONResponse(status_code=400, content={"error": f"at most {MAX_BATCH_EVENTS} events per batch"})
 
-    session.commit()
-    status_code = 200
-    body = {"status": "ok", "place_id": place_id, "event_id": event_id}
-    response = JSONResponse(
-        status_code=status_code,
-        content=json.loads(json.dumps(body, sort_keys=True)),
-        media_type="application/json"
+    event_types, people_json, pets_json, payloads, subject_keys, taken_ats = [], [], [], [], [], []
+    for item in items:
+        item = dict(item)  # leave the request body untouched
+        people = item.pop("people", [])
+        pets = item.pop("pets", [])
+        event_types.append(item.pop("event_type", "unknown"))
+        taken_ats.append(_parse_timestamp(item.get("timestamp")))
+        people_json.append(dumps(people))
+        pets_json.append(dumps(pets))
+        payloads.append(item)
+        subject_keys.append(_subject_keys(people, pets))
+    snapshot_ids = await _store_snapshots(session, payloads)
+
+    # Reserve ids up front so subject links can be matched to their events
+    event_ids = [row[0] for row in (await session.exec(
+        text("SELECT nextval(pg_get_serial_sequence('events', 'id')) FROM generate_series(1, :n)"),
+        params={"n": len(items)},
+    )).all()]
+    await session.exec(
+        text("""
+            WITH inserted AS (
+                INSERT INTO events (id, place_id, event_type, people, pets, payload, snapshot_id, created_at)
+                SELECT t.id, :place_id, t.event_type, CAST(t.people AS json), CAST(t.pets AS json), CAST(t.payload AS json),
+                       t.snapshot_id, LEAST(GREATEST(COALESCE(t.taken_at, now()), now() - :max_age), now())
+                FROM unnest(CAST(:ids AS integer[]), CAST(:event_types AS text[]), CAST(:people AS text[]),
+                            CAST(:pets AS text[]), CAST(:payloads AS text[]), CAST(:snapshot_ids AS text[]),
+                            CAST(:taken_ats AS timestamptz[]))
+                     AS t(id, event_type, people, pets, payload, snapshot_id, taken_at)
+                RETURNING id, place_id, created_at
+            )
+            INSERT INTO event_changes (event_id, place_id, created_at, changed_at)
+            SELECT id, place_id, created_at, now() FROM inserted WHERE created_at < now() - :overlap
+            ON CONFLICT (event_id) DO UPDATE SET changed_at = EXCLUDED.changed_at
+        """),
+        params={"place_id": place_id, "ids": event_ids, "event_types": event_types,
+                "people": people_json, "pets": pets_json, "payloads": [dumps(p) for p in payloads],
+                "snapshot_ids": snapshot_ids, "taken_ats": taken_ats,
+                "max_age": MAX_BATCH_EVENT_AGE, "overlap": DELTA_OVERLAP},
     )
-    return response
+    await _link_subjects(session, list(zip(event_ids, subject_keys)))
+    await occupancy.rollup_events(session, event_ids)
+    await touch_place(session, place_id)
+
+    await session.commit()
+    cache.responses.invalidate(place_id)
+    return ORJSONResponse(status_code=200, content={"status": "ok", "place_id": place_id, "event_ids": event_ids})
 
 
 @router.post("/place/{place_id}/events")
-async def events_update(place_id: str, request: Request, session: Session = Depends(get_session)):
-    body = await request.json()
+async def events_update(place_id: str, request: Request, session: AsyncSession = Depends(get_async_session)):
+    body = await read_json(request)
     event_id = body.get("event_id")
     if not event_id:
-        return JSONResponse(status_code=400, content={"error": "event_id is required"})
+        return ORJSONResponse(status_code=400, content={"error": "event_id is required"})
+    try:
+        # Clients may send the id as a string; the face index and the SQL below need the integer
+        event_id = int(event_id)
+    except (TypeError, ValueError):
+        return ORJSONResponse(status_code=400, content={"error": "event_id must be an integer"})
 
     people = body.get("people", [])
     pets = body.get("pets", [])
 
-    # Verify event belongs to this place
-    row = session.exec(
-        text("SELECT id FROM events WHERE id = :event_id AND place_id = :place_id"),
-        params={"event_id": event_id, "place_id": place_id},
-    ).first()
+    # Update people and pets JSON on the event, provided it belongs to this place, and
+    # record the change so delta reads (which follow created_at) send the event again
+    row = (await session.exec(
+        text("""
+            WITH updated AS (
+                UPDATE events SET people = :people, pets = :pets WHERE id = :event_id AND place_id = :place_id
+                RETURNING id, place_id, created_at
+            ), changed AS (
+                INSERT INTO event_changes (event_id, place_id, created_at, changed_at)
+                SELECT id, place_id, created_at, now() FROM updated
+                ON CONFLICT (event_id) DO UPDATE SET changed_at = EXCLUDED.changed_at
+            )
+            SELECT id FROM updated
+        """),
+        params={"event_id": event_id, "place_id": place_id, "people": dumps(people), "pets": dumps(pets)},
+    )).first()
     if not row:
-        return JSONResponse(status_code=404, content={"error": "event not found"})
+        return ORJSONResponse(status_code=404, content={"error": "event not found"})
 
-    # Update people and pets JSON on the event
-    session.exec(
-        text("UPDATE events SET people = :people, pets = :pets WHERE id = :event_id"),
-        params={"event_id": event_id, "people": json.dumps(people), "pets": json.dumps(pets)},
-    )
-
-    # Remove old subject links and re-create
-    session.exec(
+    # Remove old subject links and re-create, moving the event's rollup counts along
+    await occupancy.rollup_events(session, [event_id], delta=-1, with_total=False)
+    await session.exec(
         text("DELETE FROM event_subjects WHERE event_id = :event_id"),
         params={"event_id": event_id},
     )
 
-    for person in people:
-        name = person.get('name') or 'unknown'
-        r = session.exec(
-            text("INSERT INTO subjects (name, subject_type) VALUES (:name, 'person') ON CONFLICT DO NOTHING RETURNING id"),
-            params={"name": name},
-        ).first()
-        subject_id = r[0] if r else session.exec(
-            text("SELECT id FROM subjects WHERE name = :name AND subject_type = 'person'"),
-            params={"name": name},
-        ).first()[0]
-        session.exec(
-            text("INSERT INTO event_subjects (event_id, subject_id) VALUES (:event_id, :subject_id)"),
-            params={"event_id": event_id, "subject_id": subject_id},
-        )
+    await _link_subjects(session, [(event_id, _subject_keys(people, pets))])
+    await occupancy.rollup_events(session, [event_id], with_total=False)
+    await occupancy.prune_empty(session, place_id)
+    await touch_place(session, place_id)
+
+    await session.commit()
+    cache.responses.invalidate(place_id)
+    face_index.rename(place_id, event_id, [person.get('name') for person in people])
+    return ORJSONResponse(status_code=200, content={"status": "ok", "event_id": event_id})
+
+
+# json columns are selected as text and passed through to the response
+# undecoded; NULL and JSON null fall back to an empty list or object
+_EVENT_COLUMNS = """id, event_type,
+    COALESCE(NULLIF(CAST(people AS text), 'null'), '[]'),
+    COALESCE(NULLIF(CAST(pets AS text), 'null'), '[]'),
+    COALESCE(NULLIF(CAST(payload AS text), 'null'), '{}'),
+    created_at, snapshot_id"""
 
-    for pet in pets:
-        name = pet.get('species') or pet.get('name') or 'pet'
-        r = session.exec(
-            text("INSERT INTO subjects (name, subject_type) VALUES (:name, 'pet') ON CONFLICT DO NOTHING RETURNING id"),
-            params={"name": name},
-        ).first()
-        subject_id = r[0] if r else session.exec(
-            text("SELECT id FROM subjects WHERE name = :name AND subject_type = 'pet'"),
-            params={"name": name},
-        ).first()[0]
-        session.exec(
-            text("INSERT INTO event_subjects (event_id, subject_id) VALUES (:event_id, :subject_id)"),
-            params={"event_id": event_id, "subject_id": subject_id},
-        )
 
-    session.commit()
-    return JSONResponse(status_code=200, content={"status": "ok", "event_id": event_id})
+def _event_dict(row):
+    """Convert an events row selected with _EVENT_COLUMNS into its JSON shape."""
+    return {
+        "event_id": row[0],
+        "event_type": row[1],
+        "people": raw_json(row[2]),
+        "pets": raw_json(row[3]),
+        "payload": raw_json(row[4]),
+        "created_at": row[5].isoformat() if hasattr(row[5], 'isoformat') else str(row[5]),
+        "snapshot_id": row[6],
+    }
+
+
+def _stream_events(place_id: str, since):
+    """Yield the JSON body of a whole event window, encoding it chunk by chunk.
+
+    Rows come through a server-side cursor STREAM_CHUNK_SIZE at a time, so memory
+    stays flat however many events the window holds. Runs on its own session
+    because it outlives the request handler.
+    """
+    conditions = "place_id = :place_id" + (" AND created_at >= :since" if since else "")
+    total, newest = 0, None
+    with Session(get_engine()) as session:
+        result = session.connection().execution_options(stream_results=True, yield_per=STREAM_CHUNK_SIZE).execute(
+            text(f"SELECT {_EVENT_COLUMNS} FROM events WHERE {conditions} ORDER BY created_at, id"),
+            {"place_id": place_id, "since": since},
+        )
+        yield f'{{"place_id": {dumps(place_id)}, "events": ['
+        for rows in result.partitions():
+            chunk = ", ".join(dumps(_event_dict(row)) for row in rows)
+            yield (", " if total else "") + chunk
+            total += len(rows)
+            newest = _encode_cursor(rows[-1][5], rows[-1][0])
+    yield f'], "total": {total}, "cursor": {dumps(newest)}, "next_cursor": null}}'
 
 
 @router.get("/place/{place_id}/events")
-def events_get(place_id: str, minutes: int = None, session: Session = Depends(get_session)):
+def events_get(place_id: str, request: Request, minutes: int = None, limit: int = None, cursor: str = None,
+               after: str = None, stream: bool = False, session: Session = Depends(get_session)):
+    """Return a page of a place's events in chronological order.
+
+    By default the page holds the newest events; pass the returned `next_cursor`
+    back as `cursor` to fetch the page of older events. In delta mode, pass the
+    returned `cursor` back as `after` to fetch only events stored or changed
+    since then (plus a short overlap, so clients should de-duplicate on
+    event_id and keep the latest copy).
+    With `stream=true` the whole window is streamed oldest first, without paging;
+    it cannot be combined with `cursor`, `after` or `limit`. Only a server such
+    as uvicorn sends the stream as it is produced: under Mangum (Lambda) the
+    body is buffered whole and must fit in the 6 MB response limit.
+    """
+    if stream and (cursor or after or limit is not None):
+        return ORJSONResponse(status_code=400, content={"error": "stream cannot be combined with cursor, after or limit"})
     if minutes == 0:
-        return JSONResponse(content={"place_id": place_id, "events": [], "total": 0})
-    if minutes:
-        since = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+        return ORJSONResponse(content={"place_id": place_id, "events": [], "total": 0, "cursor": after, "next_cursor": None})
+    limit = max(1, min(limit or MAX_EVENTS_LIMIT, MAX_EVENTS_LIMIT))
+    key = (place_id, "events", minutes, limit, cursor, after)
+    if not stream:
+        hit = cached_response(request, key)
+        if hit:
+            return hit
+    generation = cache.responses.generation(place_id)
+    since = datetime.now(timezone.utc) - timedelta(minutes=minutes) if minutes else None
+
+    etag = make_etag(place_id, place_version(session, place_id), since, limit, cursor, after, stream)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+    if stream:
+        return StreamingResponse(
+            _stream_events(place_id, since),
+            media_type="application/json",
+            headers={"ETag": etag, "Cache-Control": "no-cache"},
+        )
+
+    conditions = ["place_id = :place_id"]
+    params = {"place_id": place_id, "limit": limit + 1}
+    if since:
+        conditions.append("created_at >= :since")
+        params["since"] = since
+    try:
+        if cursor:
+            params["cursor_at"], params["cursor_id"] = _decode_cursor(cursor)
+            # The plain bound lets the planner skip partitions newer than the cursor
+            conditions.append("created_at <= :cursor_at AND (created_at, id) < (:cursor_at, :cursor_id)")
+        if after:
+            after_at, _ = _decode_cursor(after)
+            params["after"] = after_at - DELTA_OVERLAP
+    except ValueError:
+        return ORJSONResponse(status_code=400, content={"error": "invalid cursor"})
+
+    if after:
+        # Delta polls read forward from the cursor: events stored since then, and older
+        # events of the window changed since then, ordered by when they were stored or
+        # changed (seen_at), which the returned cursor points at
+        changed_since = " AND e.created_at >= :since" if since else ""
         results = session.exec(
-            text("SELECT event_type, people, pets, payload, created_at FROM events WHERE place_id = :place_id AND created_at >= :since ORDER BY created_at DESC"),
-            params={"place_id": place_id, "since": since},
+            text(f"""
+                SELECT {_EVENT_COLUMNS}, seen_at FROM (
+                    SELECT *, created_at AS seen_at FROM events
+                    WHERE {' AND '.join(conditions)} AND created_at >= :after
+                    UNION ALL
+                    SELECT e.*, c.changed_at FROM event_changes c
+                    JOIN events e ON e.id = c.event_id AND e.created_at = c.created_at
+                    WHERE c.place_id = :place_id AND c.changed_at >= :after AND e.created_at < :after{changed_since}
+                ) delta
+                ORDER BY seen_at, id LIMIT :limit
+            """),
+            params=params,
         ).all()
     else:
+        # Pages read backwards from the newest event
         results = session.exec(
-            text("SELECT event_type, people, pets, payload, created_at FROM events WHERE place_id = :place_id ORDER BY created_at DESC"),
-            params={"place_id": place_id},
+            text(f"SELECT {_EVENT_COLUMNS} FROM events WHERE {' AND '.join(conditions)} ORDER BY created_at DESC, id DESC LIMIT :limit"),
+            params=params,
         ).all()
-    events = []
-    for row in results:
-        people = row[1]
-        if isinstance(people, str):
-            people = json.loads(people)
-        pets = row[2]
-        if isinstance(pets, str):
-            pets = json.loads(pets)
-        payload = row[3]
-        if isinstance(payload, str):
-            payload = json.loads(payload)
-        events.append({
-            "event_type": row[0],
-            "people": people or [],
-            "pets": pets or [],
-            "payload": payload or {},
-            "created_at": row[4].isoformat() if hasattr(row[4], 'isoformat') else str(row[4])
-        })
-    # Return in chronological order (oldest first)
-    events.reverse()
-    return JSONResponse(content={"place_id": place_id, "events": events, "total": len(events)})
+    next_cursor = None
+    if len(results) > limit:
+        results = results[:limit]
+        if not after:
+            next_cursor = _encode_cursor(results[-1][5], results[-1][0])
+    if not after:
+        # Return in chronological order (oldest first)
+        results.reverse()
+
+    events = [_event_dict(row) for row in results]
+    if after:
+        # Only the overlap came back: keep the cursor rather than moving it backwards
+        newest = _encode_cursor(results[-1][7], results[-1][0]) if results and results[-1][7] > after_at else after
+    else:
+        newest = _encode_cursor(results[-1][5], results[-1][0]) if results else None
+    response = ORJSONResponse(
+        content={"place_id": place_id, "events": events, "total": len(events), "cursor": newest, "next_cursor": next_cursor},
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
+    cache.responses.put(key, etag, response.body, generation)
+    return response
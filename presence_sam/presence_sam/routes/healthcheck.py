@@ -1,15 +1,18 @@
-from fastapi.responses import JSONResponse
-import json
 import os
 
 from . import fn_router as router
-from ..database import check_connection
+from ..database import connection_probe
+from ..responses import ORJSONResponse
 
 
 @router.get("/__hc")
 def get_healthcheck():
-    """Return health check with version info and database status."""
-    db_status = check_connection()
+    """Return health check with version info and database status.
+
+    The database status and round trip are probed at most every HC_CACHE_TTL
+    seconds and reported within HC_DB_TIMEOUT seconds.
+    """
+    db_status, db_latency_ms = connection_probe.get()
     overall = "OK" if db_status == "OK" else "DEGRADED"
     status_code = 200 if overall == "OK" else 500
 
@@ -17,12 +20,13 @@ def get_healthcheck():
         "auth_client_id": "SET" if os.getenv("GOOGLE_CLIENT_ID") else "MISSING",
         "commit": os.getenv("GIT_COMMIT", "unknown"),
         "database": db_status,
+        "database_latency_ms": db_latency_ms,
         "health_status": overall,
         "version": os.getenv("APP_VERSION", "unknown"),
     }
 
-    return JSONResponse(
+    return ORJSONResponse(
         status_code=status_code,
-        content=json.loads(json.dumps(content, sort_keys=True)),
+        content=content,
         media_type="application/json"
     )
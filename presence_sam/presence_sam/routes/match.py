@@ -0,0 +1,31 @@
+from fastapi import Depends
+from sqlmodel import Session
+
+from . import fn_router as router
+from .. import face_index
+from ..database import get_session
+from ..responses import ORJSONResponse, json_body
+
+# Upper bound on query descriptors per request
+MAX_QUERIES = 100
+
+
+@router.post("/place/{id}/match")
+def place_match(id: str, body=Depends(json_body), session: Session = Depends(get_session)):
+    """Find the nearest known subject of a place for each query descriptor."""
+    if not isinstance(body, dict):
+        return ORJSONResponse(status_code=400, content={"error": "body must be a JSON object"})
+    descriptors = body.get("descriptors")
+    threshold = body.get("threshold", face_index.MATCH_THRESHOLD)
+    if not isinstance(descriptors, list) or not descriptors:
+        return ORJSONResponse(status_code=400, content={"error": "descriptors must be a non-empty list"})
+    if len(descriptors) > MAX_QUERIES:
+        return ORJSONResponse(status_code=400, content={"error": f"at most {MAX_QUERIES} descriptors per request"})
+    if not all(isinstance(d, list) and len(d) == face_index.DESCRIPTOR_SIZE
+               and all(isinstance(v, (int, float)) for v in d) for d in descriptors):
+        return ORJSONResponse(status_code=400, content={"error": f"each descriptor must have {face_index.DESCRIPTOR_SIZE} numbers"})
+    if not isinstance(threshold, (int, float)):
+        return ORJSONResponse(status_code=400, content={"error": "threshold must be a number"})
+
+    index = face_index.get_index(session, id)
+    return {"place_id": id, "known": len(index), "matches": index.match(descriptors, threshold)}
@@ -0,0 +1,14 @@
+from . import fn_router as router
+from ..responses import ORJSONResponse
+from ..sql_metrics import METRICS_ROUTE_ENABLED, route_stats
+
+
+@router.get("/__metrics")
+def get_metrics():
+    """Return per-route request, SQL statement and timing aggregates of this container.
+
+    Only served when METRICS_ROUTE_ENABLED is true.
+    """
+    if not METRICS_ROUTE_ENABLED:
+        return ORJSONResponse(status_code=404, content={"detail": "Not Found"})
+    return ORJSONResponse(content={"routes": route_stats.snapshot()})
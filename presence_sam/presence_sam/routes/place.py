@@ -1,67 +1,82 @@
 from fastapi.responses import RedirectResponse
-from fastapi import Depends
+from fastapi import Depends, Request
 from sqlmodel import Session, text
 from datetime import datetime, timezone, timedelta
 
 from . import fn_router as router
+from .. import cache, occupancy
+from ..cache import cached_response
 from ..database import get_session
+from ..responses import ORJSONResponse
+from ..place_versions import DELTA_OVERLAP, make_etag, not_modified, place_version
+
+# Presence aggregation in a single pass over the window's events. Events with
+# no linked subject and those linked to the 'unknown' person share the NULL
+# subject_id (unidentified). Each subject's latest event provides its snapshot;
+# the legacy inline payload snapshot is only read when that event has no
+# snapshot_id. Every reference to events is bounded by :since, so only the
+# partitions overlapping the window are scanned.
+PRESENCE_SQL = """
+    WITH seen AS (
+        SELECT DISTINCT e.id AS event_id, e.created_at, e.snapshot_id,
+               CASE WHEN s.subject_type = 'person' AND s.name = 'unknown' THEN NULL ELSE s.id END AS subject_id
+        FROM events e
+        LEFT JOIN event_subjects es ON es.event_id = e.id
+        LEFT JOIN subjects s ON s.id = es.subject_id
+        WHERE e.place_id = :place_id AND e.created_at >= :since
+    ), per_subject AS (
+        SELECT DISTINCT ON (subject_id)
+               subject_id, event_id, snapshot_id,
+               COUNT(*) OVER w AS event_count,
+               MIN(created_at) OVER w AS first_seen,
+               MAX(created_at) OVER w AS last_seen
+        FROM seen
+        WINDOW w AS (PARTITION BY subject_id)
+        ORDER BY subject_id, created_at DESC, event_id DESC
+    )
+    SELECT p.subject_id, s.subject_type, s.name, p.event_count, p.first_seen, p.last_seen,
+           COALESCE('/fn/snapshot/' || p.snapshot_id, le.payload->>'snapshot') AS snapshot
+    FROM per_subject p
+    LEFT JOIN subjects s ON s.id = p.subject_id
+    LEFT JOIN events le ON p.snapshot_id IS NULL AND le.id = p.event_id
+        AND le.created_at = p.last_seen AND le.created_at >= :since
+    WHERE p.last_seen >= COALESCE(CAST(:after AS timestamptz), '-infinity')
+    ORDER BY p.last_seen DESC, p.subject_id
+"""
+
 
 @router.get("/place/{id}")
 def get(id: str = None):
     return RedirectResponse(url=f"/app/place.html?place={id}")
 
 @router.get("/place/{id}/presence")
-def place_get_presence(id: str = None, minutes: int = 60, session: Session = Depends(get_session)):
+def place_get_presence(request: Request, id: str = None, minutes: int = 60, after: datetime = None,
+                       session: Session = Depends(get_session)):
+    """Aggregate who was seen at a place within the last `minutes`.
+
+    With `after` (the `cursor` of a previous response) only subjects seen since
+    then are returned.
+    """
     minutes = max(0, min(minutes, 10080))
+    key = (id, "presence", minutes, after)
+    hit = cached_response(request, key)
+    if hit:
+        return hit
+    generation = cache.responses.generation(id)
     since = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+    etag = make_etag(id, place_version(session, id), since, after)
+    after_at = after - DELTA_OVERLAP if after else None
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
     results = session.exec(
-        text("""
-            SELECT i.id, i.subject_type, i.name,
-                   COUNT(DISTINCT e.id) AS event_count,
-                   MIN(e.created_at) AS first_seen,
-                   MAX(e.created_at) AS last_seen,
-                   (SELECT e2.payload->>'snapshot'
-                    FROM events e2
-                    JOIN event_subjects ei2 ON ei2.event_id = e2.id
-                    WHERE ei2.subject_id = i.id
-                      AND e2.place_id = :place_id AND e2.created_at >= :since
-                    ORDER BY e2.created_at DESC LIMIT 1
-                   ) AS snapshot
-            FROM events e
-            LEFT JOIN event_subjects ei ON ei.event_id = e.id
-            LEFT JOIN subjects i ON i.id = ei.subject_id
-            WHERE e.place_id = :place_id AND e.created_at >= :since
-            GROUP BY i.id, i.subject_type, i.name
-            ORDER BY MAX(e.created_at) DESC
-        """),
-        params={"place_id": id, "since": since},
+        text(PRESENCE_SQL),
+        params={"place_id": id, "since": since, "after": after_at},
     ).all()
 
-    identified = []
+    presence = []
     unidentified = None
-
-    for row in results:
-        subject_id, sub_type, name, event_count, first_seen, last_seen, snapshot = row
-        if subject_id is None:
-            # Events with no linked subject
-            if unidentified is None:
-                unidentified = {
-                    "type": "unidentified",
-                    "label": "Unidentified",
-                    "event_count": event_count,
-                    "first_seen": first_seen.isoformat(),
-                    "last_seen": last_seen.isoformat(),
-                    "snapshot": snapshot,
-                }
-            else:
-                unidentified["event_count"] += event_count
-                if first_seen.isoformat() < unidentified["first_seen"]:
-                    unidentified["first_seen"] = first_seen.isoformat()
-                if last_seen.isoformat() > unidentified["last_seen"]:
-                    unidentified["last_seen"] = last_seen.isoformat()
-                if snapshot:
-                    unidentified["snapshot"] = snapshot
-            continue
+    for subject_id, sub_type, name, event_count, first_seen, last_seen, snapshot in results:
         entry = {
             "subject_id": subject_id,
             "type": sub_type,
@@ -71,15 +86,62 @@ def place_get_presence(id: str = None, minutes: int = 60, session: Session = Dep
             "last_seen": last_seen.isoformat(),
             "snapshot": snapshot,
         }
-        if sub_type == 'person' and name == 'unknown':
-            entry["type"] = "unidentified"
-            entry["label"] = "Unidentified"
+        if subject_id is None:
+            del entry["subject_id"]
+            entry.update(type="unidentified", label="Unidentified")
             unidentified = entry
         else:
-            identified.append(entry)
-
-    presence = identified
+            presence.append(entry)
     if unidentified:
         presence.append(unidentified)
 
-    return {"place_id": id, "minutes": minutes, "since": since.isoformat(), "presence": presence}
\ No newline at end of file
+    cursor = max((entry["last_seen"] for entry in presence), default=after.isoformat() if after else None)
+    response = ORJSONResponse(
+        content={"place_id": id, "minutes": minutes, "since": since.isoformat(), "cursor": cursor, "presence": presence},
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
+    cache.responses.put(key, etag, response.body, generation)
+    return response
+
+@router.get("/place/{id}/occupancy")
+def place_get_occupancy(request: Request, id: str = None, minutes: int = 60, session: Session = Depends(get_session)):
+    """Per-minute event and subject counts of a place, read from the occupancy rollups."""
+    minutes = max(0, min(minutes, 10080))
+    since = datetime.now(timezone.utc) - timedelta(minutes=minutes)
+    etag = make_etag(id, place_version(session, id), since)
+    cached = not_modified(request, etag)
+    if cached:
+        return cached
+
+    # The grouping set () adds a window-wide totals row with a NULL bucket
+    results = session.exec(
+        text("""
+            SELECT bucket,
+                   COALESCE(SUM(event_count) FILTER (WHERE subject_id = :all_events), 0) AS events,
+                   COUNT(DISTINCT subject_id) FILTER (WHERE subject_id <> :all_events) AS subjects
+            FROM occupancy_minutes
+            WHERE place_id = :place_id AND bucket >= date_trunc('minute', CAST(:since AS timestamptz))
+            GROUP BY GROUPING SETS ((bucket), ())
+            ORDER BY bucket NULLS FIRST
+        """),
+        params={"place_id": id, "since": since, "all_events": occupancy.ALL_EVENTS},
+    ).all()
+
+    total_events, total_subjects, series = 0, 0, []
+    for bucket, events, subjects in results:
+        if bucket is None:
+            total_events, total_subjects = int(events), subjects
+            continue
+        series.append({"bucket": bucket.isoformat(), "events": int(events), "subjects": subjects})
+
+    return ORJSONResponse(
+        content={
+            "place_id": id,
+            "minutes": minutes,
+            "since": since.isoformat(),
+            "total_events": total_events,
+            "subjects": total_subjects,
+            "series": series,
+        },
+        headers={"ETag": etag, "Cache-Control": "no-cache"},
+    )
@@ -0,0 +1,33 @@
+from fastapi import Depends
+from fastapi.responses import Response
+from sqlmodel import Session, text
+
+from . import fn_router as router
+from ..database import get_session
+from ..responses import ORJSONResponse
+
+# Image types accepted from camera data URLs and served back as Content-Type.
+# Anything else (e.g. text/html) would run as a page on the app's origin.
+SNAPSHOT_MEDIA_TYPES = ("image/jpeg", "image/png", "image/webp")
+
+
+@router.get("/snapshot/{snapshot_id}")
+def snapshot_get(snapshot_id: str, session: Session = Depends(get_session)):
+    """Serve a stored camera snapshot. Content-addressed, so cacheable forever."""
+    row = session.exec(
+        text("SELECT media_type, data FROM snapshots WHERE id = :snapshot_id"),
+        params={"snapshot_id": snapshot_id},
+    ).first()
+    if not row:
+        return ORJSONResponse(status_code=404, content={"error": "snapshot not found"})
+    media_type, data = row
+    headers = {
+        "Cache-Control": "public, max-age=31536000, immutable",
+        "ETag": f'"{snapshot_id}"',
+        "X-Content-Type-Options": "nosniff",
+    }
+    if media_type not in SNAPSHOT_MEDIA_TYPES:
+        # Stored before the allow-list existed: hand it out as an opaque download
+        media_type = "application/octet-stream"
+        headers["Content-Disposition"] = "attachment"
+    return Response(content=bytes(data), media_type=media_type, headers=headers)
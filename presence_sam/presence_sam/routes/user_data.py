@@ -1,9 +1,8 @@
-from fastapi.responses import JSONResponse
-
 from . import fn_router as router
+from ..responses import ORJSONResponse
 
 
 @router.get("/user/data")
 def get_userdata():
     """Return simple user data health status."""
-    return JSONResponse(content={"health_status": "USERDATA"}, media_type="application/json")
+    return ORJSONResponse(content={"health_status": "USERDATA"}, media_type="application/json")
@@ -1,13 +1,13 @@
-from fastapi.responses import JSONResponse
 import os
 
 from . import fn_router as router
+from ..responses import ORJSONResponse
 
 
 @router.get("/__version")
 def get_version():
     """Return version information."""
-    return JSONResponse(
+    return ORJSONResponse(
         content={
             "version": os.getenv("APP_VERSION", "unknown"),
             "commit": os.getenv("GIT_COMMIT", "unknown"),
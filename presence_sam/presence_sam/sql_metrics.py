@@ -0,0 +1,137 @@
+"""Per-request SQL statement counts and database time.
+
+Engine event hooks add every statement a request runs, and the time spent in
+it, to the request's RequestMetrics (held in a context variable, which
+threadpool routes and the asyncio engine's greenlets inherit). SqlMetricsMiddleware
+reports them in a Server-Timing header:
+
+    Server-Timing: db;desc="3 statements";dur=4.2, app;dur=11.8
+
+and adds them to per-route aggregates, which /fn/__metrics returns when
+METRICS_ROUTE_ENABLED is true. SERVER_TIMING=false leaves the header out.
+Statements a streaming response runs after its headers are sent only count
+toward the aggregates.
+"""
+
+import os
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+
+SERVER_TIMING = (os.getenv("SERVER_TIMING") or "true").lower() == "true"
+METRICS_ROUTE_ENABLED = (os.getenv("METRICS_ROUTE_ENABLED") or "false").lower() == "true"
+
+
+class RequestMetrics:
+    """Statements and database seconds of one request."""
+
+    __slots__ = ("statements", "db_seconds")
+
+    def __init__(self):
+        self.statements = 0
+        self.db_seconds = 0.0
+
+
+_current = ContextVar("sql_metrics_request", default=None)
+
+
+def instrument(engine):
+    """Count the statements of a (sync) engine; pass async_engine.sync_engine for asyncio engines."""
+
+    @event.listens_for(engine, "before_cursor_execute")
+    def _before(conn, cursor, statement, parameters, context, executemany):
+        if _current.get() is not None:
+            conn.info.setdefault("sql_metrics_started", []).append(time.perf_counter())
+
+    @event.listens_for(engine, "after_cursor_execute")
+    def _after(conn, cursor, statement, parameters, context, executemany):
+        metrics = _current.get()
+        started = conn.info.get("sql_metrics_started")
+        if metrics is not None and started:
+            metrics.statements += 1
+            metrics.db_seconds += time.perf_counter() - started.pop()
+
+    @event.listens_for(engine, "handle_error")
+    def _error(exception_context):
+        conn = exception_context.connection
+        if conn is not None and conn.info.get("sql_metrics_started"):
+            conn.info["sql_metrics_started"].pop()
+
+
+class RouteStats:
+    """Aggregates of the requests served by each route."""
+
+    def __init__(self):
+        self._routes = {}  # (method, path) -> [requests, statements, max statements, db seconds, seconds]
+        self._lock = threading.Lock()
+
+    def add(self, method: str, path: str, metrics: RequestMetrics, seconds: float):
+        with self._lock:
+            stats = self._routes.setdefault((method, path), [0, 0, 0, 0.0, 0.0])
+            stats[0] += 1
+            stats[1] += metrics.statements
+            stats[2] = max(stats[2], metrics.statements)
+            stats[3] += metrics.db_seconds
+            stats[4] += seconds
+
+    def snapshot(self) -> list:
+        """Return the aggregates as dicts, busiest route first."""
+        with self._lock:
+            items = [(key, list(stats)) for key, stats in self._routes.items()]
+        routes = []
+        for (method, path), (requests, statements, max_statements, db_seconds, seconds) in items:
+            routes.append({
+                "method": method,
+                "route": path,
+                "requests": requests,
+                "statements": statements,
+                "statements_per_request": round(statements / requests, 2),
+                "max_statements": max_statements,
+                "db_ms_per_request": round(db_seconds * 1000 / requests, 2),
+                "ms_per_request": round(seconds * 1000 / requests, 2),
+            })
+        return sorted(routes, key=lambda route: route["requests"], reverse=True)
+
+    def clear(self):
+        with self._lock:
+            self._routes.clear()
+
+
+route_stats = RouteStats()
+
+
+def server_timing(metrics: RequestMetrics, seconds: float) -> str:
+    return (f'db;desc="{metrics.statements} statements";dur={metrics.db_seconds * 1000:.1f}, '
+            f'app;dur={seconds * 1000:.1f}')
+
+
+class SqlMetricsMiddleware:
+    """ASGI middleware that measures each HTTP request's SQL statements and database time."""
+
+    def __init__(self, app):
+        self.app = app
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        metrics = RequestMetrics()
+        token = _current.set(metrics)
+        started = time.perf_counter()
+
+        async def send_with_timing(message):
+            if message["type"] == "http.response.start" and SERVER_TIMING:
+                header = server_timing(metrics, time.perf_counter() - started)
+                message["headers"] = [*message.get("headers", []), (b"server-timing", header.encode())]
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_timing)
+        finally:
+            _current.reset(token)
+            route = scope.get("route")
+            path = getattr(route, "path", None) or "(unmatched)"
+            route_stats.add(scope["method"], path, metrics, time.perf_counter() - started)
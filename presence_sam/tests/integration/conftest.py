@@ -0,0 +1,28 @@
+"""
+Database tests run against the Postgres configured through
+DB_HOST/DB_USER/DB_PASSWORD (e.g. the docker compose database) and are
+skipped when it is not reachable.
+"""
+
+import pytest
+from sqlalchemy.exc import OperationalError
+
+
+@pytest.fixture()
+def engine():
+    """The app's engine, with the schema migrated; skips the test without a database."""
+    from presence_sam.database import get_engine
+
+    try:
+        return get_engine()
+    except OperationalError as e:
+        pytest.skip(f"database not reachable: {e}")
+
+
+@pytest.fixture()
+def client(engine):
+    """A TestClient for the app, backed by the test database."""
+    from fastapi.testclient import TestClient
+    from presence_sam.app import app
+
+    return TestClient(app)
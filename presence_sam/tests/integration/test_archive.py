@@ -0,0 +1,107 @@
+import base64
+import gzip
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import orjson
+import pytest
+from sqlmodel import Session, text
+
+
+def _lines(path):
+    with gzip.open(path, "rb") as f:
+        return [orjson.loads(line) for line in f]
+
+
+class TestArchive:
+
+    @pytest.fixture()
+    def old_events(self, engine):
+        place_id = f"archive-{uuid.uuid4().hex[:8]}"
+        day = datetime.now(timezone.utc).replace(hour=12, minute=0, second=0, microsecond=0) - timedelta(days=40)
+        with Session(engine) as session:
+            ids = [row[0] for row in session.exec(
+                text("""
+                    INSERT INTO events (place_id, event_type, people, pets, payload, created_at)
+                    SELECT :place_id, 'snapshotTaken', '[{"name": "ann"}]', '[]', '{}', :day + n * interval '1 minute'
+                    FROM generate_series(0, 4) n RETURNING id
+                """),
+                params={"place_id": place_id, "day": day},
+            ).all()]
+            subject_id = session.exec(text("""
+                INSERT INTO subjects (name, subject_type) VALUES ('ann', 'person')
+                ON CONFLICT (name, subject_type) DO UPDATE SET name = EXCLUDED.name RETURNING id
+            """)).one()[0]
+            session.exec(
+                text("INSERT INTO event_subjects (event_id, subject_id) SELECT id, :subject_id FROM unnest(CAST(:ids AS integer[])) id"),
+                params={"ids": ids, "subject_id": subject_id},
+            )
+            session.commit()
+        return engine, place_id, day, ids
+
+    def test_archives_and_deletes_in_batches(self, old_events, tmp_path):
+        from presence_sam.archive import archive_events, archive_key
+        from presence_sam.place_versions import place_version
+
+        engine, place_id, day, ids = old_events
+        with Session(engine) as session:
+            version = place_version(session, place_id)
+
+        archive_events(target=str(tmp_path), days=30, batch_size=2)
+
+        lines = _lines(tmp_path / archive_key(place_id, day))
+        assert [line["event_id"] for line in lines] == ids
+        assert lines[0]["people"] == [{"name": "ann"}]
+        with Session(engine) as session:
+            params = {"ids": ids}
+            assert session.exec(text("SELECT COUNT(*) FROM events WHERE id = ANY(:ids)"), params=params).one()[0] == 0
+            assert session.exec(text("SELECT COUNT(*) FROM event_subjects WHERE event_id = ANY(:ids)"), params=params).one()[0] == 0
+            assert place_version(session, place_id) > version
+
+    def test_interrupted_run_is_merged(self, old_events, tmp_path):
+        from presence_sam.archive import FileStore, _write_day, archive_events, archive_key
+
+        engine, place_id, day, ids = old_events
+        day_start = day.replace(hour=0)
+        # An earlier run wrote the file and deleted only the first event
+        _write_day(FileStore(str(tmp_path)), place_id, day_start)
+        with Session(engine) as session:
+            session.exec(text("DELETE FROM events WHERE id = :id"), params={"id": ids[0]})
+            session.commit()
+
+        archive_events(target=str(tmp_path), days=30)
+
+        assert sorted(line["event_id"] for line in _lines(tmp_path / archive_key(place_id, day))) == ids
+
+    def test_snapshots_are_exported_and_deleted_once_unreferenced(self, old_events, tmp_path):
+        from presence_sam.archive import archive_events, snapshots_key
+
+        engine, place_id, day, ids = old_events
+        only_old, shared = (uuid.uuid4().hex for _ in range(2))
+        with Session(engine) as session:
+            session.exec(
+                text("INSERT INTO snapshots (id, media_type, data) SELECT unnest(CAST(:ids AS text[])), 'image/png', '\\x89504e47'"),
+                params={"ids": [only_old, shared]},
+            )
+            session.exec(text("UPDATE events SET snapshot_id = :id WHERE id = ANY(:ids)"), params={"id": only_old, "ids": ids[:2]})
+            session.exec(text("UPDATE events SET snapshot_id = :id WHERE id = :event_id"), params={"id": shared, "event_id": ids[2]})
+            session.exec(
+                text("""
+                    INSERT INTO events (place_id, event_type, people, pets, payload, snapshot_id)
+                    VALUES (:place_id, 'snapshotTaken', '[]', '[]', '{}', :id)
+                """),
+                params={"place_id": place_id, "id": shared},
+            )
+            session.commit()
+
+        archive_events(target=str(tmp_path), days=30, batch_size=2)
+
+        lines = _lines(tmp_path / snapshots_key(place_id, day))
+        assert sorted(line["snapshot_id"] for line in lines) == sorted([only_old, shared])
+        assert {line["media_type"] for line in lines} == {"image/png"}
+        assert base64.b64decode(lines[0]["data"]) == b"\x89PNG"
+        with Session(engine) as session:
+            kept = session.exec(
+                text("SELECT id FROM snapshots WHERE id = ANY(:ids)"), params={"ids": [only_old, shared]},
+            ).all()
+        assert [row[0] for row in kept] == [shared]
@@ -0,0 +1,140 @@
+import base64
+import os
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import orjson
+from sqlmodel import Session, text
+
+
+def _snapshot():
+    return "data:image/jpeg;base64," + base64.b64encode(os.urandom(64)).decode()
+
+
+class TestEventsBatch:
+
+    def test_inserts_events_in_order_with_reserved_ids(self, engine, client):
+        place_id = f"batch-{uuid.uuid4().hex[:8]}"
+        events = [
+            {"event_type": "snapshotTaken", "people": [{"name": "ann"}], "faceCount": 1},
+            {"event_type": "motion", "pets": [{"name": "rex", "species": "dog"}]},
+            {"people": [{"name": "ann"}, {"name": "bob"}]},
+        ]
+
+        resp = client.put(f"/fn/place/{place_id}/events/batch", json={"events": events})
+
+        assert resp.status_code == 200
+        body = resp.json()
+        assert set(body) == {"status", "place_id", "event_ids"}
+        assert body["status"] == "ok" and body["place_id"] == place_id
+        ids = body["event_ids"]
+        assert len(ids) == 3 and ids == sorted(ids)
+        with Session(engine) as session:
+            rows = session.exec(
+                text("SELECT id, event_type, CAST(payload AS text) FROM events WHERE place_id = :place_id ORDER BY id"),
+                params={"place_id": place_id},
+            ).all()
+            links = session.exec(
+                text("SELECT COUNT(*) FROM event_subjects WHERE event_id = ANY(:ids)"), params={"ids": ids},
+            ).one()[0]
+        assert [(row[0], row[1]) for row in rows] == list(zip(ids, ["snapshotTaken", "motion", "unknown"]))
+        assert orjson.loads(rows[0][2]) == {"faceCount": 1}
+        assert links == 4
+
+        # The ids came from the events sequence, so later inserts continue after them
+        later = client.put(f"/fn/place/{place_id}/events", json={"event_type": "motion"}).json()["event_id"]
+        assert later > ids[-1]
+
+    def test_buffered_events_keep_their_timestamps(self, engine, client):
+        place_id = f"batch-{uuid.uuid4().hex[:8]}"
+        start = datetime.now(timezone.utc).replace(second=0, microsecond=0) - timedelta(minutes=10)
+        events = [
+            {"event_type": "snapshotTaken", "people": [{"name": "ann"}], "timestamp": (start + timedelta(minutes=m)).isoformat()}
+            for m in (0, 0, 2, 4)
+        ]
+
+        ids = client.put(f"/fn/place/{place_id}/events/batch", json={"events": events}).json()["event_ids"]
+
+        with Session(engine) as session:
+            created = session.exec(
+                text("SELECT created_at FROM events WHERE id = ANY(:ids) ORDER BY id"), params={"ids": ids},
+            ).all()
+            buckets = session.exec(
+                text("SELECT bucket, event_count FROM occupancy_minutes WHERE place_id = :place_id AND subject_id = 0 ORDER BY bucket"),
+                params={"place_id": place_id},
+            ).all()
+            changed = session.exec(
+                text("SELECT COUNT(*) FROM event_changes WHERE event_id = ANY(:ids)"), params={"ids": ids},
+            ).one()[0]
+        assert [row[0] for row in created] == [start, start, start + timedelta(minutes=2), start + timedelta(minutes=4)]
+        assert [(row[0], row[1]) for row in buckets] == [
+            (start, 2), (start + timedelta(minutes=2), 1), (start + timedelta(minutes=4), 1),
+        ]
+        assert changed == 4
+
+    def test_timestamps_are_clamped(self, engine, client):
+        from presence_sam.routes.events import MAX_BATCH_EVENT_AGE
+
+        place_id = f"batch-{uuid.uuid4().hex[:8]}"
+        now = datetime.now(timezone.utc)
+        events = [{"timestamp": (now + timedelta(hours=1)).isoformat()},
+                  {"timestamp": (now - MAX_BATCH_EVENT_AGE * 2).isoformat()},
+                  {"timestamp": "yesterday"},
+                  {"timestamp": "2024-01-01T00:00:00"}]
+
+        ids = client.put(f"/fn/place/{place_id}/events/batch", json={"events": events}).json()["event_ids"]
+
+        with Session(engine) as session:
+            created = [row[0] for row in session.exec(
+                text("SELECT created_at FROM events WHERE id = ANY(:ids) ORDER BY id"), params={"ids": ids},
+            ).all()]
+        assert created[0] - now < timedelta(minutes=1)
+        assert abs(created[1] - (now - MAX_BATCH_EVENT_AGE)) < timedelta(minutes=1)
+        assert all(abs(moment - now) < timedelta(minutes=1) for moment in created[2:])
+
+    def test_same_snapshot_is_stored_once(self, engine, client):
+        place_id = f"batch-{uuid.uuid4().hex[:8]}"
+        snapshot = _snapshot()
+        events = [{"event_type": "snapshotTaken", "snapshot": snapshot} for _ in range(3)] + [{"event_type": "motion"}]
+
+        ids = client.put(f"/fn/place/{place_id}/events/batch", json={"events": events}).json()["event_ids"]
+
+        with Session(engine) as session:
+            rows = session.exec(
+                text("SELECT snapshot_id, CAST(payload AS text) FROM events WHERE id = ANY(:ids) ORDER BY id"),
+                params={"ids": ids},
+            ).all()
+            snapshot_id = rows[0][0]
+            stored = session.exec(
+                text("SELECT COUNT(*) FROM snapshots WHERE id = :id"), params={"id": snapshot_id},
+            ).one()[0]
+        assert [row[0] for row in rows] == [snapshot_id] * 3 + [None]
+        assert all("snapshot" not in orjson.loads(row[1]) for row in rows)
+        assert stored == 1
+
+    def test_rejects_more_than_max_batch_events(self, engine, client):
+        from presence_sam.routes.events import MAX_BATCH_EVENTS
+
+        place_id = f"batch-{uuid.uuid4().hex[:8]}"
+        events = [{"event_type": "motion"}] * (MAX_BATCH_EVENTS + 1)
+
+        resp = client.put(f"/fn/place/{place_id}/events/batch", json={"events": events})
+
+        assert resp.status_code == 400
+        assert resp.json() == {"error": f"at most {MAX_BATCH_EVENTS} events per batch"}
+        with Session(engine) as session:
+            count = session.exec(
+                text("SELECT COUNT(*) FROM events WHERE place_id = :place_id"), params={"place_id": place_id},
+            ).one()[0]
+        assert count == 0
+
+    def test_accepts_max_batch_events(self, client):
+        from presence_sam.routes.events import MAX_BATCH_EVENTS
+
+        place_id = f"batch-{uuid.uuid4().hex[:8]}"
+        events = [{"event_type": "motion"}] * MAX_BATCH_EVENTS
+
+        resp = client.put(f"/fn/place/{place_id}/events/batch", json={"events": events})
+
+        assert resp.status_code == 200
+        assert len(set(resp.json()["event_ids"])) == MAX_BATCH_EVENTS
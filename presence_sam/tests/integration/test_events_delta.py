@@ -0,0 +1,42 @@
+import uuid
+
+import pytest
+from sqlmodel import Session, text
+
+
+class TestEventsDelta:
+
+    @pytest.fixture()
+    def event(self, engine, client):
+        place_id = f"delta-{uuid.uuid4().hex[:8]}"
+        with Session(engine) as session:
+            event_id = session.exec(
+                text("""
+                    INSERT INTO events (place_id, event_type, people, pets, payload, created_at)
+                    VALUES (:place_id, 'faceDetected', '[{"name": "unknown"}]', '[]', '{}', now() - interval '1 minute'),
+                           (:place_id, 'motion', '[]', '[]', '{}', now())
+                    RETURNING id
+                """),
+                params={"place_id": place_id},
+            ).all()[0][0]
+            session.commit()
+        cursor = client.get(f"/fn/place/{place_id}/events", params={"minutes": 60}).json()["cursor"]
+        return place_id, event_id, cursor
+
+    def test_nothing_new_keeps_the_cursor(self, client, event):
+        place_id, _, cursor = event
+
+        body = client.get(f"/fn/place/{place_id}/events", params={"minutes": 60, "after": cursor}).json()
+
+        assert [e["event_type"] for e in body["events"]] == ["motion"]  # within the overlap
+        assert body["cursor"] == cursor
+
+    def test_renamed_event_is_sent_again(self, client, event):
+        place_id, event_id, cursor = event
+        client.post(f"/fn/place/{place_id}/events", json={"event_id": event_id, "people": [{"name": "ann"}]})
+
+        body = client.get(f"/fn/place/{place_id}/events", params={"minutes": 60, "after": cursor}).json()
+
+        renamed = [e for e in body["events"] if e["event_id"] == event_id]
+        assert [e["people"] for e in renamed] == [[{"name": "ann"}]]
+        assert body["cursor"] != cursor
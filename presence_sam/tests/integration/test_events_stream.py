@@ -0,0 +1,26 @@
+import uuid
+
+import pytest
+
+
+class TestEventsStream:
+
+    @pytest.fixture()
+    def place_id(self, client):
+        place_id = f"stream-{uuid.uuid4().hex[:8]}"
+        client.put(f"/fn/place/{place_id}/events/batch", json={"events": [{"event_type": "motion"}] * 3})
+        return place_id
+
+    def test_streams_the_whole_window(self, client, place_id):
+        body = client.get(f"/fn/place/{place_id}/events", params={"stream": "true", "minutes": 60}).json()
+
+        assert body["total"] == 3
+        assert [event["event_type"] for event in body["events"]] == ["motion"] * 3
+        assert body["next_cursor"] is None
+
+    @pytest.mark.parametrize("param", [{"limit": 2}, {"cursor": "abc"}, {"after": "abc"}])
+    def test_paging_parameters_are_rejected(self, client, place_id, param):
+        resp = client.get(f"/fn/place/{place_id}/events", params={"stream": "true", **param})
+
+        assert resp.status_code == 400
+        assert resp.json() == {"error": "stream cannot be combined with cursor, after or limit"}
@@ -0,0 +1,29 @@
+import uuid
+
+import numpy as np
+
+
+def _descriptor(seed):
+    vector = np.random.default_rng(seed).normal(size=128)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+class TestFaceIndexRefresh:
+
+    def test_rename_in_another_container_reaches_the_index(self, client, monkeypatch):
+        from presence_sam import face_index
+
+        place_id = f"faces-{uuid.uuid4().hex[:8]}"
+        person = {"name": "unknown", "subject_id": "s1", "descriptor": _descriptor(1)}
+        event_id = client.put(f"/fn/place/{place_id}/events", json={"people": [person]}).json()["event_id"]
+
+        def match():
+            return client.post(f"/fn/place/{place_id}/match", json={"descriptors": [_descriptor(1)]}).json()
+
+        assert match()["matches"][0]["name"] is None
+
+        # The rename is handled elsewhere: this container's index is not told
+        monkeypatch.setattr(face_index, "rename", lambda *args: None)
+        client.post(f"/fn/place/{place_id}/events", json={"event_id": event_id, "people": [{**person, "name": "ann"}]})
+
+        assert match()["matches"][0]["name"] == "ann"
@@ -0,0 +1,46 @@
+from sqlalchemy import event
+from sqlmodel import Session, text
+
+
+class TestMigrations:
+
+    def test_up_to_date_schema_costs_one_statement(self, engine):
+        from presence_sam.migrations import migrate
+
+        statements = []
+
+        def record(conn, cursor, statement, parameters, context, executemany):
+            statements.append(statement)
+
+        event.listen(engine, "before_cursor_execute", record)
+        try:
+            migrate(engine)
+        finally:
+            event.remove(engine, "before_cursor_execute", record)
+
+        assert len(statements) == 1
+
+    def test_request_path_leaves_offline_migrations_pending(self, engine):
+        from presence_sam.migrations import LATEST_VERSION, _current, _target, migrate
+
+        with Session(engine) as session:
+            session.exec(text("""
+                INSERT INTO events (place_id, event_type, people, pets, payload)
+                VALUES ('migrations-test', 'test', '[]', '[]', '{}')
+            """))
+            session.exec(text("DELETE FROM schema_migrations"))
+            session.exec(text("INSERT INTO schema_migrations (version, fingerprint) VALUES (0, :target)"),
+                         params={"target": _target()})
+            session.commit()
+
+        try:
+            assert migrate(engine)
+            with Session(engine) as session:
+                assert _current(session)[0] == 0
+        finally:
+            migrate(engine, offline=True)
+
+        with Session(engine) as session:
+            assert _current(session) == (LATEST_VERSION, _target())
+            session.exec(text("DELETE FROM schema_migrations WHERE version = 0"))
+            session.commit()
@@ -0,0 +1,89 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session, text
+from sqlmodel.ext.asyncio.session import AsyncSession
+
+
+async def _rollup(event_ids):
+    from presence_sam import occupancy
+    from presence_sam.database import get_async_engine
+
+    async with AsyncSession(await get_async_engine()) as session:
+        await occupancy.rollup_events(session, event_ids)
+        await session.commit()
+
+
+class TestOccupancy:
+
+    @pytest.fixture()
+    def two_minutes(self, engine):
+        """Three events in two minutes of a new place: ann and bob, then ann alone."""
+        place_id = f"occupancy-{uuid.uuid4().hex[:8]}"
+        first = datetime.now(timezone.utc).replace(second=0, microsecond=0) - timedelta(minutes=10)
+        second = first + timedelta(minutes=5)
+        ann, bob = (f"{name}-{uuid.uuid4().hex[:8]}" for name in ("ann", "bob"))
+        events = [
+            (first + timedelta(seconds=10), [ann, bob]),
+            (first + timedelta(seconds=40), [ann]),
+            (second + timedelta(seconds=30), [ann]),
+        ]
+        with Session(engine) as session:
+            subject_ids = dict(session.exec(
+                text("""
+                    INSERT INTO subjects (name, subject_type)
+                    SELECT unnest(CAST(:names AS text[])), 'person' RETURNING name, id
+                """),
+                params={"names": [ann, bob]},
+            ).all())
+            event_ids = []
+            for created_at, names in events:
+                event_id = session.exec(
+                    text("""
+                        INSERT INTO events (place_id, event_type, people, pets, payload, created_at)
+                        VALUES (:place_id, 'snapshotTaken', '[]', '[]', '{}', :created_at) RETURNING id
+                    """),
+                    params={"place_id": place_id, "created_at": created_at},
+                ).one()[0]
+                session.exec(
+                    text("INSERT INTO event_subjects (event_id, subject_id) SELECT :event_id, unnest(CAST(:ids AS integer[]))"),
+                    params={"event_id": event_id, "ids": [subject_ids[name] for name in names]},
+                )
+                event_ids.append(event_id)
+            session.commit()
+        asyncio.run(_rollup(event_ids))
+        return place_id, first, second, subject_ids[ann], subject_ids[bob]
+
+    def test_rollup_rows_per_minute_and_subject(self, engine, two_minutes):
+        place_id, first, second, ann, bob = two_minutes
+
+        with Session(engine) as session:
+            rows = session.exec(
+                text("""
+                    SELECT bucket, subject_id, event_count, first_seen, last_seen FROM occupancy_minutes
+                    WHERE place_id = :place_id ORDER BY bucket, subject_id
+                """),
+                params={"place_id": place_id},
+            ).all()
+
+        assert [tuple(row) for row in rows] == [
+            (first, 0, 2, first + timedelta(seconds=10), first + timedelta(seconds=40)),
+            (first, ann, 2, first + timedelta(seconds=10), first + timedelta(seconds=40)),
+            (first, bob, 1, first + timedelta(seconds=10), first + timedelta(seconds=10)),
+            (second, 0, 1, second + timedelta(seconds=30), second + timedelta(seconds=30)),
+            (second, ann, 1, second + timedelta(seconds=30), second + timedelta(seconds=30)),
+        ]
+
+    def test_occupancy_route_reads_the_rollups(self, client, two_minutes):
+        place_id, first, second, _, _ = two_minutes
+
+        body = client.get(f"/fn/place/{place_id}/occupancy", params={"minutes": 30}).json()
+
+        assert body["total_events"] == 3
+        assert body["subjects"] == 2
+        assert [(datetime.fromisoformat(point["bucket"]), point["events"], point["subjects"]) for point in body["series"]] == [
+            (first, 2, 2),
+            (second, 1, 1),
+        ]
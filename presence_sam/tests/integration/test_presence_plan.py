@@ -0,0 +1,60 @@
+import json
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from sqlmodel import Session, text
+
+
+def _plan_nodes(node):
+    yield node
+    for child in node.get("Plans", []):
+        yield from _plan_nodes(child)
+
+
+class TestPresencePlan:
+
+    since = datetime.now(timezone.utc) - timedelta(minutes=60)
+
+    @pytest.fixture()
+    def plan(self, engine):
+        from presence_sam.routes.place import PRESENCE_SQL
+
+        with Session(engine) as session:
+            row = session.exec(
+                text("EXPLAIN (FORMAT JSON) " + PRESENCE_SQL),
+                params={"place_id": "brave-sunny-beach", "since": self.since, "after": None},
+            ).one()
+        plan = row[0] if not isinstance(row[0], str) else json.loads(row[0])
+        return list(_plan_nodes(plan[0]["Plan"]))
+
+    def test_no_correlated_subplans(self, plan):
+        assert not [node for node in plan if node.get("Parent Relationship") == "SubPlan"]
+
+    def test_event_subjects_scanned_once(self, plan):
+        scans = [node for node in plan if node.get("Relation Name") == "event_subjects"]
+
+        assert len(scans) == 1
+
+    def test_only_partitions_in_the_window_are_scanned(self, plan):
+        from presence_sam.partitions import month_start, partition_name
+
+        scanned = {node["Relation Name"] for node in plan if node.get("Relation Name", "").startswith("events_")}
+        oldest = partition_name(month_start(self.since))
+
+        assert scanned
+        assert all(name == "events_default" or name >= oldest for name in scanned)
+
+
+class TestPresenceRoute:
+
+    def test_unidentified_entry_comes_last_without_subject_id(self, client):
+        place_id = f"presence-{uuid.uuid4().hex[:8]}"
+        client.put(f"/fn/place/{place_id}/events", json={"people": [{"name": "unknown"}]})
+        client.put(f"/fn/place/{place_id}/events", json={"people": [{"name": "ann"}]})
+
+        presence = client.get(f"/fn/place/{place_id}/presence").json()["presence"]
+
+        assert [entry["label"] for entry in presence] == ["ann", "Unidentified"]
+        assert "subject_id" in presence[0]
+        assert "subject_id" not in presence[1]
@@ -0,0 +1,50 @@
+import base64
+import os
+import uuid
+
+from sqlmodel import Session, text
+
+
+def _data_url(media_type, data):
+    return f"data:{media_type};base64," + base64.b64encode(data).decode()
+
+
+class TestSnapshots:
+
+    def test_image_is_stored_and_served_with_its_type(self, client):
+        place_id = f"snapshots-{uuid.uuid4().hex[:8]}"
+        data = os.urandom(64)
+
+        client.put(f"/fn/place/{place_id}/events", json={"snapshot": _data_url("image/png", data)})
+        [event] = client.get(f"/fn/place/{place_id}/events").json()["events"]
+        resp = client.get(f"/fn/snapshot/{event['snapshot_id']}")
+
+        assert resp.status_code == 200
+        assert resp.headers["content-type"] == "image/png"
+        assert resp.headers["x-content-type-options"] == "nosniff"
+        assert resp.content == data
+
+    def test_other_types_stay_inline(self, client):
+        place_id = f"snapshots-{uuid.uuid4().hex[:8]}"
+        snapshot = _data_url("text/html", b"<script>alert(1)</script>")
+
+        client.put(f"/fn/place/{place_id}/events", json={"snapshot": snapshot})
+        [event] = client.get(f"/fn/place/{place_id}/events").json()["events"]
+
+        assert event["snapshot_id"] is None
+        assert event["payload"]["snapshot"] == snapshot
+
+    def test_stored_type_outside_the_allow_list_is_served_as_a_download(self, engine, client):
+        snapshot_id = uuid.uuid4().hex
+        with Session(engine) as session:
+            session.exec(
+                text("INSERT INTO snapshots (id, media_type, data) VALUES (:id, 'text/html', :data)"),
+                params={"id": snapshot_id, "data": b"<script>alert(1)</script>"},
+            )
+            session.commit()
+
+        resp = client.get(f"/fn/snapshot/{snapshot_id}")
+
+        assert resp.headers["content-type"] == "application/octet-stream"
+        assert resp.headers["content-disposition"] == "attachment"
+        assert resp.headers["x-content-type-options"] == "nosniff"
@@ -0,0 +1,103 @@
+import base64
+import os
+import re
+import threading
+import time
+import uuid
+
+import pytest
+from sqlmodel import Session, text
+
+_STATEMENTS = re.compile(r'db;desc="(\d+) statements"')
+
+
+def _statements(resp):
+    """SQL statements the request ran, from its Server-Timing header (see sql_metrics)."""
+    return int(_STATEMENTS.search(resp.headers["server-timing"]).group(1))
+
+
+def _snapshot():
+    return "data:image/jpeg;base64," + base64.b64encode(os.urandom(64)).decode()
+
+
+def _people(count):
+    """People with names never seen before, so every one is a new subject."""
+    return [{"name": f"person-{uuid.uuid4().hex[:8]}"} for _ in range(count)]
+
+
+class TestStatementCounts:
+
+    @pytest.fixture()
+    def place_id(self, client):
+        place_id = f"statements-{uuid.uuid4().hex[:8]}"
+        # Warm up: the first request of a process also creates partitions and connections
+        client.put(f"/fn/place/{place_id}/events", json={"event_type": "motion"})
+        return place_id
+
+    def test_put_is_independent_of_subjects(self, client, place_id):
+        counts = [
+            _statements(client.put(f"/fn/place/{place_id}/events", json={
+                "people": _people(count), "pets": [{"species": "dog"}], "snapshot": _snapshot(),
+            }))
+            for count in (1, 8)
+        ]
+
+        assert counts[0] == counts[1] <= 7
+
+    def test_batch_is_independent_of_events_and_subjects(self, client, place_id):
+        counts = [
+            _statements(client.put(f"/fn/place/{place_id}/events/batch", json={"events": [
+                {"people": _people(count), "snapshot": _snapshot()} for _ in range(count)
+            ]}))
+            for count in (1, 8)
+        ]
+
+        assert counts[0] == counts[1] <= 7
+
+    def test_update_is_independent_of_subjects(self, client, place_id):
+        counts = []
+        for count in (1, 8):
+            event_id = client.put(f"/fn/place/{place_id}/events", json={"people": _people(count)}).json()["event_id"]
+            counts.append(_statements(client.post(f"/fn/place/{place_id}/events", json={
+                "event_id": event_id, "people": _people(count),
+            })))
+
+        assert counts[0] == counts[1] <= 8
+
+    def test_subject_inserted_concurrently_is_linked(self, engine, client, place_id):
+        name = f"person-{uuid.uuid4().hex[:8]}"
+        baseline = _statements(client.put(f"/fn/place/{place_id}/events", json={"people": _people(1)}))
+        responses = []
+
+        with Session(engine) as other:
+            # Another transaction inserts the subject first and commits while the
+            # request's INSERT ... ON CONFLICT waits on it, so neither branch of
+            # the request's upsert sees the row and the fallback SELECT has to
+            subject_id = other.exec(
+                text("INSERT INTO subjects (name, subject_type) VALUES (:name, 'person') RETURNING id"),
+                params={"name": name},
+            ).one()[0]
+            request = threading.Thread(target=lambda: responses.append(
+                client.put(f"/fn/place/{place_id}/events", json={"people": [{"name": name}]})))
+            request.start()
+            for _ in range(100):
+                other.exec(text("SELECT pg_stat_clear_snapshot()"))  # activity is otherwise frozen per transaction
+                waiting = other.exec(text("""
+                    SELECT COUNT(*) FROM pg_stat_activity
+                    WHERE wait_event_type = 'Lock' AND query LIKE '%INSERT INTO subjects%'
+                """)).one()[0]
+                if waiting:
+                    break
+                time.sleep(0.05)
+            other.commit()
+        request.join(10)
+
+        resp = responses[0]
+        assert resp.status_code == 200
+        assert _statements(resp) == baseline + 1
+        with Session(engine) as session:
+            linked = session.exec(
+                text("SELECT subject_id FROM event_subjects WHERE event_id = :event_id"),
+                params={"event_id": resp.json()["event_id"]},
+            ).all()
+        assert [row[0] for row in linked] == [subject_id]
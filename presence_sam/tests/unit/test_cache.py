@@ -0,0 +1,56 @@
+from unittest.mock import patch
+
+from presence_sam.cache import ResponseCache
+
+
+class TestResponseCache:
+    def test_returns_stored_response(self):
+        cache = ResponseCache(ttl=10, max_entries=4)
+        cache.put(("p1", "presence", 60, None), '"v1"', b"{}", cache.generation("p1"))
+
+        assert cache.get(("p1", "presence", 60, None)) == ('"v1"', b"{}")
+        assert cache.get(("p1", "presence", 30, None)) is None
+
+    def test_entries_expire(self):
+        cache = ResponseCache(ttl=10, max_entries=4)
+        with patch("presence_sam.cache.time.monotonic", return_value=100.0):
+            cache.put(("p1", "events"), '"v1"', b"[]", 0)
+        with patch("presence_sam.cache.time.monotonic", return_value=110.0):
+            assert cache.get(("p1", "events")) is None
+
+    def test_least_recently_used_is_evicted(self):
+        cache = ResponseCache(ttl=10, max_entries=2)
+        cache.put(("p1",), "a", b"1", 0)
+        cache.put(("p2",), "b", b"2", 0)
+        cache.get(("p1",))
+        cache.put(("p3",), "c", b"3", 0)
+
+        assert cache.get(("p2",)) is None
+        assert cache.get(("p1",)) == ("a", b"1")
+        assert cache.get(("p3",)) == ("c", b"3")
+
+    def test_invalidate_drops_only_that_place(self):
+        cache = ResponseCache(ttl=10, max_entries=4)
+        cache.put(("p1", "presence"), "a", b"1", 0)
+        cache.put(("p1", "events"), "b", b"2", 0)
+        cache.put(("p2", "presence"), "c", b"3", 0)
+
+        cache.invalidate("p1")
+
+        assert cache.get(("p1", "presence")) is None
+        assert cache.get(("p1", "events")) is None
+        assert cache.get(("p2", "presence")) == ("c", b"3")
+
+    def test_response_read_before_a_write_is_not_stored(self):
+        cache = ResponseCache(ttl=10, max_entries=4)
+        generation = cache.generation("p1")
+        cache.invalidate("p1")
+        cache.put(("p1", "presence"), "a", b"stale", generation)
+
+        assert cache.get(("p1", "presence")) is None
+
+    def test_zero_ttl_disables_the_cache(self):
+        cache = ResponseCache(ttl=0, max_entries=4)
+        cache.put(("p1",), "a", b"1", 0)
+
+        assert cache.get(("p1",)) is None
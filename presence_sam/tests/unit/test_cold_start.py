@@ -0,0 +1,74 @@
+import json
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+"""
+Cold start benchmark: a fresh interpreter imports the Lambda handler and
+serves GET /fn/__version through Mangum, as API Gateway would invoke it.
+Set COLD_START_BUDGET_MS to tighten or relax the budget on slower machines.
+"""
+
+BUDGET_MS = float(os.getenv("COLD_START_BUDGET_MS", "1500"))
+RUNS = 3
+
+SCRIPT = r"""
+import json, sys, time
+
+start = time.perf_counter()
+from presence_sam.app import handler
+imported = time.perf_counter()
+
+event = {
+    "version": "2.0",
+    "routeKey": "ANY /{proxy+}",
+    "rawPath": "/fn/__version",
+    "rawQueryString": "",
+    "headers": {"host": "localhost"},
+    "requestContext": {
+        "http": {"method": "GET", "path": "/fn/__version", "protocol": "HTTP/1.1", "sourceIp": "127.0.0.1", "userAgent": "test"},
+        "stage": "$default",
+    },
+    "isBase64Encoded": False,
+}
+response = handler(event, None)
+served = time.perf_counter()
+
+print(json.dumps({
+    "import_ms": (imported - start) * 1000,
+    "total_ms": (served - start) * 1000,
+    "status": response["statusCode"],
+    "loaded": [name for name in ("boto3", "numpy", "psycopg", "psycopg2") if name in sys.modules],
+}))
+"""
+
+
+def _cold_start():
+    env = dict(os.environ, PYTHONDONTWRITEBYTECODE="1")
+    env.pop("DB_IAM_AUTH", None)
+    output = subprocess.run(
+        [sys.executable, "-c", SCRIPT],
+        cwd=Path(__file__).parents[2],
+        env=env,
+        capture_output=True,
+        text=True,
+        check=True,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+class TestColdStart:
+    def test_version_route_does_not_load_database_or_aws_dependencies(self):
+        result = _cold_start()
+
+        assert result["status"] == 200
+        assert result["loaded"] == []
+
+    def test_cold_start_within_budget(self):
+        # Best of a few runs, so a busy machine does not fail the budget by chance
+        results = [_cold_start() for _ in range(RUNS)]
+        best = min(results, key=lambda r: r["total_ms"])
+        print(f"cold start: import {best['import_ms']:.0f} ms, first request {best['total_ms']:.0f} ms")
+
+        assert best["total_ms"] <= BUDGET_MS, f"cold start took {best['total_ms']:.0f} ms, budget {BUDGET_MS:.0f} ms"
@@ -0,0 +1,103 @@
+import threading
+
+import pytest
+from sqlalchemy.pool import AsyncAdaptedQueuePool, NullPool, QueuePool
+
+from presence_sam import database
+from presence_sam.database import ConnectionProbe, IamAuthToken, _pool_args
+
+
+class FakeRdsClient:
+    def __init__(self):
+        self.calls = 0
+
+    def generate_db_auth_token(self, **kwargs):
+        self.calls += 1
+        return f"token-{self.calls}"
+
+
+class TestIamAuthToken:
+    def test_token_is_cached_until_ttl(self, monkeypatch):
+        clock = [1000.0]
+        monkeypatch.setattr(database.time, "monotonic", lambda: clock[0])
+        token = IamAuthToken(ttl=600)
+        token._client = FakeRdsClient()
+
+        assert token.get() == "token-1"
+        clock[0] += 599
+        assert token.get() == "token-1"
+        clock[0] += 1
+        assert token.get() == "token-2"
+
+
+class TestPoolArgs:
+    def test_single_keeps_one_pinged_connection(self):
+        args = _pool_args("single")
+
+        assert args["poolclass"] is QueuePool
+        assert args["pool_size"] == 1
+        assert args["max_overflow"] == 1
+        assert args["pool_pre_ping"] is True
+
+    def test_single_async_engine_keeps_one_pinged_connection(self):
+        args = _pool_args("single", async_engine=True)
+
+        assert args["poolclass"] is AsyncAdaptedQueuePool
+        assert args["pool_size"] == 1
+        assert args["max_overflow"] == 0
+        assert args["pool_pre_ping"] is True
+
+    def test_null_pool(self):
+        assert _pool_args("null") == {"poolclass": NullPool}
+
+    def test_queue_is_bounded(self):
+        args = _pool_args("queue")
+
+        assert args["pool_size"] == database.DB_POOL_SIZE
+        assert args["max_overflow"] == 0
+
+    def test_async_engine_uses_async_queue_pool(self):
+        assert _pool_args("queue", async_engine=True)["poolclass"] is AsyncAdaptedQueuePool
+
+    def test_unknown_mode_is_rejected(self):
+        with pytest.raises(ValueError):
+            _pool_args("huge")
+
+
+class CountingProbe(ConnectionProbe):
+    def __init__(self, release=None, **kwargs):
+        super().__init__(**kwargs)
+        self.calls = 0
+        self.release = release
+
+    def _probe(self):
+        self.calls += 1
+        if self.release is not None:
+            self.release.wait(5)
+        return "OK", 1.5
+
+
+class TestConnectionProbe:
+    def test_result_is_reused_until_ttl(self):
+        probe = CountingProbe(ttl=5, timeout=1)
+
+        assert probe.get() == ("OK", 1.5)
+        assert probe.get() == ("OK", 1.5)
+        assert probe.calls == 1
+
+        probe._expires_at = 0.0
+        probe.get()
+        assert probe.calls == 2
+
+    def test_slow_probe_times_out_and_is_not_repeated(self):
+        release = threading.Event()
+        probe = CountingProbe(release=release, ttl=5, timeout=0.05)
+
+        assert probe.get() == ("timed out after 0.05s", None)
+        assert probe.get() == ("timed out after 0.05s", None)
+        assert probe.calls == 1
+
+        release.set()
+        probe.timeout = 1
+        assert probe.get() == ("OK", 1.5)
+        assert probe.calls == 1
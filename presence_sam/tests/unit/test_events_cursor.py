@@ -0,0 +1,22 @@
+from datetime import datetime, timezone
+
+import pytest
+
+from presence_sam.routes.events import _decode_cursor, _encode_cursor
+
+
+class TestEventsCursor:
+    def test_round_trip(self):
+        created_at = datetime(2026, 10, 18, 12, 30, 5, 123456, tzinfo=timezone.utc)
+
+        assert _decode_cursor(_encode_cursor(created_at, 42)) == (created_at, 42)
+
+    def test_cursor_is_url_safe(self):
+        cursor = _encode_cursor(datetime(2026, 1, 1, tzinfo=timezone.utc), 7)
+
+        assert cursor.replace("-", "").replace("_", "").isalnum()
+
+    @pytest.mark.parametrize("cursor", ["zzz", "!!", "bm90LWEtY3Vyc29y"])
+    def test_malformed_cursor_raises_value_error(self, cursor):
+        with pytest.raises(ValueError):
+            _decode_cursor(cursor)
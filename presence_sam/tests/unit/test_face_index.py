@@ -0,0 +1,103 @@
+from datetime import datetime, timedelta, timezone
+
+import numpy as np
+
+from presence_sam import face_index
+from presence_sam.face_index import DESCRIPTOR_SIZE, FaceIndex
+
+T0 = datetime(2026, 10, 1, 12, 0, tzinfo=timezone.utc)
+
+
+def _descriptor(seed):
+    """Build a deterministic unit-length descriptor."""
+    vector = np.random.default_rng(seed).normal(size=DESCRIPTOR_SIZE)
+    return (vector / np.linalg.norm(vector)).tolist()
+
+
+def _person(seed, name="unknown", subject_id=None):
+    return {"name": name, "subject_id": subject_id or f"subject-{seed}", "descriptor": _descriptor(seed)}
+
+
+class TestFaceIndex:
+    def test_empty_index_matches_nothing(self):
+        index = FaceIndex("brave-sunny-beach")
+
+        assert index.match([_descriptor(1), _descriptor(2)]) == [None, None]
+
+    def test_matches_nearest_subject_for_each_query(self):
+        index = FaceIndex("brave-sunny-beach")
+        index.add_events([(1, T0, [_person(1, "ann"), _person(2, "bob")]), (2, T0, [_person(3)])])
+
+        matches = index.match([_descriptor(2), _descriptor(1), _descriptor(3)])
+
+        assert [m["name"] for m in matches] == ["bob", "ann", None]
+        assert [m["subject_id"] for m in matches] == ["subject-2", "subject-1", "subject-3"]
+        assert all(m["distance"] < 1e-3 for m in matches)
+
+    def test_distant_query_returns_none(self):
+        index = FaceIndex("brave-sunny-beach")
+        index.add_events([(1, T0, [_person(1, "ann")])])
+
+        assert index.match([_descriptor(99)]) == [None]
+
+    def test_skips_people_without_valid_descriptor(self):
+        index = FaceIndex("brave-sunny-beach")
+        index.add_events([(7, T0, [{"name": "ann"}, {"name": "bob", "descriptor": [0.1, 0.2]}])])
+
+        assert len(index) == 0
+        assert index.watermark == T0
+
+    def test_rename_relabels_people_of_an_event(self):
+        index = FaceIndex("brave-sunny-beach")
+        index.add_events([(1, T0, [_person(1), _person(2)])])
+
+        index.rename(1, ["unknown", "bob"])
+
+        assert [m["name"] for m in index.match([_descriptor(1), _descriptor(2)])] == [None, "bob"]
+
+    def test_changed_events_are_relabelled_or_added(self):
+        index = FaceIndex("brave-sunny-beach")
+        index.add_events([(1, T0, [_person(1), _person(2)])])
+
+        index.update_events([
+            (1, T0, [{"name": "ann"}, {"name": "bob"}]),
+            (2, T0 - timedelta(minutes=5), [_person(3, "cid")]),
+        ])
+        index.update_events([(2, T0 - timedelta(minutes=5), [{"name": "cid"}])])
+
+        assert len(index) == 3
+        assert [m["name"] for m in index.match([_descriptor(1), _descriptor(2), _descriptor(3)])] == ["ann", "bob", "cid"]
+        assert index.watermark == T0
+
+    def test_overlapping_events_are_indexed_once(self):
+        index = FaceIndex("brave-sunny-beach")
+        index.add_events([(1, T0, [_person(1)]), (2, T0 + timedelta(seconds=1), [_person(2)])])
+
+        index.add_events([(2, T0 + timedelta(seconds=1), [_person(2)]), (3, T0, [_person(3)])])
+
+        assert len(index) == 3
+        assert index.watermark == T0 + timedelta(seconds=1)
+
+    def test_ring_buffer_keeps_newest_descriptors(self):
+        index = FaceIndex("brave-sunny-beach", max_descriptors=3)
+        for event_id in range(1, 6):
+            index.add_events([(event_id, T0 + timedelta(seconds=event_id), [_person(event_id)])])
+
+        assert len(index) == 3
+        assert index.match([_descriptor(1), _descriptor(2)]) == [None, None]
+        assert [m["event_id"] for m in index.match([_descriptor(3), _descriptor(4), _descriptor(5)])] == [3, 4, 5]
+        assert index.nbytes < 3 * (DESCRIPTOR_SIZE * 4 + 4 + face_index._ROW_BYTES) + 1
+
+
+class TestIndexBudget:
+    def test_evicts_least_recently_used_indexes_over_budget(self, monkeypatch):
+        monkeypatch.setattr(face_index, "_indexes", face_index.OrderedDict())
+        for n, place_id in enumerate(("place-a", "place-b", "place-c")):
+            index = face_index._indexes[place_id] = FaceIndex(place_id)
+            index.add_events([(n, T0, [_person(n)])])
+        monkeypatch.setattr(face_index, "MAX_BYTES", 2 * face_index._indexes["place-a"].nbytes)
+        face_index._indexes.move_to_end("place-a")
+
+        face_index._evict(keep="place-a")
+
+        assert list(face_index._indexes) == ["place-c", "place-a"]
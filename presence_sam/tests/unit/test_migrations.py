@@ -0,0 +1,22 @@
+from sqlalchemy import Column, Integer, MetaData, String, Table
+
+from presence_sam.migrations import MIGRATIONS, fingerprint
+
+
+def _metadata(*extra_columns):
+    metadata = MetaData()
+    Table("places", metadata, Column("id", Integer, primary_key=True), Column("name", String), *extra_columns)
+    return metadata
+
+
+class TestMigrations:
+    def test_versions_are_strictly_increasing(self):
+        versions = [version for version, _, _, _ in MIGRATIONS]
+
+        assert versions == sorted(set(versions))
+
+    def test_fingerprint_is_stable(self):
+        assert fingerprint(_metadata()) == fingerprint(_metadata())
+
+    def test_fingerprint_changes_with_the_models(self):
+        assert fingerprint(_metadata()) != fingerprint(_metadata(Column("owner", String)))
@@ -0,0 +1,19 @@
+from datetime import datetime, timedelta, timezone
+
+from presence_sam.partitions import add_months, month_start, partition_name
+
+
+class TestPartitions:
+    def test_month_start_is_utc(self):
+        moment = datetime(2026, 11, 1, 0, 30, tzinfo=timezone(timedelta(hours=2)))
+
+        assert month_start(moment) == datetime(2026, 10, 1, tzinfo=timezone.utc)
+
+    def test_add_months_crosses_years(self):
+        december = datetime(2026, 12, 1, tzinfo=timezone.utc)
+
+        assert add_months(december, 1) == datetime(2027, 1, 1, tzinfo=timezone.utc)
+        assert add_months(december, -12) == datetime(2025, 12, 1, tzinfo=timezone.utc)
+
+    def test_partition_names_sort_by_month(self):
+        assert partition_name(datetime(2026, 9, 1)) < partition_name(datetime(2026, 10, 1))
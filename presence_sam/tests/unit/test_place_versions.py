@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+
+from starlette.requests import Request
+
+from presence_sam.place_versions import make_etag, not_modified
+
+
+def _request(if_none_match=None):
+    headers = [(b"if-none-match", if_none_match.encode())] if if_none_match else []
+    return Request({"type": "http", "method": "GET", "path": "/", "headers": headers})
+
+
+class TestPlaceVersions:
+    def test_etag_changes_with_version(self):
+        assert make_etag("brave-sunny-beach", 1) != make_etag("brave-sunny-beach", 2)
+
+    def test_etag_is_stable_within_a_minute(self):
+        t1 = datetime(2026, 10, 18, 12, 30, 5, tzinfo=timezone.utc)
+        t2 = datetime(2026, 10, 18, 12, 30, 55, tzinfo=timezone.utc)
+        t3 = datetime(2026, 10, 18, 12, 31, 0, tzinfo=timezone.utc)
+
+        assert make_etag("p", 1, t1) == make_etag("p", 1, t2)
+        assert make_etag("p", 1, t1) != make_etag("p", 1, t3)
+
+    def test_not_modified_when_client_holds_etag(self):
+        etag = make_etag("p", 3)
+
+        response = not_modified(_request(f'"other", {etag}'), etag)
+
+        assert response.status_code == 304
+        assert response.headers["etag"] == etag
+
+    def test_modified_without_matching_etag(self):
+        etag = make_etag("p", 3)
+
+        assert not_modified(_request(), etag) is None
+        assert not_modified(_request(make_etag("p", 2)), etag) is None
@@ -0,0 +1,31 @@
+import json
+from datetime import datetime, timezone
+
+from presence_sam.responses import ORJSONResponse, dumps, raw_json
+from presence_sam.routes.events import _event_dict
+
+
+class TestResponses:
+    def test_raw_json_is_embedded_without_reencoding(self):
+        response = ORJSONResponse(content={"people": raw_json('[{"name": "ann"}]')})
+
+        assert response.body == b'{"people":[{"name": "ann"}]}'
+
+    def test_dumps_returns_text(self):
+        assert json.loads(dumps({"name": "é", "count": 1})) == {"name": "é", "count": 1}
+
+    def test_event_rows_encode_like_decoded_columns(self):
+        created_at = datetime(2026, 10, 18, 12, 0, tzinfo=timezone.utc)
+        row = (7, "snapshotTaken", '[{"name": "ann"}]', "[]", '{"faceCount": 1}', created_at, None)
+
+        body = json.loads(ORJSONResponse(content=_event_dict(row)).body)
+
+        assert body == {
+            "event_id": 7,
+            "event_type": "snapshotTaken",
+            "people": [{"name": "ann"}],
+            "pets": [],
+            "payload": {"faceCount": 1},
+            "created_at": created_at.isoformat(),
+            "snapshot_id": None,
+        }
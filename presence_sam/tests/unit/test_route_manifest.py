@@ -0,0 +1,14 @@
+from presence_sam.route_manifest import MANIFEST_PATH, discover_route_modules, render
+
+
+class TestRouteManifest:
+    def test_manifest_is_up_to_date(self):
+        # Regenerate with: python3 -m presence_sam.route_manifest
+        assert MANIFEST_PATH.read_text() == render(discover_route_modules())
+
+    def test_modules_without_router_are_skipped(self):
+        modules = discover_route_modules()
+
+        assert "presence_sam.routes.events" in modules
+        assert "presence_sam.routes.huid" not in modules
+
@@ -0,0 +1,69 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, text
+
+from presence_sam.sql_metrics import RequestMetrics, RouteStats, SqlMetricsMiddleware, instrument, route_stats
+
+
+def _app():
+    engine = create_engine("sqlite://")
+    instrument(engine)
+    app = FastAPI()
+    app.add_middleware(SqlMetricsMiddleware)
+
+    @app.get("/items/{item_id}")
+    def get_item(item_id: int):
+        with engine.connect() as conn:
+            for _ in range(item_id):
+                conn.execute(text("SELECT 1"))
+        return {"item_id": item_id}
+
+    return app
+
+
+class TestSqlMetrics:
+    def setup_method(self):
+        route_stats.clear()
+
+    def test_server_timing_counts_request_statements(self):
+        client = TestClient(_app())
+
+        response = client.get("/items/3")
+
+        assert response.headers["server-timing"].startswith('db;desc="3 statements";dur=')
+        assert "app;dur=" in response.headers["server-timing"]
+
+    def test_routes_are_aggregated_by_template(self):
+        client = TestClient(_app())
+        client.get("/items/1")
+        client.get("/items/4")
+        client.get("/missing")
+
+        routes = {(r["method"], r["route"]): r for r in route_stats.snapshot()}
+
+        item = routes[("GET", "/items/{item_id}")]
+        assert item["requests"] == 2
+        assert item["statements"] == 5
+        assert item["max_statements"] == 4
+        assert routes[("GET", "(unmatched)")]["statements"] == 0
+
+    def test_statements_outside_requests_are_not_counted(self):
+        engine = create_engine("sqlite://")
+        instrument(engine)
+        with engine.connect() as conn:
+            conn.execute(text("SELECT 1"))
+
+        assert route_stats.snapshot() == []
+
+    def test_route_stats_per_request_averages(self):
+        stats = RouteStats()
+        metrics = RequestMetrics()
+        metrics.statements, metrics.db_seconds = 4, 0.002
+        stats.add("PUT", "/fn/place/{place_id}/events", metrics, 0.010)
+        stats.add("PUT", "/fn/place/{place_id}/events", RequestMetrics(), 0.002)
+
+        [route] = stats.snapshot()
+
+        assert route["statements_per_request"] == 2.0
+        assert route["db_ms_per_request"] == 1.0
+        assert route["ms_per_request"] == 6.0
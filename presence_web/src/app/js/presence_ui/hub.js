@@ -62,29 +62,67 @@
         }
     }
 
+    // Events in the current window, keyed by event_id; polls only fetch what is new
+    let knownEvents = new Map();
+    let eventsCursor = null;
+    let eventsMinutes = null;
+
     async function fetchEvents() {
         try {
             const minutes = getMinutes();
-            const res = await fetch(`/fn/place/${encodeURIComponent(placeId)}/events?minutes=${minutes}`);
+            if (minutes !== eventsMinutes) {
+                knownEvents = new Map();
+                eventsCursor = null;
+                eventsMinutes = minutes;
+            }
+            let url = `/fn/place/${encodeURIComponent(placeId)}/events?minutes=${minutes}`;
+            if (eventsCursor) url += `&after=${encodeURIComponent(eventsCursor)}`;
+            const res = await fetch(url);
             if (!res.ok) {
                 window.handleError(`Failed to fetch events: ${res.status}`);
                 return;
             }
             const data = await res.json();
-            const events = data.events || [];
-            const total = data.total != null ? data.total : events.length;
-            renderMetrics(events, total);
+            if (minutes !== eventsMinutes) return; // window changed while fetching
+
+            for (const ev of data.events || []) {
+                knownEvents.set(ev.event_id, ev);
+            }
+            eventsCursor = data.cursor || eventsCursor;
+
+            // Drop events that slid out of the time window
+            const windowStart = Date.now() - minutes * 60000;
+            for (const [id, ev] of knownEvents) {
+                if (new Date(ev.created_at).getTime() < windowStart) knownEvents.delete(id);
+            }
+            const events = [...knownEvents.values()].sort((a, b) =>
+                a.created_at.localeCompare(b.created_at) || a.event_id - b.event_id);
             renderStream(events);
         } catch (err) {
             window.handleError('Failed to fetch events:', err);
         }
     }
 
+    async function fetchOccupancy() {
+        try {
+            const minutes = getMinutes();
+            const res = await fetch(`/fn/place/${encodeURIComponent(placeId)}/occupancy?minutes=${minutes}`);
+            if (!res.ok) {
+                window.handleError(`Failed to fetch occupancy: ${res.status}`);
+                return;
+            }
+            renderMetrics(await res.json());
+        } catch (err) {
+            window.handleError('Failed to fetch occupancy:', err);
+        }
+    }
+
     let lastRefreshTs = 0;
 
     function fetchAll() {
         fetchPresence();
         fetchEvents();
+        fetchOccupancy();
         lastRefreshTs = Date.now();
     }
 
@@ -95,10 +133,11 @@
         refreshStatusEl.textContent = `Last refresh: ${elapsed}s ago · Next in ${remaining}s`;
     }
 
-    function renderMetrics(events, total) {
+    function renderMetrics(occupancy) {
+        const total = occupancy.total_events || 0;
         metricTotal.textContent = total;
 
-        const minutes = getMinutes();
+        const minutes = occupancy.minutes || 0;
         if (total > 0 && minutes > 0) {
             const avg = total / minutes;
             metricPerMin.textContent = avg >= 1 ? avg.toFixed(1) : avg.toFixed(2);
@@ -106,17 +145,7 @@
             metricPerMin.textContent = '0';
         }
 
-        const presenceTypes = new Set();
-        for (const ev of events) {
-            for (const person of (ev.people || [])) {
-                const name = person.name && person.name !== 'unknown' ? person.name : 'Person';
-                presenceTypes.add('person:' + name);
-            }
-            for (const pet of (ev.pets || [])) {
-                presenceTypes.add('pet:' + (pet.species || pet.name || 'pet'));
-            }
-        }
-        metricPresences.textContent = presenceTypes.size;
+        metricPresences.textContent = occupancy.subjects || 0;
     }
 
     function renderPresence(presence) {
@@ -148,7 +177,10 @@
         eventStream.innerHTML = sorted.map(ev => {
             const payload = ev.payload || {};
             const type = ev.event_type || 'unknown';
-            const snapshot = payload.snapshot || null;
+            // Snapshots live in the snapshot store; older events still carry them inline
+            const snapshot = ev.snapshot_id
+                ? `/fn/snapshot/${encodeURIComponent(ev.snapshot_id)}`
+                : payload.snapshot || null;
 
             // Image on top
             const faceCount = payload.faceCount || 0;
@@ -37,6 +37,8 @@ envsubst '$GOOGLE_CLIENT_ID' < $WEB_DIR/src/app/app.html > $WEB_DIR/target/app/a
 # Build SAM application
 echo "📦 Building SAM application..."
 pushd "$DIR/presence_sam"
+# Regenerate the route manifest so the function skips route discovery on cold start
+python3 -m presence_sam.route_manifest
 TEMPLATE_PATH="$DIR/presence_sam/template.yaml"
 if command -v sam >/dev/null 2>&1; then
   sam build --parameter-overrides "LambdaArchitecture=x86_64" --template "$TEMPLATE_PATH"
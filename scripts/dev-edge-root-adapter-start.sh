@@ -4,13 +4,21 @@ SCRIPT_DIR="$(cd "$(dirname "${BASH_SOURCE[0]}")" && pwd)"
 DIR="$(dirname "$SCRIPT_DIR")"
 echo "script [$0] started"
 #
+# EDGE_ADAPTER_MODE=inprocess runs the handler inside the adapter instead of
+# invoking sam local start-lambda (no container start per request)
+EDGE_ADAPTER_MODE="${EDGE_ADAPTER_MODE:-lambda}"
 
 echo "📦 Installing adapter dependencies..."
 VENV_DIR="$DIR/.venv"
 if [ ! -d "$VENV_DIR" ]; then
     python3 -m venv "$VENV_DIR"
 fi
-"$VENV_DIR/bin/pip" install -q boto3
+"$VENV_DIR/bin/pip" install -q -r "$DIR/presence_edge_adapter/requirements.txt"
+
+if [ "$EDGE_ADAPTER_MODE" = "inprocess" ]; then
+    echo "🔌 Starting Lambda@Edge Root adapter on port 17669 (in process)..."
+    exec "$VENV_DIR/bin/python3" "$DIR/presence_edge_adapter/adapter.py" --port 17669 --in-process presence_edge_root
+fi
 
 echo "⏳ Waiting for Lambda@Edge Root to be ready on port 17668..."
 for i in $(seq 1 30); do
@@ -21,6 +29,6 @@ for i in $(seq 1 30); do
     sleep 1
 done
 
-echo "🔌 Starting Edge Root adapter on port 17669..."
-cd "$DIR/presence_edge_root"
-"$VENV_DIR/bin/python3" adapter.py
+echo "🔌 Starting Lambda@Edge Root adapter on port 17669..."
+exec "$VENV_DIR/bin/python3" "$DIR/presence_edge_adapter/adapter.py" --port 17669 \
+    --function EdgeRootFunction --lambda-endpoint http://localhost:17668
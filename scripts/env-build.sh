@@ -30,6 +30,8 @@ cp -a $WEB_DIR/node_modules $WEB_DIR/target/
 
 echo "🔧 Building SAM API function..."
 pushd $DIR/presence_sam
+# Regenerate the route manifest so the function skips route discovery on cold start
+python3 -m presence_sam.route_manifest
 sam build
 popd
 